@@ -20,6 +20,12 @@ from app.models import (
     llm_call_log_model,
     landing_page_survey_model,
     exercise_description_model,
+    user_activity_log_model,
+    activity_log_aggregate_model,
+    activity_log_rollup_model,
+    llm_job_model,
+    llm_response_cache_model,
+    read_your_writes_pin_model,
 )  
 
 # this is the Alembic Config object, which provides
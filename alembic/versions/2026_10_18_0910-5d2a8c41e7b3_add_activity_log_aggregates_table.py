@@ -0,0 +1,54 @@
+"""Add activity_log_aggregates table
+
+Revision ID: 5d2a8c41e7b3
+Revises: 3fef24c8b1f7
+Create Date: 2026-10-18 09:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2a8c41e7b3'
+down_revision: Union[str, None] = '3fef24c8b1f7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'activity_log_aggregates',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('endpoint', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+        sa.Column('http_method', sqlmodel.sql.sqltypes.AutoString(length=10), nullable=False),
+        sa.Column('action_type', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+        sa.Column('status_class', sqlmodel.sql.sqltypes.AutoString(length=3), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('total_response_time_ms', sa.BigInteger(), nullable=False),
+        sa.Column('latency_le_50_ms', sa.Integer(), nullable=False),
+        sa.Column('latency_le_100_ms', sa.Integer(), nullable=False),
+        sa.Column('latency_le_250_ms', sa.Integer(), nullable=False),
+        sa.Column('latency_le_500_ms', sa.Integer(), nullable=False),
+        sa.Column('latency_le_1000_ms', sa.Integer(), nullable=False),
+        sa.Column('latency_le_2500_ms', sa.Integer(), nullable=False),
+        sa.Column('latency_gt_2500_ms', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint(
+            'bucket_start', 'endpoint', 'http_method', 'action_type', 'status_class',
+            name='uq_activity_log_aggregates_bucket'
+        ),
+    )
+    op.create_index(
+        op.f('ix_activity_log_aggregates_bucket_start'),
+        'activity_log_aggregates', ['bucket_start'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_activity_log_aggregates_bucket_start'), table_name='activity_log_aggregates')
+    op.drop_table('activity_log_aggregates')
@@ -0,0 +1,85 @@
+"""Partition user_activity_logs by month on timestamp
+
+Revision ID: 8b71f0d4c2a9
+Revises: 5d2a8c41e7b3
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b71f0d4c2a9'
+down_revision: Union[str, None] = '5d2a8c41e7b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXED_COLUMNS = ['ip_address', 'is_suspicious', 'session_id', 'timestamp', 'user_id_hash']
+MONTHS_AHEAD = 3
+
+
+def _add_months(value: datetime, months: int) -> datetime:
+    month_index = value.month - 1 + months
+    return value.replace(year=value.year + month_index // 12, month=month_index % 12 + 1)
+
+
+def _rename_to_legacy() -> None:
+    op.execute('ALTER TABLE user_activity_logs RENAME TO user_activity_logs_legacy')
+    op.execute('ALTER TABLE user_activity_logs_legacy RENAME CONSTRAINT user_activity_logs_pkey TO user_activity_logs_legacy_pkey')
+    for column in INDEXED_COLUMNS:
+        op.execute(f'ALTER INDEX ix_user_activity_logs_{column} RENAME TO ix_user_activity_logs_legacy_{column}')
+
+
+def _create_indexes() -> None:
+    for column in INDEXED_COLUMNS:
+        op.create_index(f'ix_user_activity_logs_{column}', 'user_activity_logs', [column], unique=False)
+
+
+def _move_data_and_drop_legacy() -> None:
+    op.execute('INSERT INTO user_activity_logs SELECT * FROM user_activity_logs_legacy')
+    # Sequenz gehört ab jetzt der neuen Tabelle, sonst würde DROP sie mitlöschen
+    op.execute('ALTER SEQUENCE user_activity_logs_id_seq OWNED BY user_activity_logs.id')
+    op.execute('DROP TABLE user_activity_logs_legacy')
+
+
+def upgrade() -> None:
+    _rename_to_legacy()
+
+    op.execute(
+        'CREATE TABLE user_activity_logs (LIKE user_activity_logs_legacy INCLUDING DEFAULTS) '
+        'PARTITION BY RANGE ("timestamp")'
+    )
+    op.execute('ALTER TABLE user_activity_logs ADD CONSTRAINT user_activity_logs_pkey PRIMARY KEY (id, "timestamp")')
+    _create_indexes()
+
+    # Monats-Partitionen vom ältesten vorhandenen Log bis MONTHS_AHEAD in die Zukunft
+    oldest = op.get_bind().execute(sa.text('SELECT min("timestamp") FROM user_activity_logs_legacy')).scalar()
+    current = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    start = (oldest or current).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    last = _add_months(current, MONTHS_AHEAD)
+    while start <= last:
+        end = _add_months(start, 1)
+        op.execute(
+            f'CREATE TABLE user_activity_logs_p{start:%Y%m} PARTITION OF user_activity_logs '
+            f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+        )
+        start = end
+    # Fängt Inserts ab, falls die Partition-Wartung einmal nicht gelaufen ist
+    op.execute('CREATE TABLE user_activity_logs_default PARTITION OF user_activity_logs DEFAULT')
+
+    _move_data_and_drop_legacy()
+
+
+def downgrade() -> None:
+    _rename_to_legacy()
+
+    op.execute('CREATE TABLE user_activity_logs (LIKE user_activity_logs_legacy INCLUDING DEFAULTS)')
+    op.execute('ALTER TABLE user_activity_logs ADD CONSTRAINT user_activity_logs_pkey PRIMARY KEY (id)')
+    _create_indexes()
+
+    # Dropt den partitionierten Parent inkl. aller Partitionen
+    _move_data_and_drop_legacy()
@@ -0,0 +1,84 @@
+"""Add activity log rollup tables
+
+Revision ID: c3e95a17b6d2
+Revises: 8b71f0d4c2a9
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e95a17b6d2'
+down_revision: Union[str, None] = '8b71f0d4c2a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'activity_log_endpoint_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('granularity', sqlmodel.sql.sqltypes.AutoString(length=4), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('endpoint', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+        sa.Column('http_method', sqlmodel.sql.sqltypes.AutoString(length=10), nullable=False),
+        sa.Column('request_count', sa.Integer(), nullable=False),
+        sa.Column('error_count', sa.Integer(), nullable=False),
+        sa.Column('total_response_time_ms', sa.BigInteger(), nullable=False),
+        sa.Column('latency_le_50_ms', sa.Integer(), nullable=False),
+        sa.Column('latency_le_100_ms', sa.Integer(), nullable=False),
+        sa.Column('latency_le_250_ms', sa.Integer(), nullable=False),
+        sa.Column('latency_le_500_ms', sa.Integer(), nullable=False),
+        sa.Column('latency_le_1000_ms', sa.Integer(), nullable=False),
+        sa.Column('latency_le_2500_ms', sa.Integer(), nullable=False),
+        sa.Column('latency_gt_2500_ms', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint(
+            'granularity', 'bucket_start', 'endpoint', 'http_method',
+            name='uq_activity_log_endpoint_rollups_bucket'
+        ),
+    )
+    op.create_index(
+        op.f('ix_activity_log_endpoint_rollups_bucket_start'),
+        'activity_log_endpoint_rollups', ['bucket_start'], unique=False
+    )
+
+    op.create_table(
+        'activity_log_user_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('granularity', sqlmodel.sql.sqltypes.AutoString(length=4), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('user_id_hash', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=False),
+        sa.Column('action_count', sa.Integer(), nullable=False),
+        sa.Column('error_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint(
+            'granularity', 'bucket_start', 'user_id_hash',
+            name='uq_activity_log_user_rollups_bucket'
+        ),
+    )
+    op.create_index(
+        op.f('ix_activity_log_user_rollups_bucket_start'),
+        'activity_log_user_rollups', ['bucket_start'], unique=False
+    )
+
+    op.create_table(
+        'activity_log_rollup_watermarks',
+        sa.Column('name', sqlmodel.sql.sqltypes.AutoString(length=50), nullable=False),
+        sa.Column('processed_until', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('activity_log_rollup_watermarks')
+    op.drop_index(op.f('ix_activity_log_user_rollups_bucket_start'), table_name='activity_log_user_rollups')
+    op.drop_table('activity_log_user_rollups')
+    op.drop_index(op.f('ix_activity_log_endpoint_rollups_bucket_start'), table_name='activity_log_endpoint_rollups')
+    op.drop_table('activity_log_endpoint_rollups')
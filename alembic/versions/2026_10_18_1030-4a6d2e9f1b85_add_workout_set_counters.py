@@ -0,0 +1,49 @@
+"""Add total_sets, done_sets and last_completed_at to workouts
+
+Revision ID: 4a6d2e9f1b85
+Revises: c3e95a17b6d2
+Create Date: 2026-10-18 10:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4a6d2e9f1b85'
+down_revision: Union[str, None] = 'c3e95a17b6d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('workouts', sa.Column('total_sets', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('workouts', sa.Column('done_sets', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('workouts', sa.Column('last_completed_at', sa.DateTime(), nullable=True))
+
+    # Backfill: ein Durchlauf über alle Sets, gruppiert nach Workout
+    op.execute("""
+        UPDATE workouts AS w
+        SET total_sets = c.total_sets,
+            done_sets = c.done_sets,
+            last_completed_at = c.last_completed_at
+        FROM (
+            SELECT b.workout_id,
+                   COUNT(s.id) AS total_sets,
+                   COUNT(s.id) FILTER (WHERE s.status = 'done') AS done_sets,
+                   MAX(s.completed_at) FILTER (WHERE s.status = 'done') AS last_completed_at
+            FROM sets s
+            JOIN exercises e ON s.exercise_id = e.id
+            JOIN blocks b ON e.block_id = b.id
+            GROUP BY b.workout_id
+        ) AS c
+        WHERE w.id = c.workout_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('workouts', 'last_completed_at')
+    op.drop_column('workouts', 'done_sets')
+    op.drop_column('workouts', 'total_sets')
@@ -0,0 +1,31 @@
+"""Add (user_id, date_created DESC, id DESC) index for keyset-paginated workout list
+
+Revision ID: 9e3b7c52d0f4
+Revises: 4a6d2e9f1b85
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e3b7c52d0f4'
+down_revision: Union[str, None] = '4a6d2e9f1b85'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_workouts_user_id_date_created_id',
+        'workouts',
+        ['user_id', sa.text('date_created DESC'), sa.text('id DESC')],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_workouts_user_id_date_created_id', table_name='workouts')
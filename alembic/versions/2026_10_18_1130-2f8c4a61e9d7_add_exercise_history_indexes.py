@@ -0,0 +1,36 @@
+"""Add indexes for per-exercise top-N history lookups
+
+Revision ID: 2f8c4a61e9d7
+Revises: 9e3b7c52d0f4
+Create Date: 2026-10-18 11:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f8c4a61e9d7'
+down_revision: Union[str, None] = '9e3b7c52d0f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_blocks_workout_id'), 'blocks', ['workout_id'], unique=False)
+    op.create_index('ix_exercises_block_id_name', 'exercises', ['block_id', 'name'], unique=False)
+    op.create_index(
+        'ix_sets_done_exercise_id_completed_at',
+        'sets',
+        ['exercise_id', sa.text('completed_at DESC')],
+        unique=False,
+        postgresql_where=sa.text("status = 'done' AND completed_at IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sets_done_exercise_id_completed_at', table_name='sets')
+    op.drop_index('ix_exercises_block_id_name', table_name='exercises')
+    op.drop_index(op.f('ix_blocks_workout_id'), table_name='blocks')
@@ -0,0 +1,26 @@
+"""Add revision to workouts for ETag-based conditional GETs
+
+Revision ID: 6c1d9a8e3f27
+Revises: 2f8c4a61e9d7
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6c1d9a8e3f27'
+down_revision: Union[str, None] = '2f8c4a61e9d7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('workouts', sa.Column('revision', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    op.drop_column('workouts', 'revision')
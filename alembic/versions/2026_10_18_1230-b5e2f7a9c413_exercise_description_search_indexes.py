@@ -0,0 +1,76 @@
+"""Search indexes for exercise_descriptions: pg_trgm, weighted tsvector, JSONB + GIN
+
+Revision ID: b5e2f7a9c413
+Revises: 6c1d9a8e3f27
+Create Date: 2026-10-18 12:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e2f7a9c413'
+down_revision: Union[str, None] = '6c1d9a8e3f27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+JSON_ARRAY_COLUMNS = ('equipment_options', 'target_muscle_groups', 'execution_steps')
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # JSON -> JSONB, damit @> über GIN-Indexes laufen kann
+    for column in JSON_ARRAY_COLUMNS:
+        op.execute(
+            f"ALTER TABLE exercise_descriptions ALTER COLUMN {column} TYPE JSONB USING {column}::jsonb"
+        )
+    op.create_index(
+        'ix_exercise_descriptions_target_muscle_groups', 'exercise_descriptions', ['target_muscle_groups'],
+        unique=False, postgresql_using='gin', postgresql_ops={'target_muscle_groups': 'jsonb_path_ops'},
+    )
+    op.create_index(
+        'ix_exercise_descriptions_equipment_options', 'exercise_descriptions', ['equipment_options'],
+        unique=False, postgresql_using='gin', postgresql_ops={'equipment_options': 'jsonb_path_ops'},
+    )
+
+    # Trigram-Indexes für Fuzzy- und Teilstring-Suche auf den Namen
+    op.create_index(
+        'ix_exercise_descriptions_name_german_trgm', 'exercise_descriptions', ['name_german'],
+        unique=False, postgresql_using='gin', postgresql_ops={'name_german': 'gin_trgm_ops'},
+    )
+    op.create_index(
+        'ix_exercise_descriptions_name_english_trgm', 'exercise_descriptions', ['name_english'],
+        unique=False, postgresql_using='gin', postgresql_ops={'name_english': 'gin_trgm_ops'},
+    )
+
+    # Gewichteter Volltext: Namen (A, sprachneutral) vor deutscher Beschreibung (B)
+    op.execute("""
+        ALTER TABLE exercise_descriptions
+        ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple'::regconfig, coalesce(name_german, '')), 'A') ||
+            setweight(to_tsvector('simple'::regconfig, coalesce(name_english, '')), 'A') ||
+            setweight(to_tsvector('german'::regconfig, coalesce(description_german, '')), 'B')
+        ) STORED
+    """)
+    op.create_index(
+        'ix_exercise_descriptions_search_vector', 'exercise_descriptions', ['search_vector'],
+        unique=False, postgresql_using='gin',
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_exercise_descriptions_search_vector', table_name='exercise_descriptions')
+    op.drop_column('exercise_descriptions', 'search_vector')
+    op.drop_index('ix_exercise_descriptions_name_english_trgm', table_name='exercise_descriptions')
+    op.drop_index('ix_exercise_descriptions_name_german_trgm', table_name='exercise_descriptions')
+    op.drop_index('ix_exercise_descriptions_equipment_options', table_name='exercise_descriptions')
+    op.drop_index('ix_exercise_descriptions_target_muscle_groups', table_name='exercise_descriptions')
+    for column in JSON_ARRAY_COLUMNS:
+        op.execute(
+            f"ALTER TABLE exercise_descriptions ALTER COLUMN {column} TYPE JSON USING {column}::json"
+        )
+    # pg_trgm bleibt installiert (kann von anderen Objekten genutzt werden)
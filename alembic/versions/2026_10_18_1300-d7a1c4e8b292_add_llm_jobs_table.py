@@ -0,0 +1,56 @@
+"""Add llm_jobs table (durable queue for workout generation and revision)
+
+Revision ID: d7a1c4e8b292
+Revises: b5e2f7a9c413
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7a1c4e8b292'
+down_revision: Union[str, None] = 'b5e2f7a9c413'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'llm_jobs',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('kind', sa.String(length=64), nullable=False),
+        sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='queued'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('max_attempts', sa.Integer(), nullable=False, server_default='3'),
+        sa.Column('run_at', sa.DateTime(), nullable=False, server_default=sa.text("(now() AT TIME ZONE 'utc')")),
+        sa.Column('locked_until', sa.DateTime(), nullable=True),
+        sa.Column('locked_by', sa.String(length=255), nullable=True),
+        sa.Column('last_error', sa.String(), nullable=True),
+        sa.Column('cancel_requested', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('workout_id', sa.Integer(), nullable=True),
+        sa.Column('log_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text("(now() AT TIME ZONE 'utc')")),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text("(now() AT TIME ZONE 'utc')")),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_llm_jobs_workout_id', 'llm_jobs', ['workout_id'])
+    # Lease-Query: nur offene Jobs, sortiert nach Fälligkeit
+    op.create_index(
+        'ix_llm_jobs_open_run_at',
+        'llm_jobs',
+        ['run_at'],
+        postgresql_where=sa.text("status IN ('queued', 'running')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_llm_jobs_open_run_at', table_name='llm_jobs')
+    op.drop_index('ix_llm_jobs_workout_id', table_name='llm_jobs')
+    op.drop_table('llm_jobs')
@@ -0,0 +1,46 @@
+"""Add llm_response_cache table and cache hit columns on llm_call_logs
+
+Revision ID: e4b8f16a2c57
+Revises: d7a1c4e8b292
+Create Date: 2026-10-18 13:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b8f16a2c57'
+down_revision: Union[str, None] = 'd7a1c4e8b292'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'llm_response_cache',
+        sa.Column('cache_key', sa.String(length=64), nullable=False),
+        sa.Column('operation', sa.String(length=64), nullable=False),
+        sa.Column('model', sa.String(length=100), nullable=False),
+        sa.Column('user_scope', sa.String(length=255), nullable=False),
+        sa.Column('response', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('hits', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_hit_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('cache_key'),
+    )
+    op.create_index('ix_llm_response_cache_expires_at', 'llm_response_cache', ['expires_at'])
+
+    op.add_column('llm_call_logs', sa.Column('cache_hit', sa.Boolean(), nullable=False, server_default=sa.false()))
+    op.add_column('llm_call_logs', sa.Column('cache_key', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('llm_call_logs', 'cache_key')
+    op.drop_column('llm_call_logs', 'cache_hit')
+    op.drop_index('ix_llm_response_cache_expires_at', table_name='llm_response_cache')
+    op.drop_table('llm_response_cache')
@@ -0,0 +1,31 @@
+"""Add read_your_writes_pins table
+
+Revision ID: f2c9a6d1b7e4
+Revises: e4b8f16a2c57
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c9a6d1b7e4'
+down_revision: Union[str, None] = 'e4b8f16a2c57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'read_your_writes_pins',
+        sa.Column('user_id', sa.String(length=255), nullable=False),
+        sa.Column('pinned_until', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('user_id'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('read_your_writes_pins')
@@ -32,6 +32,11 @@ else:
 
 # 3. Now that the path is set, we can import from 'app'
 from app.llm.utils.db_utils import create_db_session
+from app.services.activity_rollup_service import (
+    get_activity_timeseries,
+    get_endpoint_stats,
+    get_user_activity,
+)
 
 # --- Configuration ---
 LAST_N_DAYS_USER_ACTIVITY = 30
@@ -52,34 +57,30 @@ async def fetch_data(query: str) -> pd.DataFrame:
             # The context manager in create_db_session handles closing
             pass
 
+async def fetch_rollups(fetch_fn, granularity: str, days: int) -> pd.DataFrame:
+    """
+    Reads pre-aggregated rollup rows via app.services.activity_rollup_service.
+    The rollup tables are maintained by scripts/rollup_activity_logs.py.
+    """
+    since = datetime.utcnow() - timedelta(days=days)
+    async for session in create_db_session(use_production=True):
+        rows = await fetch_fn(session, granularity, since)
+        return pd.DataFrame(rows)
+
 async def generate_daily_activity_per_user(days: int) -> go.Figure:
     """
     Generates a bar chart of daily activities per user hash for the last N days.
     """
     print("Generating daily activity per user chart...")
-    query = f"""
-    SELECT
-        DATE(timestamp) as activity_date,
-        user_id_hash,
-        COUNT(*) as action_count
-    FROM
-        user_activity_logs
-    WHERE
-        timestamp >= NOW() - INTERVAL '{days} days'
-        AND user_id_hash != 'anonymous'
-    GROUP BY
-        activity_date,
-        user_id_hash
-    ORDER BY
-        activity_date,
-        action_count DESC;
-    """
-    df = await fetch_data(query)
+    df = await fetch_rollups(get_user_activity, "day", days)
 
     if df.empty:
         print("No data found for daily activity.")
         return go.Figure().update_layout(title_text=f"Keine Benutzeraktivität in den letzten {days} Tagen gefunden")
 
+    df = df.rename(columns={"bucket_start": "activity_date"})
+    df['activity_date'] = pd.to_datetime(df['activity_date']).dt.strftime('%Y-%m-%d')
+
     fig = px.bar(
         df,
         x="activity_date",
@@ -102,23 +103,10 @@ async def generate_daily_activity_per_user(days: int) -> go.Figure:
 
 async def generate_hourly_activity_total(days: int) -> go.Figure:
     """
-    Generates a line chart of total hourly activities for the last N days.
+    Generates a line chart of total hourly activities and errors for the last N days.
     """
     print("Generating hourly activity chart...")
-    query = f"""
-    SELECT
-        DATE_TRUNC('hour', timestamp) as hour,
-        COUNT(*) as action_count
-    FROM
-        user_activity_logs
-    WHERE
-        timestamp >= NOW() - INTERVAL '{days} days'
-    GROUP BY
-        hour
-    ORDER BY
-        hour;
-    """
-    df = await fetch_data(query)
+    df = await fetch_rollups(get_activity_timeseries, "hour", days)
 
     if df.empty:
         print("No data found for hourly activity.")
@@ -126,10 +114,10 @@ async def generate_hourly_activity_total(days: int) -> go.Figure:
 
     fig = px.line(
         df,
-        x="hour",
-        y="action_count",
+        x="bucket_start",
+        y=["requests", "errors"],
         title=f"Gesamte stündliche Aktivität (letzte {days} Tage)",
-        labels={"hour": "Stunde", "action_count": "Anzahl Aktionen"},
+        labels={"bucket_start": "Stunde", "value": "Anzahl Aktionen", "variable": "Typ"},
         markers=True
     )
     fig.update_layout(
@@ -139,6 +127,34 @@ async def generate_hourly_activity_total(days: int) -> go.Figure:
     print("Hourly activity chart generated.")
     return fig
 
+async def generate_endpoint_latency_table(days: int) -> go.Figure:
+    """
+    Generates a table with request count, error rate and p50/p95/p99 latency per endpoint.
+    """
+    print("Generating endpoint latency table...")
+    df = await fetch_rollups(get_endpoint_stats, "day", days)
+
+    if df.empty:
+        print("No data found for endpoint latency.")
+        return go.Figure().update_layout(title_text=f"Keine Endpoint-Daten in den letzten {days} Tagen gefunden")
+
+    df['error_rate'] = (df['error_rate'] * 100).round(2).astype(str) + " %"
+    columns = ["http_method", "endpoint", "requests", "error_rate", "avg_response_time_ms", "p50_ms", "p95_ms", "p99_ms"]
+
+    fig = go.Figure(data=[go.Table(
+        header=dict(values=["Methode", "Endpoint", "Requests", "Fehlerquote", "Ø ms", "p50 ms", "p95 ms", "p99 ms"],
+                    fill_color='paleturquoise',
+                    align='left'),
+        cells=dict(values=[df[col] for col in columns],
+                   fill_color='lavender',
+                   align='left'))
+    ])
+    fig.update_layout(
+        title_text=f"Endpoint-Latenzen (letzte {days} Tage)"
+    )
+    print("Endpoint latency table generated.")
+    return fig
+
 async def generate_llm_activity_table(days: int) -> go.Figure:
     """
     Generates a table of recent LLM activities (workout creation/revision)
@@ -247,6 +263,7 @@ async def main():
     # Generate figures
     fig1 = await generate_daily_activity_per_user(LAST_N_DAYS_USER_ACTIVITY)
     fig2 = await generate_hourly_activity_total(LAST_N_DAYS_HOURLY_ACTIVITY)
+    latency_table_fig = await generate_endpoint_latency_table(LAST_N_DAYS_USER_ACTIVITY)
     llm_table_fig = await generate_llm_activity_table(LAST_N_DAYS_USER_ACTIVITY)
     llm_chart_fig = await generate_llm_activity_chart(LAST_N_DAYS_USER_ACTIVITY)
 
@@ -277,6 +294,9 @@ async def main():
         f.write(f"<h2>Gesamte stündliche Aktivität (Letzte {LAST_N_DAYS_HOURLY_ACTIVITY} Tage)</h2>")
         f.write(fig2.to_html(full_html=False, include_plotlyjs='cdn'))
 
+        f.write(f"<h2>Endpoint-Latenzen (Letzte {LAST_N_DAYS_USER_ACTIVITY} Tage)</h2>")
+        f.write(latency_table_fig.to_html(full_html=False, include_plotlyjs='cdn'))
+
         f.write(f"<h2>LLM-Aktivitäten (Letzte {LAST_N_DAYS_USER_ACTIVITY} Tage)</h2>")
         f.write(llm_chart_fig.to_html(full_html=False, include_plotlyjs='cdn'))
         f.write(llm_table_fig.to_html(full_html=False, include_plotlyjs='cdn'))
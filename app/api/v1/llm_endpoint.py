@@ -15,7 +15,7 @@ from uuid import UUID
 import logging
 from sqlalchemy.orm import selectinload
 from app.llm.workout_generation.workout_parser import update_existing_workout_with_compact_data, update_existing_workout_with_revision_data
-from app.services.workout_service import get_latest_workouts_with_details
+from app.services.workout_service import get_latest_workouts_with_details, refresh_workout_set_counters
 
 
 router = APIRouter()
@@ -394,6 +394,7 @@ async def accept_workout_revision(
         
         db.add(workout)
         
+        await refresh_workout_set_counters(db, [workout_id])
         await db.commit()
         await db.refresh(workout)
         
@@ -507,6 +508,7 @@ async def generate_workout_background(
             )
             
             save_db.add(placeholder_workout)
+            await refresh_workout_set_counters(save_db, [workout_id])
             await save_db.commit()
             
             logger.info(f"[generate_workout_background_v2] Workout {workout_id} successfully updated.")
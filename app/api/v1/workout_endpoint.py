@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, case
+from sqlalchemy import select
 from typing import List, Optional
 from sqlalchemy.orm import selectinload
 from datetime import datetime
@@ -25,6 +25,7 @@ from app.schemas.workout_schema import (
 
 from app.core.auth import get_current_user, User
 from app.db.session import get_session
+from app.services.workout_service import refresh_workout_set_counters
 
 
 # --- API Specific Request Payloads ---
@@ -68,47 +69,17 @@ async def get_user_workouts(
     if not user or not user.training_plan:
         return []
 
-    # ✅ Subqueries for efficient status calculation without loading relationships
-    total_sets_subquery = (
-        select(func.count(Set.id))
-        .select_from(Set)
-        .join(Exercise, Set.exercise_id == Exercise.id)
-        .join(Block, Exercise.block_id == Block.id)
-        .where(Block.workout_id == Workout.id)
-    ).scalar_subquery()
-
-    done_sets_subquery = (
-        select(func.count(Set.id))
-        .select_from(Set)
-        .join(Exercise, Set.exercise_id == Exercise.id)
-        .join(Block, Exercise.block_id == Block.id)
-        .where(
-            Block.workout_id == Workout.id,
-            Set.status == SetStatus.done
-        )
-    ).scalar_subquery()
-
-    # ✅ Status calculation in database
-    status_case = case(
-        (total_sets_subquery == 0, "not_started"),
-        (done_sets_subquery == total_sets_subquery, "done"),
-        (done_sets_subquery > 0, "started"),
-        else_="not_started"
-    ).label("computed_status")
-
-    # ✅ Direct user_id query instead of training_plan_id
+    # ✅ Status aus gepflegten Set-Zählern (total_sets/done_sets) - keine Subqueries über Sets
     workout_query = (
-        select(Workout, status_case)
+        select(Workout)
         .where(Workout.user_id == UUID(current_user.id))  # ✅ Direct user relationship!
         .order_by(Workout.date_created.desc())
     )
 
     result = await db.execute(workout_query)
-    workout_tuples = result.all()
 
-    # ✅ Manual mapping with computed status
     workouts = []
-    for workout_obj, computed_status in workout_tuples:
+    for workout_obj in result.scalars().all():
         workout_dict = {
             "id": workout_obj.id,
             "training_plan_id": workout_obj.training_plan_id,
@@ -118,7 +89,7 @@ async def get_user_workouts(
             "duration": workout_obj.duration,
             "focus": workout_obj.focus,
             "notes": workout_obj.notes,
-            "status": computed_status  # ✅ Directly computed by DB!
+            "status": workout_obj.status  # ✅ Aus total_sets/done_sets
         }
         workouts.append(WorkoutListRead(**workout_dict))
 
@@ -319,6 +290,7 @@ async def save_block(
             if ex_id not in incoming_exercise_ids:
                 await db.delete(existing_exercise)
         
+        await refresh_workout_set_counters(db, [workout_id])
         await db.commit()
         
         # 🎉 Frisch gespeicherten Block laden und serialisieren!
@@ -383,9 +355,9 @@ async def update_set_status_endpoint(
     """
     ✅ BEST PRACTICE: Kombinierte Security Query + Smart Field Updates
     """
-    # ✅ SQLModel One-Liner: Direct set query with security check
-    db_set = await db.scalar(
-        select(Set)
+    # ✅ SQLModel One-Liner: Direct set query with security check (+ workout_id für die Set-Zähler)
+    set_row = (await db.execute(
+        select(Set, Block.workout_id)
         .join(Exercise, Set.exercise_id == Exercise.id)
         .join(Block, Exercise.block_id == Block.id)
         .join(Workout, Block.workout_id == Workout.id)
@@ -393,10 +365,11 @@ async def update_set_status_endpoint(
             Set.id == set_id,
             Workout.user_id == UUID(current_user.id)  # ✅ Direct user security check!
         )
-    )
+    )).first()
 
-    if not db_set:
+    if not set_row:
         raise HTTPException(status_code=404, detail="Set not found or access denied")
+    db_set, workout_id = set_row
 
     # ✅ Smart Field Updates - Pydantic validator macht datetime naive automatisch!
     for field, value in payload.model_dump(exclude_unset=True).items():
@@ -409,6 +382,7 @@ async def update_set_status_endpoint(
         db_set.completed_at = None
 
     try:
+        await refresh_workout_set_counters(db, [workout_id])
         await db.commit()
         await db.refresh(db_set)
         return SetRead.model_validate(db_set)  # ✅ Auto-Serialization!
@@ -522,6 +496,7 @@ async def create_manual_activity(
         # ✅ Safe: Get workout_id while object is still attached to session
         workout_id = workout.id
         
+        await refresh_workout_set_counters(db, [workout_id])
         await db.commit()  # ✅ Commit all changes
         
         return {
@@ -9,6 +9,7 @@ from .showcase_endpoint import router as showcase_router
 from .llm_log_endpoint import router as llm_log_router
 from .training_profile_endpoint import router as training_profile_router
 from .exercise_description_endpoint import router as exercise_description_router
+from .activity_analytics_endpoint import router as activity_analytics_router
 
 def create_api_v2_router() -> APIRouter:
     """
@@ -27,5 +28,6 @@ def create_api_v2_router() -> APIRouter:
     api_router.include_router(llm_log_router, tags=["LLM Logs"])
     api_router.include_router(training_profile_router, prefix="/training-profiles", tags=["Training Profiles"])
     api_router.include_router(exercise_description_router, prefix="/exercise-descriptions", tags=["Exercise Descriptions"])
+    api_router.include_router(activity_analytics_router, tags=["Admin"])
     
     return api_router 
\ No newline at end of file
@@ -0,0 +1,67 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, Literal
+from datetime import datetime, timedelta
+
+from app.core.auth import require_admin, User
+from app.db.session import get_session
+from app.services.activity_rollup_service import (
+    get_activity_timeseries,
+    get_endpoint_stats,
+    get_user_activity,
+)
+
+router = APIRouter(prefix="/admin/activity", tags=["admin"])
+
+Granularity = Literal["hour", "day"]
+
+
+@router.get("/endpoints", response_model=Dict[str, Any])
+async def get_endpoint_analytics(
+    days: int = Query(7, ge=1, le=365),
+    granularity: Granularity = "day",
+    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_session),
+):
+    """
+    Requests, Fehlerquote und Latenz-Perzentile (p50/p95/p99) pro Endpoint.
+    Liest nur die Rollup-Tabellen - keine Scans über user_activity_logs.
+    """
+    since = datetime.utcnow() - timedelta(days=days)
+    return {
+        "since": since.isoformat(),
+        "granularity": granularity,
+        "endpoints": await get_endpoint_stats(db, granularity, since),
+    }
+
+
+@router.get("/timeseries", response_model=Dict[str, Any])
+async def get_activity_timeseries_analytics(
+    days: int = Query(7, ge=1, le=365),
+    granularity: Granularity = "hour",
+    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_session),
+):
+    """Gesamte Requests und Fehlerquote pro Stunde bzw. Tag."""
+    since = datetime.utcnow() - timedelta(days=days)
+    return {
+        "since": since.isoformat(),
+        "granularity": granularity,
+        "buckets": await get_activity_timeseries(db, granularity, since),
+    }
+
+
+@router.get("/users", response_model=Dict[str, Any])
+async def get_user_activity_analytics(
+    days: int = Query(30, ge=1, le=365),
+    granularity: Granularity = "day",
+    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_session),
+):
+    """Aktionen pro anonymisiertem (wöchentlich rotierendem) User-Hash."""
+    since = datetime.utcnow() - timedelta(days=days)
+    return {
+        "since": since.isoformat(),
+        "granularity": granularity,
+        "users": await get_user_activity(db, granularity, since),
+    }
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Body, BackgroundTasks
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
-from app.core.supabase import get_supabase_client
+from app.core.supabase import get_supabase_client, create_supabase_sign_in_client
 from app.db.session import get_session
 from app.models.user_model import UserModel
 from app.core.auth import get_current_user, User
@@ -95,7 +95,8 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login-form")
 
 
 async def _login(email: str, password: str, db: Session) -> TokenResponse:
-    supabase = await get_supabase_client()
+    # Nicht der geteilte anon-Client: sign_in speichert die User-Session im Client
+    supabase = await create_supabase_sign_in_client()
     response = await supabase.auth.sign_in_with_password(
         {"email": email, "password": password}
     )
@@ -1,61 +1,112 @@
-from fastapi import APIRouter, Depends, Query, Response
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
-from app.db.session import get_session
-from app.services.exercise_description_service import (
-    get_all_exercise_descriptions,
-    get_exercise_description_by_name
-)
-from app.schemas.exercise_description_schema import ExerciseDescriptionRead
+from app.db.session import get_read_session
+from app.services.exercise_catalog_service import get_exercise_catalog
+from app.services.exercise_description_service import search_exercise_descriptions
+from app.schemas.exercise_description_schema import ExerciseDescriptionRead, ExerciseDescriptionSearchResult
 from app.core.auth import get_current_user, User
+from app.core.etag import make_etag, etag_matches, not_modified
 
 router = APIRouter(tags=["exercise-descriptions"])
 
+# Übungsbeschreibungen ändern sich selten - 24h Client-Cache, danach Revalidierung per ETag
+CACHE_CONTROL = "public, max-age=86400"
+
 
 @router.get("/", response_model=List[ExerciseDescriptionRead])
 async def get_exercise_descriptions(
     response: Response,
     category: Optional[str] = Query(None, description="Filter by muscle group category"),
     search: Optional[str] = Query(None, description="Search term for exercise names"),
-    db: AsyncSession = Depends(get_session),
+    if_none_match: Optional[str] = Header(default=None),
+    db: AsyncSession = Depends(get_read_session),
     current_user: User = Depends(get_current_user)
-) -> List[ExerciseDescriptionRead]:
+):
     """
     Get all exercise descriptions with optional filtering.
-    
-    Since exercise descriptions rarely change, this endpoint sets cache headers
-    to enable client-side caching for 24 hours.
+
+    Served from the in-process catalog snapshot: the unfiltered list is returned as
+    pre-serialized JSON, and a matching If-None-Match is answered with 304.
+    """
+    catalog = await get_exercise_catalog().get(db)
+
+    if not category and not search:
+        headers = {"ETag": catalog.etag, "Cache-Control": CACHE_CONTROL}
+        if etag_matches(if_none_match, catalog.etag):
+            return not_modified(catalog.etag)
+        return Response(content=catalog.json_bytes, media_type="application/json", headers=headers)
+
+    etag = make_etag(catalog.etag, category, search)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+    exercises = catalog.exercises
+    if category:
+        # Filter by muscle groups containing the category
+        exercises = [exercise for exercise in exercises if category in exercise.target_muscle_groups]
+    if search:
+        search_term = search.lower()
+        exercises = [
+            exercise for exercise in exercises
+            if search_term in exercise.name_german.lower() or search_term in exercise.name_english.lower()
+        ]
+    return list(exercises)
+
+
+@router.get("/search", response_model=List[ExerciseDescriptionSearchResult])
+async def search_exercise_descriptions_endpoint(
+    q: str = Query(..., min_length=2, max_length=100, description="Search term (names and German descriptions)"),
+    category: Optional[str] = Query(None, description="Filter by muscle group category"),
+    equipment: Optional[str] = Query(None, description="Filter by equipment option"),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_session),
+    current_user: User = Depends(get_current_user)
+) -> List[ExerciseDescriptionSearchResult]:
+    """
+    Ranked fuzzy search: full text over names and German descriptions plus trigram
+    similarity on the names, so typos still find the exercise.
     """
-    # Set cache headers for 24-hour caching
-    response.headers["Cache-Control"] = "public, max-age=86400"
-    
-    exercises = await get_all_exercise_descriptions(
+    results = await search_exercise_descriptions(
         db=db,
+        search=q,
         category=category,
-        search=search
+        equipment=equipment,
+        limit=limit
     )
-    
-    return exercises
+    return [
+        ExerciseDescriptionSearchResult(
+            **ExerciseDescriptionRead.model_validate(exercise).model_dump(),
+            score=round(score, 4)
+        )
+        for exercise, score in results
+    ]
 
 
 @router.get("/{name_german}", response_model=ExerciseDescriptionRead)
 async def get_exercise_description(
     name_german: str,
     response: Response,
-    db: AsyncSession = Depends(get_session),
+    if_none_match: Optional[str] = Header(default=None),
+    db: AsyncSession = Depends(get_read_session),
     current_user: User = Depends(get_current_user)
-) -> ExerciseDescriptionRead:
+):
     """
     Get a specific exercise description by German name.
     """
-    # Set cache headers for 24-hour caching
-    response.headers["Cache-Control"] = "public, max-age=86400"
-    
-    exercise = await get_exercise_description_by_name(db=db, name=name_german)
-    
+    catalog = await get_exercise_catalog().get(db)
+    exercise = catalog.by_name_german.get(name_german)
+
     if not exercise:
-        from fastapi import HTTPException
         raise HTTPException(status_code=404, detail="Exercise description not found")
-    
-    return exercise
\ No newline at end of file
+
+    etag = make_etag(catalog.etag, name_german)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+    return exercise
@@ -1,16 +1,30 @@
 # Fixed imports
 from fastapi import APIRouter, HTTPException, Depends, Request, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import delete, select
 from sqlalchemy.orm import selectinload
 from uuid import UUID
-from typing import List
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Set, Tuple
+import asyncio
+import json
 import logging
+from contextlib import AsyncExitStack
 
 from app.core.auth import get_current_user, User
 from app.db.session import get_session
-from app.db.session import create_session
+from app.db.session import create_session, job_context, pin_user_to_primary
+from app.services.workout_service import refresh_workout_set_counters
+from app.llm.utils.generation_tasks import generation_tasks, GenerationCancelled
+from app.core.config import get_config
+from app.services.llm_status_events import get_llm_status_listener, notify_llm_block, notify_llm_blocks_reset
+from app.services.job_queue_service import (
+    enqueue_job,
+    request_job_cancel,
+    JOB_KIND_WORKOUT_GENERATION,
+    JOB_KIND_WORKOUT_REVISION,
+)
 from app.services.llm_logging_service import (
     log_operation_success,
     log_operation_failed,
@@ -19,6 +33,8 @@ from app.services.llm_logging_service import (
 from app.models.llm_call_log_model import LlmOperationStatus
 from app.models.workout_model import Workout
 from app.models.block_model import Block
+from app.models.exercise_model import Exercise
+from app.schemas.workout_schema import BlockRead
 from app.models.llm_call_log_model import LlmCallLog
 
 from app.llm.workout_revision.workout_revision_schemas import (
@@ -33,6 +49,8 @@ from app.llm.workout_generation.workout_parser import (
 # Compressed Workout Generation Imports
 from app.llm.workout_generation_v1.versions.compressed_20250731.service import (
     generate_compressed_workout,
+    generate_compressed_workout_streaming,
+    build_block_from_compact,
     CompressedWorkoutInput,
 )
 
@@ -52,6 +70,14 @@ class CreateWorkoutRequest(BaseModel):
     duration_minutes: int | None = Field(
         None, description="Optional duration in minutes for workout generation"
     )
+    stream: bool | None = Field(
+        None,
+        description="Streaming-Modus: Blöcke werden gespeichert und per SSE gepusht, sobald sie fertig sind "
+        "(Default: LLM_STREAMING_GENERATION_ENABLED)",
+    )
+    bypass_cache: bool = Field(
+        False, description="LLM-Response-Cache nicht lesen (z.B. bewusst neu generieren)"
+    )
 
 
 @router.post("/llm/start-workout-creation")
@@ -94,6 +120,18 @@ async def start_workout_creation(
         )
         db.add(log_entry)
 
+        use_job_queue = get_config().JOB_QUEUE_ENABLED
+        if use_job_queue:
+            # Job in derselben Transaktion wie Placeholder und Log - alles oder nichts
+            await db.flush()
+            await enqueue_job(
+                db,
+                kind=JOB_KIND_WORKOUT_GENERATION,
+                payload={"user_id": current_user.id, "request_data": request_data.model_dump()},
+                workout_id=workout_id,
+                log_id=log_entry.id,
+            )
+
         # Transaktion für beide Objekte committen
         await db.commit()
 
@@ -104,16 +142,17 @@ async def start_workout_creation(
         log_id = log_entry.id
         logger.info("[llm/start-workout] Log-Eintrag erstellt mit ID: %s", log_id)
 
-        # 2. Starte Background-Task mit log_id für Status-Updates
-        background_tasks.add_task(
-            generate_workout_background,
-            workout_id=workout_id,
-            user_id=current_user.id,
-            request_data=request_data,
-            session_duration=request_data.duration_minutes,
-            profile_id=request_data.profile_id,
-            log_id=log_id,
-        )
+        # 2. Ohne Job-Queue: Background-Task mit log_id für Status-Updates
+        if not use_job_queue:
+            background_tasks.add_task(
+                generate_workout_background,
+                workout_id=workout_id,
+                user_id=current_user.id,
+                request_data=request_data,
+                session_duration=request_data.duration_minutes,
+                profile_id=request_data.profile_id,
+                log_id=log_id,
+            )
 
         return {
             "success": True,
@@ -132,6 +171,78 @@ async def start_workout_creation(
         )
 
 
+@router.post("/llm/cancel-workout-creation/{workout_id}")
+async def cancel_workout_creation(
+    workout_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_session),
+):
+    """
+    Bricht eine laufende Workout-Generierung ab - der Request zum LLM wird sofort geschlossen.
+    Das Placeholder-Workout wird entfernt, der Status wechselt auf "failed" (Abgebrochen).
+    """
+    llm_log = await db.scalar(
+        select(LlmCallLog)
+        .where(
+            LlmCallLog.workout_id == workout_id,
+            LlmCallLog.user_id == current_user.id,
+        )
+        .order_by(LlmCallLog.timestamp.desc())
+        .limit(1)
+    )
+    if not llm_log:
+        raise HTTPException(status_code=404, detail=f"Keine Workout-Erstellung für ID {workout_id} gefunden.")
+
+    if llm_log.status != LlmOperationStatus.STARTED:
+        return {"success": False, "message": "Workout-Erstellung läuft nicht mehr", "workout_id": workout_id}
+
+    # Die Generierung läuft als Background-Task auf dem Worker, der sie gestartet hat
+    cancelled = generation_tasks.cancel(workout_id)
+    if not cancelled and get_config().JOB_QUEUE_ENABLED:
+        # Job-Worker holt den Abbruch beim nächsten Heartbeat bzw. vor dem Start ab
+        cancelled = await request_job_cancel(db, workout_id) > 0
+        await db.commit()
+    return {
+        "success": cancelled,
+        "message": "Workout-Erstellung abgebrochen" if cancelled else "Workout-Erstellung läuft auf einem anderen Worker",
+        "workout_id": workout_id,
+    }
+
+
+def _workout_status_payload(llm_log: LlmCallLog, workout_id: int) -> dict:
+    """Status-Antwort einer Workout-Erstellung (Polling und SSE-Stream)."""
+    if llm_log.status == LlmOperationStatus.STARTED:
+        return {
+            "status": "generating",
+            "message": "Workout wird generiert...",
+            "workout_id": workout_id,
+        }
+    elif llm_log.status == LlmOperationStatus.SUCCESS:
+        return {
+            "status": "completed",
+            "message": "Workout erfolgreich erstellt",
+            "workout_id": workout_id,
+        }
+    elif llm_log.status == LlmOperationStatus.FAILED:
+        return {
+            "status": "failed",
+            "message": f"Fehler bei der Erstellung: {llm_log.error_message or 'Unbekannter Fehler'}",
+            "workout_id": workout_id,
+        }
+    else:
+        # Fallback für unbekannte Status
+        logger.warning(
+            "[llm/workout-status] Unbekannter Status: %s für workout_id: %s",
+            llm_log.status,
+            workout_id,
+        )
+        return {
+            "status": "unknown",
+            "message": f"Unbekannter Status: {llm_log.status}",
+            "workout_id": workout_id,
+        }
+
+
 @router.get("/llm/workout-status/{workout_id}")
 async def get_workout_status(
     workout_id: int,
@@ -169,36 +280,7 @@ async def get_workout_status(
             )
 
         # 2. Status basierend auf Log-Eintrag bestimmen
-        if llm_log.status == LlmOperationStatus.STARTED:
-            return {
-                "status": "generating",
-                "message": "Workout wird generiert...",
-                "workout_id": workout_id,
-            }
-        elif llm_log.status == LlmOperationStatus.SUCCESS:
-            return {
-                "status": "completed",
-                "message": "Workout erfolgreich erstellt",
-                "workout_id": workout_id,
-            }
-        elif llm_log.status == LlmOperationStatus.FAILED:
-            return {
-                "status": "failed",
-                "message": f"Fehler bei der Erstellung: {llm_log.error_message or 'Unbekannter Fehler'}",
-                "workout_id": workout_id,
-            }
-        else:
-            # Fallback für unbekannte Status
-            logger.warning(
-                "[llm/workout-status] Unbekannter Status: %s für workout_id: %s",
-                llm_log.status,
-                workout_id,
-            )
-            return {
-                "status": "unknown",
-                "message": f"Unbekannter Status: {llm_log.status}",
-                "workout_id": workout_id,
-            }
+        return _workout_status_payload(llm_log, workout_id)
 
     except HTTPException:
         # HTTPExceptions weiterleiten (z.B. 404 für fehlenden Log)
@@ -253,6 +335,22 @@ async def start_workout_revision(
             workout_id=workout_id,
         )
         db.add(log_entry)
+
+        use_job_queue = get_config().JOB_QUEUE_ENABLED
+        if use_job_queue:
+            await db.flush()
+            await enqueue_job(
+                db,
+                kind=JOB_KIND_WORKOUT_REVISION,
+                payload={
+                    "user_id": current_user.id,
+                    "user_feedback": request_data.user_feedback,
+                    "bypass_cache": request_data.bypass_cache,
+                },
+                workout_id=workout_id,
+                log_id=log_entry.id,
+            )
+
         await db.commit()
         await db.refresh(log_entry)
 
@@ -261,18 +359,20 @@ async def start_workout_revision(
             "[llm/start-workout-revision-v2] Log-Eintrag erstellt mit ID: %s", log_id
         )
 
-        # 3. Starte Background-Task für V2 Revision (direkter Austausch)
-        from app.llm.workout_revision.workout_revision_service import (
-            revise_workout_background_v2,
-        )
+        # 3. Ohne Job-Queue: Background-Task für V2 Revision (direkter Austausch)
+        if not use_job_queue:
+            from app.llm.workout_revision.workout_revision_service import (
+                revise_workout_background_v2,
+            )
 
-        background_tasks.add_task(
-            revise_workout_background_v2,
-            workout_id=workout_id,
-            user_id=current_user.id,
-            user_feedback=request_data.user_feedback,
-            log_id=log_id,
-        )
+            background_tasks.add_task(
+                revise_workout_background_v2,
+                workout_id=workout_id,
+                user_id=current_user.id,
+                user_feedback=request_data.user_feedback,
+                log_id=log_id,
+                bypass_cache=request_data.bypass_cache,
+            )
 
         return {
             "success": True,
@@ -292,6 +392,69 @@ async def start_workout_revision(
         )
 
 
+async def _revision_status_payload(db: AsyncSession, llm_log: LlmCallLog) -> dict:
+    """Status-Antwort einer Workout-Revision (Polling und SSE-Stream)."""
+    workout_id = llm_log.workout_id
+    log_id = llm_log.id
+
+    # Status basierend auf Log-Eintrag bestimmen
+    if llm_log.status == LlmOperationStatus.STARTED:
+        return {
+            "status": "revising",
+            "message": "Workout wird überarbeitet...",
+            "workout_id": workout_id,
+            "log_id": log_id,
+            "has_revision_data": False,
+            "revision_data": None,
+        }
+    elif llm_log.status == LlmOperationStatus.SUCCESS:
+        workout_stmt = select(Workout).where(Workout.id == workout_id)
+        workout_result = await db.execute(workout_stmt)
+        workout = workout_result.scalar_one_or_none()
+
+        if not workout:
+            logger.error(
+                f"[llm/workout-revision-status-v2] Workout {workout_id} nicht gefunden für Log {log_id}"
+            )
+            raise HTTPException(
+                status_code=404,
+                detail=f"Zugehöriges Workout {workout_id} nicht gefunden.",
+            )
+
+        has_data = workout.revised_workout_data is not None
+        return {
+            "status": "completed",
+            "message": "Workout-Revision erfolgreich abgeschlossen",
+            "workout_id": workout_id,
+            "log_id": log_id,
+            "has_revision_data": has_data,
+            "revision_data": workout.revised_workout_data,
+        }
+    elif llm_log.status == LlmOperationStatus.FAILED:
+        return {
+            "status": "failed",
+            "message": f"Fehler bei der Revision: {llm_log.error_message or 'Unbekannter Fehler'}",
+            "workout_id": workout_id,
+            "log_id": log_id,
+            "has_revision_data": False,
+            "revision_data": None,
+        }
+    else:
+        logger.warning(
+            "[llm/workout-revision-status-v2] Unbekannter Status: %s für log_id: %s",
+            llm_log.status,
+            log_id,
+        )
+        return {
+            "status": "unknown",
+            "message": f"Unbekannter Status: {llm_log.status}",
+            "workout_id": workout_id,
+            "log_id": log_id,
+            "has_revision_data": False,
+            "revision_data": None,
+        }
+
+
 @router.get("/llm/workout-revision-status/{log_id}")
 async def get_workout_revision_status(
     log_id: int,
@@ -327,64 +490,7 @@ async def get_workout_revision_status(
                 detail=f"Keine Workout-Revision für Log-ID {log_id} gefunden.",
             )
 
-        workout_id = llm_log.workout_id
-
-        # Status basierend auf Log-Eintrag bestimmen
-        if llm_log.status == LlmOperationStatus.STARTED:
-            return {
-                "status": "revising",
-                "message": "Workout wird überarbeitet...",
-                "workout_id": workout_id,
-                "log_id": log_id,
-                "has_revision_data": False,
-                "revision_data": None,
-            }
-        elif llm_log.status == LlmOperationStatus.SUCCESS:
-            workout_stmt = select(Workout).where(Workout.id == workout_id)
-            workout_result = await db.execute(workout_stmt)
-            workout = workout_result.scalar_one_or_none()
-
-            if not workout:
-                logger.error(
-                    f"[llm/workout-revision-status-v2] Workout {workout_id} nicht gefunden für Log {log_id}"
-                )
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Zugehöriges Workout {workout_id} nicht gefunden.",
-                )
-
-            has_data = workout.revised_workout_data is not None
-            return {
-                "status": "completed",
-                "message": "Workout-Revision erfolgreich abgeschlossen",
-                "workout_id": workout_id,
-                "log_id": log_id,
-                "has_revision_data": has_data,
-                "revision_data": workout.revised_workout_data,
-            }
-        elif llm_log.status == LlmOperationStatus.FAILED:
-            return {
-                "status": "failed",
-                "message": f"Fehler bei der Revision: {llm_log.error_message or 'Unbekannter Fehler'}",
-                "workout_id": workout_id,
-                "log_id": log_id,
-                "has_revision_data": False,
-                "revision_data": None,
-            }
-        else:
-            logger.warning(
-                "[llm/workout-revision-status-v2] Unbekannter Status: %s für log_id: %s",
-                llm_log.status,
-                log_id,
-            )
-            return {
-                "status": "unknown",
-                "message": f"Unbekannter Status: {llm_log.status}",
-                "workout_id": workout_id,
-                "log_id": log_id,
-                "has_revision_data": False,
-                "revision_data": None,
-            }
+        return await _revision_status_payload(db, llm_log)
 
     except HTTPException:
         raise
@@ -402,7 +508,8 @@ async def update_workout_in_database(
     workout_id: int,
     new_blocks: List[Block],
     workout_updates: dict,
-    preserve_user_data: bool = True
+    preserve_user_data: bool = True,
+    replace_blocks: bool = True
 ) -> Workout:
     """
     Generic function to update a workout in the database.
@@ -413,6 +520,7 @@ async def update_workout_in_database(
         new_blocks: List of new blocks to add to the workout
         workout_updates: Dictionary of workout fields to update
         preserve_user_data: Whether to preserve user_id and other user-specific fields
+        replace_blocks: False keeps the existing blocks (already persisted while streaming)
         
     Returns:
         Updated workout object
@@ -430,9 +538,10 @@ async def update_workout_in_database(
         raise ValueError(f"Workout with ID {workout_id} not found")
     
     # Delete existing blocks
-    for block in existing_workout.blocks:
-        await db.delete(block)
-    await db.flush()
+    if replace_blocks:
+        for block in existing_workout.blocks:
+            await db.delete(block)
+        await db.flush()
     
     # Update workout fields from the updates dictionary
     if "name" in workout_updates:
@@ -453,8 +562,10 @@ async def update_workout_in_database(
         existing_workout.training_plan_id = workout_updates["training_plan_id"]
     
     # Add new blocks
-    existing_workout.blocks = new_blocks
+    if replace_blocks:
+        existing_workout.blocks = new_blocks
     
+    await refresh_workout_set_counters(db, [workout_id])
     # The existing_workout is already tracked by the session, so we just commit
     await db.commit()
     await db.refresh(existing_workout)
@@ -462,6 +573,182 @@ async def update_workout_in_database(
     return existing_workout
 
 
+# --- Status per Server-Sent Events (statt Polling) ---
+
+# Nach diesen Status ändert sich nichts mehr - der Stream wird geschlossen
+_TERMINAL_STATUSES = {"completed", "failed", "unknown"}
+
+_SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def _status_event_stream(
+    load_status: Callable[[], Awaitable[Optional[dict]]],
+    workout_id: Optional[int] = None,
+    log_id: Optional[int] = None,
+    load_blocks: Optional[Callable[[Set[int]], Awaitable[Tuple[bool, List[dict]]]]] = None,
+) -> AsyncIterator[str]:
+    """
+    Sendet den aktuellen Status und danach jeden Übergang, bis ein Endstatus erreicht ist.
+
+    Ein NOTIFY löst einen Status-Read aus; zusätzlich wird bei jedem Keepalive die DB
+    geprüft, damit ein verpasstes NOTIFY (z.B. Reconnect des Listeners) nur Latenz kostet.
+
+    Mit load_blocks (Streaming-Generierung) werden während "generating" alle gespeicherten,
+    noch nicht gesendeten Blöcke als event: block gesendet - auch die, die vor dem Verbinden
+    fertig wurden. Werden gesendete Blöcke wieder gelöscht (Retry über die Job-Queue, Fehler),
+    kommt event: reset - der Client verwirft alle Blöcke, danach folgen die aktuellen erneut.
+    Nach "completed" lädt der Client das Workout wie bisher.
+    """
+    config = get_config()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + config.LLM_STATUS_STREAM_MAX_SECONDS
+
+    # Erst abonnieren, dann lesen - sonst geht ein Übergang dazwischen verloren
+    async with get_llm_status_listener().subscribe(workout_id=workout_id, log_id=log_id) as queue:
+        last_payload = None
+        sent_block_ids: Set[int] = set()
+        while True:
+            try:
+                payload = await load_status()
+                if payload is not None and load_blocks is not None and payload["status"] == "generating":
+                    reset, blocks = await load_blocks(sent_block_ids)
+                    if reset:
+                        sent_block_ids.clear()
+                        yield _sse_event("reset", {"workout_id": workout_id})
+                    for block in blocks:
+                        sent_block_ids.add(block["id"])
+                        yield _sse_event("block", block)
+                elif payload is not None and payload["status"] == "failed" and sent_block_ids:
+                    # Gestreamte Blöcke wurden beim Fehler verworfen
+                    sent_block_ids.clear()
+                    yield _sse_event("reset", {"workout_id": workout_id})
+            except Exception as e:
+                logger.error("[llm/status-stream] Status check failed: %s", str(e))
+                yield _sse_event("error", {"message": "Status konnte nicht geladen werden"})
+                return
+            if payload is None:
+                yield _sse_event("error", {"message": "Status nicht gefunden"})
+                return
+
+            if payload != last_payload:
+                yield _sse_event("status", payload)
+                last_payload = payload
+            if payload["status"] in _TERMINAL_STATUSES:
+                return
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                # Client verbindet sich neu (EventSource) oder fällt auf Polling zurück
+                yield _sse_event("timeout", {"message": "Stream-Limit erreicht"})
+                return
+            try:
+                await asyncio.wait_for(queue.get(), timeout=min(config.LLM_STATUS_STREAM_KEEPALIVE_SECONDS, remaining))
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+
+
+async def _load_workout_status(workout_id: int, user_id: str) -> Optional[dict]:
+    async with create_session() as db:
+        llm_log = await db.scalar(
+            select(LlmCallLog)
+            .where(
+                LlmCallLog.workout_id == workout_id,
+                LlmCallLog.user_id == user_id,
+            )
+            .order_by(LlmCallLog.timestamp.desc())
+            .limit(1)
+        )
+    return _workout_status_payload(llm_log, workout_id) if llm_log else None
+
+
+async def _load_streamed_blocks(workout_id: int, sent_block_ids: Set[int]) -> Tuple[bool, List[dict]]:
+    """
+    Gespeicherte Blöcke des Workouts (Streaming-Generierung), die noch nicht gesendet wurden.
+    Fehlt ein bereits gesendeter Block, wurde neu begonnen: (True, alle aktuellen Blöcke).
+    Geprüft wird über die DB, damit auch ein verpasstes Reset-NOTIFY erkannt wird.
+    """
+    async with create_session() as db:
+        current_ids = set((await db.execute(
+            select(Block.id).where(Block.workout_id == workout_id)
+        )).scalars().all())
+        reset = not sent_block_ids <= current_ids
+        new_ids = current_ids if reset else current_ids - sent_block_ids
+        if not new_ids:
+            return reset, []
+        blocks = (await db.execute(
+            select(Block)
+            .where(Block.id.in_(new_ids))
+            .options(selectinload(Block.exercises).selectinload(Exercise.sets))
+            .order_by(Block.position)
+        )).scalars().all()
+        return reset, [BlockRead.model_validate(block).model_dump(mode="json") for block in blocks]
+
+
+async def _load_revision_status(log_id: int, user_id: str) -> Optional[dict]:
+    async with create_session() as db:
+        llm_log = await db.scalar(
+            select(LlmCallLog).where(
+                LlmCallLog.id == log_id,
+                LlmCallLog.user_id == user_id,
+                LlmCallLog.llm_operation_type == "workout_revision",
+            )
+        )
+        return await _revision_status_payload(db, llm_log) if llm_log else None
+
+
+@router.get("/llm/workout-status/{workout_id}/stream")
+async def stream_workout_status(
+    workout_id: int,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Status der Workout-Erstellung als Server-Sent Events (event: status), ersetzt das Polling
+    von /llm/workout-status. Der Stream endet nach "completed" bzw. "failed".
+    Im Streaming-Modus kommt jeder fertige Block sofort als event: block (BlockRead);
+    event: reset heißt, alle bisher empfangenen Blöcke verwerfen.
+    """
+    initial = await _load_workout_status(workout_id, current_user.id)
+    if initial is None:
+        raise HTTPException(status_code=404, detail=f"Keine Workout-Erstellung für ID {workout_id} gefunden.")
+
+    return StreamingResponse(
+        _status_event_stream(
+            lambda: _load_workout_status(workout_id, current_user.id),
+            workout_id=workout_id,
+            load_blocks=lambda sent_block_ids: _load_streamed_blocks(workout_id, sent_block_ids),
+        ),
+        media_type="text/event-stream",
+        headers=_SSE_HEADERS,
+    )
+
+
+@router.get("/llm/workout-revision-status/{log_id}/stream")
+async def stream_workout_revision_status(
+    log_id: int,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Status der Workout-Revision als Server-Sent Events; das "completed"-Event enthält
+    revision_data wie /llm/workout-revision-status.
+    """
+    initial = await _load_revision_status(log_id, current_user.id)
+    if initial is None:
+        raise HTTPException(status_code=404, detail=f"Keine Workout-Revision für Log-ID {log_id} gefunden.")
+
+    return StreamingResponse(
+        _status_event_stream(
+            lambda: _load_revision_status(log_id, current_user.id),
+            log_id=log_id,
+        ),
+        media_type="text/event-stream",
+        headers=_SSE_HEADERS,
+    )
+
+
 @router.post("/llm/accept-workout-revision")
 async def accept_workout_revision(
     workout_id: int,
@@ -517,6 +804,7 @@ async def accept_workout_revision(
 
         db.add(workout)
 
+        await refresh_workout_set_counters(db, [workout_id])
         await db.commit()
         await db.refresh(workout)
 
@@ -533,6 +821,18 @@ async def accept_workout_revision(
         )
 
 
+async def _discard_streamed_blocks(job, workout_id: int, log_id: int) -> None:
+    """Teilweise gestreamtes Workout nach einem Fehler wieder leeren (wie ohne Streaming)."""
+    try:
+        async with job.step() as cleanup_db:
+            await cleanup_db.execute(delete(Block).where(Block.workout_id == workout_id))
+            await refresh_workout_set_counters(cleanup_db, [workout_id])
+            # SSE-Clients haben die Blöcke schon angezeigt - sie müssen sie wieder entfernen
+            await notify_llm_blocks_reset(cleanup_db, log_id, workout_id)
+    except Exception as cleanup_e:
+        logger.error(f"[generate_workout_background_v2] Failed to discard streamed blocks: {cleanup_e}")
+
+
 async def generate_workout_background(
     workout_id: int,
     user_id: str,
@@ -540,11 +840,15 @@ async def generate_workout_background(
     log_id: int,
     session_duration: int | None = None,
     profile_id: int | None = None,
+    reraise: bool = False,
 ):
     """
     ✅ REFACTORED: Background task for compressed workout generation.
     Uses the compressed format with ~90% token reduction.
     Clean separation: Generation → Parsing → Database Update
+
+    reraise=True (Job-Worker): Fehler werden nicht geloggt, sondern weitergereicht -
+    Retry bzw. FAILED-Status übernimmt die Job-Queue.
     """
     logger.info(
         f"[generate_workout_background_v2] Starting compressed generation for workout_id: {workout_id}"
@@ -554,98 +858,159 @@ async def generate_workout_background(
     timer.start()
 
     user_id_uuid = UUID(user_id)
+    # Positionen der Blöcke, die im Streaming-Modus schon gespeichert wurden
+    streamed_positions: List[int] = []
 
-    try:
-        # --- STEP 1: Generate compressed workout ---
-        from app.core.config import get_config
-        config = get_config()
+    # Eine Verbindung für den ganzen Job: Laden, Training Plan, Speichern, Logging.
+    # Im try geöffnet: schlägt schon das Holen der Verbindung fehl, wird der Fehler trotzdem geloggt.
+    job = None
+    async with AsyncExitStack() as job_stack:
+        try:
+            job = await job_stack.enter_async_context(job_context())
+
+            # --- STEP 1: Generate compressed workout ---
+            config = get_config()
         
-        input_data = CompressedWorkoutInput(
-            user_id=user_id_uuid,
-            user_prompt=request_data.prompt or "",
-            profile_id=profile_id,
-            google_api_key=config.GOOGLE_API_KEY,
-            session_duration=session_duration,
-        )
+            input_data = CompressedWorkoutInput(
+                user_id=user_id_uuid,
+                user_prompt=request_data.prompt or "",
+                profile_id=profile_id,
+                google_api_key=config.GOOGLE_API_KEY,
+                session_duration=session_duration,
+                log_id=log_id,
+                bypass_cache=request_data.bypass_cache,
+            )
         
-        logger.info("[generate_workout_background_v2] Starting compressed workout generation...")
+            logger.info("[generate_workout_background_v2] Starting compressed workout generation...")
         
-        # Generate workout using compressed format
-        full_prompt, workout_output = await generate_compressed_workout(
-            input_data=input_data
-        )
+            use_streaming = request_data.stream if request_data.stream is not None else config.LLM_STREAMING_GENERATION_ENABLED
+
+            async def persist_streamed_block(position: int, block_schema) -> None:
+                # Fertiger Block: sofort speichern und per NOTIFY an die SSE-Streams melden
+                async with job.step() as block_db:
+                    if position == 0:
+                        # Retry über die Job-Queue: Blöcke eines früheren Versuchs entfernen
+                        removed = await block_db.execute(delete(Block).where(Block.workout_id == workout_id))
+                        if removed.rowcount:
+                            await notify_llm_blocks_reset(block_db, log_id, workout_id)
+                    block = await build_block_from_compact(block_schema, position, workout_id)
+                    block_db.add(block)
+                    await refresh_workout_set_counters(block_db, [workout_id])
+                    await notify_llm_block(block_db, log_id, workout_id, block.id, position)
+                streamed_positions.append(position)
+                await pin_user_to_primary(user_id)
+                logger.info(f"[generate_workout_background_v2] Streamed block {position} ({block_schema.name}) for workout {workout_id}")
+
+            # Generate workout using compressed format (abbrechbar über /llm/cancel-workout-creation)
+            if use_streaming:
+                generation = generate_compressed_workout_streaming(
+                    input_data=input_data, on_block=persist_streamed_block, job=job
+                )
+            else:
+                generation = generate_compressed_workout(input_data=input_data, job=job)
+            full_prompt, workout_output = await generation_tasks.run(workout_id, generation)
         
-        if not workout_output.workout:
-            raise ValueError("Workout generation failed - no workout returned")
+            if not workout_output.workout:
+                raise ValueError("Workout generation failed - no workout returned")
         
-        logger.info(
-            f"[generate_workout_background_v2] Compressed generation completed. "
-            f"Token reduction: {workout_output.token_reduction}, "
-            f"Exercise count: {workout_output.exercise_count}"
-        )
+            logger.info(
+                f"[generate_workout_background_v2] Compressed generation completed. "
+                f"Token reduction: {workout_output.token_reduction}, "
+                f"Exercise count: {workout_output.exercise_count}"
+            )
 
-        # --- STEP 2: Parse to blocks for existing workout ---
-        logger.info("[generate_workout_background_v2] Parsing compressed workout to blocks...")
+            # --- STEP 2: Parse to blocks for existing workout ---
+            logger.info("[generate_workout_background_v2] Parsing compressed workout to blocks...")
         
-        # Import the new parsing function
-        from app.llm.workout_generation_v1.versions.compressed_20250731.service import (
-            parse_compressed_blocks_for_workout
-        )
+            # Import the new parsing function
+            from app.llm.workout_generation_v1.versions.compressed_20250731.service import (
+                parse_compressed_blocks_for_workout
+            )
         
-        # Parse compressed format to blocks and updates
-        new_blocks, workout_updates = await parse_compressed_blocks_for_workout(
-            workout_schema=workout_output.workout,
-            workout_id=workout_id
-        )
+            # Parse compressed format to blocks and updates
+            new_blocks, workout_updates = await parse_compressed_blocks_for_workout(
+                workout_schema=workout_output.workout,
+                workout_id=workout_id
+            )
         
-        # Add training_plan_id if we have a profile
-        if profile_id:
-            async with create_session() as db:
-                from app.models.training_plan_model import TrainingPlan
-                training_plan = await db.scalar(
-                    select(TrainingPlan).where(TrainingPlan.user_id == user_id_uuid)
+            # Add training_plan_id if we have a profile
+            if profile_id:
+                async with job.step() as db:
+                    from app.models.training_plan_model import TrainingPlan
+                    training_plan = await db.scalar(
+                        select(TrainingPlan).where(TrainingPlan.user_id == user_id_uuid)
+                    )
+                    if training_plan:
+                        workout_updates["training_plan_id"] = training_plan.id
+
+            # --- STEP 3: Update workout in database ---
+            logger.info("[generate_workout_background_v2] Updating workout in database...")
+        
+            # Alle Blöcke schon gestreamt: nur noch die Workout-Felder setzen
+            all_blocks_streamed = bool(streamed_positions) and len(streamed_positions) == len(new_blocks)
+            async with job.step() as save_db:
+                await update_workout_in_database(
+                    db=save_db,
+                    workout_id=workout_id,
+                    new_blocks=new_blocks,
+                    workout_updates=workout_updates,
+                    preserve_user_data=True,
+                    replace_blocks=not all_blocks_streamed
                 )
-                if training_plan:
-                    workout_updates["training_plan_id"] = training_plan.id
 
-        # --- STEP 3: Update workout in database ---
-        logger.info("[generate_workout_background_v2] Updating workout in database...")
-        
-        async with create_session() as save_db:
-            await update_workout_in_database(
-                db=save_db,
-                workout_id=workout_id,
-                new_blocks=new_blocks,
-                workout_updates=workout_updates,
-                preserve_user_data=True
+            logger.info(
+                f"[generate_workout_background_v2] Workout {workout_id} successfully updated."
             )
+            # Frisch generiertes Workout direkt vom Primary lesen (Replica-Lag)
+            await pin_user_to_primary(user_id)
 
-        logger.info(
-            f"[generate_workout_background_v2] Workout {workout_id} successfully updated."
-        )
+            # --- STEP 4: Log success ---
+            async with job.step() as log_db:
+                await log_operation_success(
+                    db=log_db, log_id=log_id, duration_ms=timer.get_duration_ms()
+                )
 
-        # --- STEP 4: Log success ---
-        async with create_session() as log_db:
-            await log_operation_success(
-                db=log_db, log_id=log_id, duration_ms=timer.get_duration_ms()
+            logger.info(
+                f"[generate_workout_background_v2] Completed successfully in {timer.get_duration_ms()}ms"
             )
 
-        logger.info(
-            f"[generate_workout_background_v2] Completed successfully in {timer.get_duration_ms()}ms"
-        )
+        except GenerationCancelled:
+            logger.info(f"[generate_workout_background_v2] Generation for workout {workout_id} cancelled by user")
+            try:
+                async with job.step() as cancel_db:
+                    # Placeholder-Workout entfernen, Log als abgebrochen markieren
+                    placeholder = await cancel_db.get(Workout, workout_id)
+                    if placeholder:
+                        await cancel_db.delete(placeholder)
+                    await log_operation_failed(
+                        db=cancel_db,
+                        log_id=log_id,
+                        error_message="Abgebrochen",
+                        duration_ms=timer.get_duration_ms(),
+                    )
+                await pin_user_to_primary(user_id)
+            except Exception as log_e:
+                logger.error(
+                    f"[generate_workout_background_v2] Failed to clean up cancelled generation: {log_e}"
+                )
 
-    except Exception as e:
-        logger.error(f"[generate_workout_background_v2] Error: {e}", exc_info=True)
-        # Log failure in a separate session
-        try:
-            async with create_session() as error_db:
-                await log_operation_failed(
-                    db=error_db,
-                    log_id=log_id,
-                    error_message=str(e),
-                    duration_ms=timer.get_duration_ms(),
+        except Exception as e:
+            if streamed_positions:
+                await _discard_streamed_blocks(job, workout_id, log_id)
+            if reraise:
+                raise
+            logger.error(f"[generate_workout_background_v2] Error: {e}", exc_info=True)
+            # Log failure on the job connection (failed step was rolled back) -
+            # eigene Session, falls die Job-Verbindung gar nicht geöffnet werden konnte
+            try:
+                async with (job.step() if job is not None else create_session()) as error_db:
+                    await log_operation_failed(
+                        db=error_db,
+                        log_id=log_id,
+                        error_message=str(e),
+                        duration_ms=timer.get_duration_ms(),
+                    )
+            except Exception as log_e:
+                logger.error(
+                    f"[generate_workout_background_v2] CRITICAL: Failed to log error: {log_e}"
                 )
-        except Exception as log_e:
-            logger.error(
-                f"[generate_workout_background_v2] CRITICAL: Failed to log error: {log_e}"
-            )
@@ -8,7 +8,7 @@ from pydantic import BaseModel
 
 from app.models.llm_call_log_model import LlmCallLog, LlmOperationStatus
 from app.core.auth import get_current_user, User
-from app.db.session import get_session
+from app.db.session import get_read_session
 
 router = APIRouter(prefix="/llm-logs", tags=["llm-logs"])
 
@@ -90,7 +90,7 @@ def calculate_current_billing_period(subscription_start: datetime, current_date:
 @router.get("/total-workout-count", response_model=int)
 async def get_total_workout_count(
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_session),
+    db: AsyncSession = Depends(get_read_session),
 ) -> int:
     """
     Get total number of workouts created by the current user.
@@ -130,7 +130,7 @@ async def get_total_workout_count(
 async def get_workout_usage_stats(
     request: WorkoutUsageRequest,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_session),
+    db: AsyncSession = Depends(get_read_session),
 ):
     """
     Get workout-related API usage statistics for the current user.
@@ -1,10 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query, Header, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, case
+from sqlalchemy import select, func
 from typing import List, Optional
 from sqlalchemy.orm import selectinload
 from datetime import datetime, timezone
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 from uuid import UUID, uuid4
 import os
 import json
@@ -17,20 +17,24 @@ from app.models.set_model import Set, SetStatus
 from app.models.user_model import UserModel
 from app.schemas.workout_schema import (
     WorkoutListRead,
+    WorkoutListPage,
     WorkoutWithBlocksRead,
     BlockRead,
     BlockSaveResponse,
     BlockInput,
     SetRead,
     SetUpdate,
+    SetBatchUpdateResponse,
     WorkoutStatusEnum,
     ExerciseRead,
     ExerciseHistoryResponse
 )
 
 from app.core.auth import get_current_user, User
-from app.db.session import get_session
-from app.services.workout_service import get_latest_workouts_with_details, get_exercises_with_done_sets_only, get_exercise_history_for_workout, get_workout_history_map
+from app.core.etag import make_etag, etag_matches, not_modified
+from app.db.session import get_session, get_read_session
+from app.services.block_save_service import compute_block_diff, apply_block_diff, build_block_read
+from app.services.workout_service import get_latest_workouts_with_details, get_exercises_with_done_sets_only, get_exercise_history_for_workout, get_workout_history_map, refresh_workout_set_counters, get_user_workouts_page, apply_set_updates
 
 # --- API Specific Request Payloads ---
 
@@ -52,12 +56,27 @@ class SetStatusUpdatePayload(BaseModel):
             return v.replace(tzinfo=None)
         return v
 
+# One entry of a batch set update - identified by id, or by uid for sets completed offline
+class SetBatchUpdateItem(SetStatusUpdatePayload):
+    id: int | None = None
+    uid: str | None = None
+
+    @model_validator(mode="after")
+    def require_identifier(self) -> "SetBatchUpdateItem":
+        if self.id is None and not self.uid:
+            raise ValueError("Each update needs an id or a uid")
+        return self
+
+# Payload for updating many sets of one workout in one request
+class SetBatchUpdatePayload(BaseModel):
+    updates: List[SetBatchUpdateItem] = Field(..., min_length=1, max_length=500)
+
 router = APIRouter(tags=["workouts"])
 
 
 @router.get("/", response_model=List[WorkoutListRead])
 async def get_user_workouts(
-    db: AsyncSession = Depends(get_session),
+    db: AsyncSession = Depends(get_read_session),
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -73,47 +92,17 @@ async def get_user_workouts(
     if not user or not user.training_plan:
         return []
 
-    # ✅ Subqueries for efficient status calculation without loading relationships
-    total_sets_subquery = (
-        select(func.count(Set.id))
-        .select_from(Set)
-        .join(Exercise, Set.exercise_id == Exercise.id)
-        .join(Block, Exercise.block_id == Block.id)
-        .where(Block.workout_id == Workout.id)
-    ).scalar_subquery()
-
-    done_sets_subquery = (
-        select(func.count(Set.id))
-        .select_from(Set)
-        .join(Exercise, Set.exercise_id == Exercise.id)
-        .join(Block, Exercise.block_id == Block.id)
-        .where(
-            Block.workout_id == Workout.id,
-            Set.status == SetStatus.done
-        )
-    ).scalar_subquery()
-
-    # ✅ Status calculation in database
-    status_case = case(
-        (total_sets_subquery == 0, "not_started"),
-        (done_sets_subquery == total_sets_subquery, "done"),
-        (done_sets_subquery > 0, "started"),
-        else_="not_started"
-    ).label("computed_status")
-
-    # ✅ Direct user_id query instead of training_plan_id
+    # ✅ Status aus gepflegten Set-Zählern (total_sets/done_sets) - keine Subqueries über Sets
     workout_query = (
-        select(Workout, status_case)
+        select(Workout)
         .where(Workout.user_id == UUID(current_user.id))  # ✅ Direct user relationship!
         .order_by(Workout.date_created.desc())
     )
 
     result = await db.execute(workout_query)
-    workout_tuples = result.all()
 
-    # ✅ Manual mapping with computed status
     workouts = []
-    for workout_obj, computed_status in workout_tuples:
+    for workout_obj in result.scalars().all():
         workout_dict = {
             "id": workout_obj.id,
             "training_plan_id": workout_obj.training_plan_id,
@@ -123,16 +112,72 @@ async def get_user_workouts(
             "duration": workout_obj.duration,
             "focus": workout_obj.focus,
             "notes": workout_obj.notes,
-            "status": computed_status  # ✅ Directly computed by DB!
+            "status": workout_obj.status  # ✅ Aus total_sets/done_sets
         }
         workouts.append(WorkoutListRead(**workout_dict))
 
     return workouts
 
 
+@router.get("/page", response_model=WorkoutListPage)
+async def get_user_workouts_paginated(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    status: Optional[WorkoutStatusEnum] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_read_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Workout-Liste mit Keyset-Pagination (neueste zuerst).
+    next_cursor der Antwort als ?cursor= übergeben, um die nächste Seite zu laden.
+    """
+    user = await db.scalar(
+        select(UserModel)
+        .options(selectinload(UserModel.training_plan))
+        .where(UserModel.id == UUID(current_user.id))
+    )
+
+    if not user or not user.training_plan:
+        return WorkoutListPage(items=[])
+
+    # Filter-Zeitpunkte wie date_created als naive UTC vergleichen
+    if date_from is not None and date_from.tzinfo is not None:
+        date_from = date_from.astimezone(timezone.utc).replace(tzinfo=None)
+    if date_to is not None and date_to.tzinfo is not None:
+        date_to = date_to.astimezone(timezone.utc).replace(tzinfo=None)
+
+    workouts, next_cursor = await get_user_workouts_page(
+        db=db,
+        user_id=UUID(current_user.id),
+        limit=limit,
+        cursor=cursor,
+        workout_status=status,
+        date_from=date_from,
+        date_to=date_to,
+    )
+
+    items = [
+        WorkoutListRead(
+            id=workout_obj.id,
+            training_plan_id=workout_obj.training_plan_id,
+            name=workout_obj.name,
+            date_created=workout_obj.date_created,
+            description=workout_obj.description,
+            duration=workout_obj.duration,
+            focus=workout_obj.focus,
+            notes=workout_obj.notes,
+            status=workout_obj.status,
+        )
+        for workout_obj in workouts
+    ]
+    return WorkoutListPage(items=items, next_cursor=next_cursor)
+
+
 @router.get("/latest-workouts", response_model=List[WorkoutWithBlocksRead])
 async def get_latest_workouts(
-    db: AsyncSession = Depends(get_session),
+    db: AsyncSession = Depends(get_read_session),
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -151,7 +196,7 @@ async def get_latest_workouts(
 
 @router.get("/exercises-with-done-sets", response_model=List[ExerciseRead])
 async def get_user_exercises_with_done_sets(
-    db: AsyncSession = Depends(get_session),
+    db: AsyncSession = Depends(get_read_session),
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -173,7 +218,7 @@ async def get_user_exercises_with_done_sets(
 async def get_workout_exercise_history(
     workout_id: int,
     limit_per_exercise: int = 10,
-    db: AsyncSession = Depends(get_session),
+    db: AsyncSession = Depends(get_read_session),
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -215,14 +260,46 @@ async def get_workout_exercise_history(
 @router.get("/{workout_id}", response_model=WorkoutWithBlocksRead)
 async def get_workout_detail(
     workout_id: int,
+    response: Response,
     include_history: bool = True,
-    db: AsyncSession = Depends(get_session),
+    if_none_match: Optional[str] = Header(default=None),
+    db: AsyncSession = Depends(get_read_session),
     current_user: User = Depends(get_current_user),
 ):
     """
     ✅ SQLModel Best Practice: Direct user-workout relationship with security check in query
     Now includes exercise history by default for better performance
+    ✅ Conditional GET: ETag aus Workout.revision, bei passendem If-None-Match 304 ohne Baum-Load
     """
+    user_id = UUID(current_user.id)
+
+    # ✅ Versionsstempel per Index-Lookup auf workouts - die Historie hängt zusätzlich von
+    # allen anderen Workouts des Users ab (Summe der Revisionen, Anzahl, neueste ID)
+    if include_history:
+        version = (await db.execute(
+            select(
+                func.max(Workout.revision).filter(Workout.id == workout_id),
+                func.sum(Workout.revision),
+                func.count(Workout.id),
+                func.max(Workout.id),
+            ).where(Workout.user_id == user_id)
+        )).first()
+    else:
+        version = (await db.execute(
+            select(Workout.revision).where(
+                Workout.id == workout_id,
+                Workout.user_id == user_id,
+            )
+        )).first()
+
+    if not version or version[0] is None:
+        raise HTTPException(status_code=404, detail="Workout not found or access denied")
+
+    etag = make_etag("workout", workout_id, include_history, *version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+
     # ✅ SQLModel One-Liner: Direct workout query with security check
     workout = await db.scalar(
         select(Workout)
@@ -233,7 +310,7 @@ async def get_workout_detail(
         )
         .where(
             Workout.id == workout_id,
-            Workout.user_id == UUID(current_user.id)  # ✅ Direct user security check!
+            Workout.user_id == user_id  # ✅ Direct user security check!
         )
     )
     
@@ -262,12 +339,32 @@ async def get_workout_detail(
 async def get_block_detail(
     workout_id: int,
     block_id: int,
-    db: AsyncSession = Depends(get_session),
+    response: Response,
+    if_none_match: Optional[str] = Header(default=None),
+    db: AsyncSession = Depends(get_read_session),
     current_user: User = Depends(get_current_user),
 ):
     """
     ✅ SQLModel Best Practice: Direct user-workout relationship with security in query
+    ✅ Conditional GET: ETag aus der Revision des Workouts, 304 ohne Block-Load
     """
+    revision = await db.scalar(
+        select(Workout.revision)
+        .join(Block, Block.workout_id == Workout.id)
+        .where(
+            Block.id == block_id,
+            Workout.id == workout_id,
+            Workout.user_id == UUID(current_user.id),
+        )
+    )
+    if revision is None:
+        raise HTTPException(status_code=404, detail="Block not found or access denied")
+
+    etag = make_etag("block", workout_id, block_id, revision)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+
     # ✅ SQLModel One-Liner: Direct block query with security check
     block = await db.scalar(
         select(Block)
@@ -322,159 +419,17 @@ async def save_block(
         existing_block.name = block.name
         existing_block.description = block.description
         existing_block.notes = block.notes
-        
-        # ✅ SMART UID-BASED APPROACH: Update/Create/Delete based on UIDs
-        existing_exercises_by_uid = {ex.uid: ex for ex in existing_block.exercises if ex.uid}
-        # Fallback for legacy exercises without UIDs (will be removed after migration)
-        existing_exercises_by_id = {str(ex.id): ex for ex in existing_block.exercises}
-        incoming_exercise_uids = set()
-        
-        # Process each incoming exercise
-        for ex_data in block.exercises:
-            existing_exercise = None
-            
-            # First try to find by UID
-            if hasattr(ex_data, 'uid') and ex_data.uid and ex_data.uid in existing_exercises_by_uid:
-                existing_exercise = existing_exercises_by_uid[ex_data.uid]
-                incoming_exercise_uids.add(ex_data.uid)
-            # Fallback to ID-based lookup for backward compatibility
-            elif hasattr(ex_data, 'id') and ex_data.id and str(ex_data.id) in existing_exercises_by_id:
-                existing_exercise = existing_exercises_by_id[str(ex_data.id)]
-                # Assign UID to legacy exercise if it doesn't have one
-                if not existing_exercise.uid:
-                    existing_exercise.uid = str(uuid4())
-                    print(f"[Backend] Assigned UID {existing_exercise.uid} to legacy exercise {existing_exercise.id}")
-            
-            if existing_exercise:
-                # ✅ UPDATE existing exercise
-                existing_exercise.name = ex_data.name
-                existing_exercise.description = ex_data.description
-                existing_exercise.notes = ex_data.notes
-                existing_exercise.superset_id = ex_data.superset_id
-                existing_exercise.position = getattr(ex_data, "position", existing_exercise.position or 0)  # ✅ Position support
-                
-                # ✅ SMART SET HANDLING: Update/Create/Delete sets based on UIDs
-                existing_sets_by_uid = {s.uid: s for s in existing_exercise.sets if s.uid}
-                incoming_set_uids = set()
-                
-                for set_data in ex_data.sets:
-                    if hasattr(set_data, 'uid') and set_data.uid and set_data.uid in existing_sets_by_uid:
-                        # ✅ UPDATE existing set based on UID
-                        existing_set = existing_sets_by_uid[set_data.uid]
-                        print(f"[Backend] Updating existing set with UID: {set_data.uid}")
-                        existing_set.weight = set_data.weight
-                        existing_set.reps = set_data.reps
-                        existing_set.duration = set_data.duration
-                        existing_set.distance = set_data.distance
-                        existing_set.rest_time = set_data.rest_time
-                        existing_set.status = set_data.status
-                        existing_set.completed_at = set_data.completed_at
-                        existing_set.position = getattr(set_data, "position", existing_set.position or 0)  # ✅ Position support
-                        
-                        incoming_set_uids.add(set_data.uid)
-                    else:
-                        # ✅ CREATE new set (only if UID not found or not provided)
-                        # Find max position and increment for new sets
-                        existing_positions = [s.position or 0 for s in existing_exercise.sets if s.position is not None]
-                        max_position = max(existing_positions) if existing_positions else -1
-                        new_position = getattr(set_data, "position", max_position + 1)
-                        
-                        # Debug logging for UID handling
-                        frontend_uid = getattr(set_data, 'uid', None)
-                        generated_uid = frontend_uid if frontend_uid else str(uuid4())
-                        print(f"[Backend] Creating new set - Frontend UID: {frontend_uid}, Using UID: {generated_uid}")
-                        
-                        new_set = Set(
-                            uid=generated_uid,  # Use frontend UID or generate new
-                            exercise_id=existing_exercise.id,
-                            weight=set_data.weight,
-                            reps=set_data.reps,
-                            duration=set_data.duration,
-                            distance=set_data.distance,
-                            rest_time=set_data.rest_time,
-                            status=set_data.status,
-                            completed_at=set_data.completed_at,
-                            position=new_position  # ✅ Position support
-                        )
-                        db.add(new_set)
-                        
-                        # No need for temp ID mapping anymore - we use UIDs
-                        await db.flush()  # Ensure the set gets an ID
-                
-                # ✅ DELETE sets that are no longer present (based on UIDs)
-                for existing_set in existing_exercise.sets:
-                    if existing_set.uid and existing_set.uid not in incoming_set_uids:
-                        print(f"[Backend] Deleting set with UID: {existing_set.uid} (not in incoming UIDs)")
-                        await db.delete(existing_set)
-                        
-            else:
-                # ✅ CREATE new exercise (only if no valid ID or ID not found)
-                # Find max position and increment for new exercises
-                existing_exercise_positions = [ex.position or 0 for ex in existing_block.exercises if ex.position is not None]
-                max_exercise_position = max(existing_exercise_positions) if existing_exercise_positions else -1
-                new_exercise_position = getattr(ex_data, "position", max_exercise_position + 1)
-                
-                # Generate or use frontend-provided UID
-                frontend_uid = getattr(ex_data, 'uid', None)
-                exercise_uid = frontend_uid if frontend_uid else str(uuid4())
-                print(f"[Backend] Creating new exercise - Frontend UID: {frontend_uid}, Using UID: {exercise_uid}")
-                
-                new_exercise = Exercise(
-                    uid=exercise_uid,  # Use frontend UID or generate new
-                    block_id=existing_block.id,
-                    name=ex_data.name,
-                    description=ex_data.description,
-                    notes=ex_data.notes,
-                    superset_id=ex_data.superset_id,
-                    position=new_exercise_position,  # ✅ Position support
-                )
-                db.add(new_exercise)
-                await db.flush()  # Get ID for sets
-                
-                # Create all sets for new exercise
-                for set_data in ex_data.sets:
-                    new_set = Set(
-                        uid=set_data.uid if hasattr(set_data, 'uid') and set_data.uid else str(uuid4()),  # Use frontend UID or generate new
-                        exercise_id=new_exercise.id,
-                        weight=set_data.weight,
-                        reps=set_data.reps,
-                        duration=set_data.duration,
-                        distance=set_data.distance,
-                        rest_time=set_data.rest_time,
-                        status=set_data.status,
-                        completed_at=set_data.completed_at,
-                        position=getattr(set_data, "position", 0)  # ✅ Position support
-                    )
-                    db.add(new_set)
-                    
-                    # No need for temp ID mapping anymore - we use UIDs
-                    await db.flush()  # Ensure the set gets an ID
-        
-        # ✅ DELETE exercises that are no longer present (based on UIDs)
-        for existing_exercise in existing_block.exercises:
-            if existing_exercise.uid and existing_exercise.uid not in incoming_exercise_uids:
-                print(f"[Backend] Deleting exercise with UID: {existing_exercise.uid} (not in incoming UIDs)")
-                await db.delete(existing_exercise)
-        
+
+        # ✅ UID-basierter Diff in einem Durchlauf, angewendet mit Bulk-Statements
+        diff = compute_block_diff(existing_block, block)
+        await apply_block_diff(db, diff)
+
+        await refresh_workout_set_counters(db, [workout_id])
         await db.commit()
-        
-        # 🎉 Frisch gespeicherten Block laden und serialisieren!
-        result_query = (
-            select(Block)
-            .options(selectinload(Block.exercises).selectinload(Exercise.sets))
-            .where(Block.id == block_id)
-        )
-        result = await db.execute(result_query)
-        saved_block = result.scalar_one()
-        
-        # Debug logging
-        for ex in saved_block.exercises:
-            print(f"[Backend] Exercise {ex.name} has {len(ex.sets)} sets")
-            for s in ex.sets:
-                print(f"[Backend]   - Set ID: {s.id}, UID: {s.uid}, Position: {s.position}")
-        
+
+        # 🎉 Antwort aus dem angewendeten Zustand - kein Reload des Blocks
         return BlockSaveResponse(
-            block=BlockRead.model_validate(saved_block),
+            block=build_block_read(existing_block, diff),
             temp_id_mappings={}  # Keep empty for backwards compatibility
         )
         
@@ -529,9 +484,9 @@ async def update_set_status_endpoint(
     """
     ✅ BEST PRACTICE: Kombinierte Security Query + Smart Field Updates
     """
-    # ✅ SQLModel One-Liner: Direct set query with security check
-    db_set = await db.scalar(
-        select(Set)
+    # ✅ SQLModel One-Liner: Direct set query with security check (+ workout_id für die Set-Zähler)
+    set_row = (await db.execute(
+        select(Set, Block.workout_id)
         .join(Exercise, Set.exercise_id == Exercise.id)
         .join(Block, Exercise.block_id == Block.id)
         .join(Workout, Block.workout_id == Workout.id)
@@ -539,10 +494,11 @@ async def update_set_status_endpoint(
             Set.id == set_id,
             Workout.user_id == UUID(current_user.id)  # ✅ Direct user security check!
         )
-    )
+    )).first()
 
-    if not db_set:
+    if not set_row:
         raise HTTPException(status_code=404, detail="Set not found or access denied")
+    db_set, workout_id = set_row
 
     # ✅ Smart Field Updates - Pydantic validator macht datetime naive automatisch!
     for field, value in payload.model_dump(exclude_unset=True).items():
@@ -552,6 +508,7 @@ async def update_set_status_endpoint(
     db_set.completed_at = datetime.now(timezone.utc)
 
     try:
+        await refresh_workout_set_counters(db, [workout_id])
         await db.commit()
         await db.refresh(db_set)
         return SetRead.model_validate(db_set)  # ✅ Auto-Serialization!
@@ -560,6 +517,47 @@ async def update_set_status_endpoint(
         raise HTTPException(status_code=500, detail=f"Error updating set: {str(e)}")
 
 
+@router.put("/{workout_id}/sets/status", response_model=SetBatchUpdateResponse)
+async def update_set_status_batch_endpoint(
+    workout_id: int,
+    payload: SetBatchUpdatePayload,
+    db: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    ✅ Batch-Variante von PUT /sets/{set_id}/status für ganze Übungen/Blöcke und Offline-Sync.
+    Eine Ownership-Query, ein UPDATE, ein Commit. Sets per id oder uid; fehlende Sets werden
+    in not_found_ids/not_found_uids gemeldet statt den ganzen Batch abzulehnen.
+    completed_at vom Client (offline erledigt) bleibt erhalten, sonst jetzt.
+    """
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    updates = []
+    for item in payload.updates:
+        update_data = item.model_dump(exclude_unset=True, exclude={"notes"})
+        if item.status == SetStatus.done:
+            update_data["completed_at"] = item.completed_at or now
+        else:
+            update_data["completed_at"] = None
+        updates.append(update_data)
+
+    try:
+        response = await apply_set_updates(db, workout_id, UUID(current_user.id), updates)
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error updating sets: {str(e)}")
+
+    if not response.sets:
+        raise HTTPException(status_code=404, detail="Sets not found or access denied")
+
+    try:
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error updating sets: {str(e)}")
+
+    return response
+
+
 # Schema for manual activity entry
 class ManualActivitySchema(BaseModel):
     """
@@ -666,6 +664,7 @@ async def create_manual_activity(
         # ✅ Safe: Get workout_id while object is still attached to session
         workout_id = workout.id
         
+        await refresh_workout_set_counters(db, [workout_id])
         await db.commit()  # ✅ Commit all changes
         
         return {
@@ -0,0 +1,246 @@
+"""
+Lokaler Spill-Speicher für Activity Logs, die nicht in die DB geschrieben werden konnten.
+
+- Append-only Segmente (`*.jsonl.zst`), ein zstd-Frame pro gespilltem Batch
+- Segmente rotieren nach Größe; das offene Segment wird nie gleichzeitig repliziert
+- Ein Hintergrund-Replayer lädt abgeschlossene Segmente per Bulk-Insert zurück,
+  sobald die Datenbank wieder erreichbar ist
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Awaitable, Callable, List, Optional
+
+import zstandard
+
+from app.core.config import get_config
+from app.schemas.user_activity_log_schema import UserActivityLogCreate
+
+logger = logging.getLogger("activity_logger")
+
+SEGMENT_SUFFIX = ".jsonl.zst"
+OPEN_SEGMENT_PREFIX = "open_"
+# Ein Replayer benennt ein Segment vor dem Lesen in <name>.replaying.<pid> um (Claim)
+REPLAYING_MARKER = ".replaying."
+# Nicht lesbare Segmente werden beiseitegelegt, damit sie spätere Segmente nicht blockieren
+CORRUPT_SUFFIX = ".corrupt"
+
+
+class ActivityLogSpill:
+    """Schreibt fehlgeschlagene Log-Batches komprimiert auf Disk und spielt sie später zurück."""
+
+    def __init__(self):
+        config = get_config()
+        self.directory = Path(config.ACTIVITY_LOG_SPILL_DIR)
+        self.max_segment_bytes = config.ACTIVITY_LOG_SPILL_SEGMENT_BYTES
+        self.replay_interval = config.ACTIVITY_LOG_SPILL_REPLAY_INTERVAL_SECONDS
+        self.replay_batch_size = config.ACTIVITY_LOG_BATCH_SIZE
+        # Muss deutlich über dem Replay-Intervall liegen - lebende Prozesse schließen ihr offenes Segment bei jedem Lauf ab
+        self.stale_seconds = max(config.ACTIVITY_LOG_SPILL_STALE_SECONDS, 4 * self.replay_interval)
+
+        self._compressor = zstandard.ZstdCompressor(level=3)
+        self._open_segment: Optional[Path] = None
+        self._lock = asyncio.Lock()
+        self._replay_task: Optional[asyncio.Task] = None
+
+        self.spilled_count = 0
+        self.replayed_count = 0
+        self.adopted_count = 0
+
+    # --- Schreiben ---
+
+    def _write_frame(self, payload: bytes) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if self._open_segment is None:
+            name = f"{OPEN_SEGMENT_PREFIX}{int(time.time())}_{uuid.uuid4().hex[:8]}{SEGMENT_SUFFIX}"
+            self._open_segment = self.directory / name
+
+        with open(self._open_segment, "ab") as f:
+            f.write(self._compressor.compress(payload))
+            f.flush()
+            os.fsync(f.fileno())
+
+        if self._open_segment.stat().st_size >= self.max_segment_bytes:
+            self._seal_open_segment()
+
+    def _seal_open_segment(self) -> None:
+        """Schließt das offene Segment ab, damit der Replayer es übernehmen kann."""
+        if self._open_segment is None:
+            return
+        if self._open_segment.exists():
+            sealed = self._open_segment.with_name(self._open_segment.name[len(OPEN_SEGMENT_PREFIX):])
+            self._open_segment.rename(sealed)
+        self._open_segment = None
+
+    async def write(self, activity_logs: List[UserActivityLogCreate]) -> None:
+        """Hängt einen Batch als JSONL-Frame an das offene Segment an."""
+        lines = "".join(
+            json.dumps(log.model_dump(mode="json"), ensure_ascii=False) + "\n"
+            for log in activity_logs
+        )
+        async with self._lock:
+            await asyncio.to_thread(self._write_frame, lines.encode("utf-8"))
+        self.spilled_count += len(activity_logs)
+        logger.warning(f"Spilled {len(activity_logs)} activity logs to {self.directory}")
+
+    # --- Replay ---
+
+    def _sealed_segments(self) -> List[Path]:
+        if not self.directory.exists():
+            return []
+        return sorted(
+            p for p in self.directory.glob(f"*{SEGMENT_SUFFIX}")
+            if not p.name.startswith(OPEN_SEGMENT_PREFIX)
+        )
+
+    @staticmethod
+    def _read_segment(path: Path) -> List[UserActivityLogCreate]:
+        decompressor = zstandard.ZstdDecompressor()
+        with open(path, "rb") as f:
+            with decompressor.stream_reader(f, read_across_frames=True) as reader:
+                data = reader.read()
+        return [
+            UserActivityLogCreate.model_validate(json.loads(line))
+            for line in data.decode("utf-8").splitlines()
+            if line.strip()
+        ]
+
+    def _adopt_stale_segments(self) -> None:
+        """
+        Übernimmt Segmente abgestürzter Prozesse: offene Segmente, in die seit stale_seconds
+        niemand geschrieben hat, werden abgeschlossen; Claims eines abgestürzten Replayers freigegeben.
+        """
+        if not self.directory.exists():
+            return
+        cutoff = time.time() - self.stale_seconds
+        for path in self.directory.iterdir():
+            if path == self._open_segment:
+                continue
+            is_open = path.name.startswith(OPEN_SEGMENT_PREFIX) and path.name.endswith(SEGMENT_SUFFIX)
+            is_claimed = REPLAYING_MARKER in path.name
+            if not (is_open or is_claimed):
+                continue
+            try:
+                if path.stat().st_mtime > cutoff:
+                    continue
+                if is_open:
+                    path.rename(path.with_name(path.name[len(OPEN_SEGMENT_PREFIX):]))
+                else:
+                    self._release_segment(path)
+            except FileNotFoundError:
+                continue  # Ein anderer Worker war schneller
+            self.adopted_count += 1
+            logger.warning(f"Adopted stale spilled activity log segment {path.name}")
+
+    @staticmethod
+    def _claim_segment(segment: Path) -> Optional[Path]:
+        """
+        Übernimmt ein Segment exklusiv per atomarem rename - mehrere Worker teilen sich das
+        Spill-Verzeichnis, nur einer darf ein Segment replizieren. None, wenn ein anderer schneller war.
+        """
+        claimed = segment.with_name(f"{segment.name}{REPLAYING_MARKER}{os.getpid()}")
+        try:
+            segment.rename(claimed)
+        except FileNotFoundError:
+            return None
+        # mtime = Claim-Zeitpunkt, sonst hielte _adopt_stale_segments den Claim sofort für verwaist
+        os.utime(claimed)
+        return claimed
+
+    @staticmethod
+    def _release_segment(claimed: Path) -> None:
+        """Gibt ein Segment nach fehlgeschlagenem Insert für den nächsten Lauf frei."""
+        claimed.rename(claimed.with_name(claimed.name.split(REPLAYING_MARKER)[0]))
+
+    @staticmethod
+    def _quarantine_segment(claimed: Path, original_name: str) -> None:
+        claimed.rename(claimed.with_name(f"{original_name}{CORRUPT_SUFFIX}"))
+
+    def has_pending(self) -> bool:
+        return self._open_segment is not None or bool(self._sealed_segments()) or self._has_foreign_segments()
+
+    def _has_foreign_segments(self) -> bool:
+        """Offene oder geclaimte Segmente anderer (evtl. abgestürzter) Prozesse."""
+        if not self.directory.exists():
+            return False
+        return any(
+            path != self._open_segment
+            and (path.name.startswith(OPEN_SEGMENT_PREFIX) or REPLAYING_MARKER in path.name)
+            for path in self.directory.iterdir()
+        )
+
+    async def replay(self, insert_batch: Callable[[List[UserActivityLogCreate]], Awaitable[None]]) -> int:
+        """
+        Spielt alle Segmente zurück. insert_batch muss bei DB-Fehlern eine Exception werfen;
+        das betroffene Segment bleibt dann liegen und wird beim nächsten Lauf erneut versucht.
+        """
+        async with self._lock:
+            await asyncio.to_thread(self._seal_open_segment)
+        await asyncio.to_thread(self._adopt_stale_segments)
+
+        replayed = 0
+        for segment in self._sealed_segments():
+            claimed = await asyncio.to_thread(self._claim_segment, segment)
+            if claimed is None:
+                continue  # Ein anderer Worker repliziert dieses Segment
+            try:
+                logs = await asyncio.to_thread(self._read_segment, claimed)
+            except (zstandard.ZstdError, UnicodeDecodeError, ValueError) as e:
+                await asyncio.to_thread(self._quarantine_segment, claimed, segment.name)
+                logger.error(f"Spilled activity log segment {segment.name} is unreadable, moved aside: {e}")
+                continue
+            except BaseException:
+                await asyncio.to_thread(self._release_segment, claimed)
+                raise
+            try:
+                for i in range(0, len(logs), self.replay_batch_size):
+                    await insert_batch(logs[i:i + self.replay_batch_size])
+                    os.utime(claimed)  # Claim lebt noch
+            except BaseException:
+                await asyncio.to_thread(self._release_segment, claimed)
+                raise
+            # Erst nach vollständigem Insert löschen (at-least-once)
+            claimed.unlink(missing_ok=True)
+            replayed += len(logs)
+            self.replayed_count += len(logs)
+            logger.info(f"Replayed {len(logs)} spilled activity logs from {segment.name}")
+        return replayed
+
+    async def _replay_loop(self, insert_batch: Callable[[List[UserActivityLogCreate]], Awaitable[None]]):
+        while True:
+            await asyncio.sleep(self.replay_interval)
+            if not self.has_pending():
+                continue
+            try:
+                await self.replay(insert_batch)
+            except Exception as e:
+                logger.warning(f"Activity log replay postponed - database still unavailable: {e}")
+
+    def start_replayer(self, insert_batch: Callable[[List[UserActivityLogCreate]], Awaitable[None]]) -> None:
+        if self._replay_task is None or self._replay_task.done():
+            self._replay_task = asyncio.create_task(self._replay_loop(insert_batch))
+
+    async def stop_replayer(self) -> None:
+        if self._replay_task:
+            self._replay_task.cancel()
+            try:
+                await self._replay_task
+            except asyncio.CancelledError:
+                pass
+            self._replay_task = None
+        # Offenes Segment abschließen, damit der nächste Prozess es replizieren kann
+        async with self._lock:
+            await asyncio.to_thread(self._seal_open_segment)
+
+    def stats(self) -> dict:
+        return {
+            "spilled": self.spilled_count,
+            "replayed": self.replayed_count,
+            "adopted": self.adopted_count,
+            "pending_segments": len(self._sealed_segments()) + (1 if self._open_segment else 0),
+        }
@@ -4,12 +4,17 @@ import time
 import asyncio
 from typing import Optional, Dict, Any, Union
 from datetime import datetime
-from sqlmodel import Session
-from fastapi import Request, Response
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from fastapi import Request
 from app.models.user_activity_log_model import UserActivityLog, ActivityActionType, RiskLevel
 from app.schemas.user_activity_log_schema import UserActivityLogCreate
-from app.db.session import get_session
+from app.db.session import create_session
 from app.core.auth import User
+from app.core.config import get_config
+from app.core.activity_log_spill import ActivityLogSpill
+from app.core.activity_sampling import ActivitySampler, ActivityAggregator, LATENCY_COLUMNS
+from app.models.activity_log_aggregate_model import ActivityLogAggregate
 import logging
 import uuid
 import httpx
@@ -34,8 +39,32 @@ class ActivityLogger:
     """
     
     def __init__(self):
-        self.log_queue = asyncio.Queue()
-        self.is_processing = False
+        config = get_config()
+        self.batch_size = config.ACTIVITY_LOG_BATCH_SIZE
+        self.flush_interval = config.ACTIVITY_LOG_FLUSH_INTERVAL_SECONDS
+        self.overflow_policy = config.ACTIVITY_LOG_OVERFLOW_POLICY
+        self.pressure_sample_rate = max(1, config.ACTIVITY_LOG_PRESSURE_SAMPLE_RATE)
+        
+        # Begrenzte Queue - bei Rückstau greift die Overflow-Policy statt unbegrenztem Wachstum
+        self.log_queue: asyncio.Queue = asyncio.Queue(maxsize=config.ACTIVITY_LOG_QUEUE_MAX)
+        self._writer_task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._pressure_counter = 0
+        
+        # Zähler für Monitoring
+        self.written_count = 0
+        self.dropped_count = 0
+        self.sampled_out_count = 0
+        self.failed_batches = 0
+        
+        # Spill-to-Disk, damit Request-Latenz unabhängig von der Logging-DB bleibt
+        self.spill = ActivityLogSpill() if config.ACTIVITY_LOG_SPILL_ENABLED else None
+        
+        # Sampling pro Action Type + Minuten-Aggregate für Lese-/Polling-Events
+        self.sampler = ActivitySampler()
+        self.aggregator = ActivityAggregator()
+        self.aggregate_flush_interval = config.ACTIVITY_LOG_AGGREGATE_FLUSH_SECONDS
+        self._aggregate_task: Optional[asyncio.Task] = None
         
     def get_user_id_string(self, user_id: Union[str, uuid.UUID]) -> str:
         """Konvertiert User-ID zu String für Logging (ohne Hashing)"""
@@ -160,7 +189,7 @@ class ActivityLogger:
     
     async def log_activity(self,
                           request: Request,
-                          response: Response,
+                          status_code: int,
                           action_type: ActivityActionType,
                           user: Optional[User] = None,
                           resource_id: Optional[str] = None,
@@ -169,12 +198,26 @@ class ActivityLogger:
                           error_message: Optional[str] = None,
                           context_data: Optional[Dict[str, Any]] = None,
                           start_time: Optional[float] = None,
+                          response_time_ms: Optional[int] = None,
                           analytics_enabled: bool = True) -> None:
         """
         Hauptmethode für das Activity Logging.
         Wird von der Middleware aufgerufen.
         """
         try:
+            # Response Time berechnen (falls nicht bereits aus http.response.start bekannt)
+            if response_time_ms is None and start_time:
+                response_time_ms = int((time.time() - start_time) * 1000)
+            
+            # Sampling: Lese-Events nur aggregieren, Security-Events immer vollständig
+            endpoint = str(request.url.path)
+            sample_rate = self.sampler.sample_rate(action_type, status_code, endpoint)
+            if sample_rate < 1.0:
+                self.aggregator.record(endpoint, request.method, action_type, status_code, response_time_ms)
+                if not self.sampler.keep(sample_rate):
+                    return
+                context_data = {**(context_data or {}), "sample_rate": sample_rate}
+            
             # Wöchentlich rotierende Analytics-ID erstellen  
             user_id_for_analytics = self.get_weekly_analytics_id(
                 user.id if user else None, 
@@ -190,11 +233,6 @@ class ActivityLogger:
             # Request Data sanitisieren
             sanitized_data = self.sanitize_request_data(request_data)
             
-            # Response Time berechnen
-            response_time_ms = None
-            if start_time:
-                response_time_ms = int((time.time() - start_time) * 1000)
-            
             # Risk Score berechnen
             risk_score, risk_level, risk_indicators = self.calculate_risk_score(
                 user_id_for_analytics, action_type, 
@@ -210,13 +248,13 @@ class ActivityLogger:
             activity_log = UserActivityLogCreate(
                 user_id_hash=user_id_for_analytics,
                 session_id=session_id,
-                endpoint=str(request.url.path),
+                endpoint=endpoint,
                 http_method=request.method,
                 action_type=action_type,
                 resource_id=resource_id,
                 resource_type=resource_type,
                 request_data=sanitized_data,
-                response_status_code=response.status_code,
+                response_status_code=status_code,
                 response_time_ms=response_time_ms,
                 ip_address=request.client.host if request.client else None,
                 user_agent=request.headers.get("user-agent"),
@@ -233,13 +271,12 @@ class ActivityLogger:
             # Debug logging
             logger.debug(f"Queuing activity log: {action_type.value} for user {user_id_for_analytics} on {request.url.path}")
             
-            # In Queue für asynchrone Verarbeitung einreihen
-            await self.log_queue.put(activity_log)
+            # In Queue für asynchrone Verarbeitung einreihen (non-blocking)
+            self.enqueue(activity_log)
             
-            # Starte Verarbeitung falls nicht bereits laufend
-            if not self.is_processing:
-                logger.debug("Starting log queue processing")
-                asyncio.create_task(self.process_log_queue())
+            # Writer starten falls nicht bereits laufend (z.B. ohne lifespan)
+            if self._writer_task is None or self._writer_task.done():
+                self.start_writer()
                 
         except Exception as e:
             logger.error(f"Error logging activity: {e}", exc_info=True)
@@ -250,54 +287,184 @@ class ActivityLogger:
         bot_indicators = ["bot", "crawler", "spider", "scraper", "automation"]
         return any(indicator in user_agent for indicator in bot_indicators)
     
-    async def process_log_queue(self):
-        """Verarbeitet die Log-Queue asynchron"""
-        self.is_processing = True
-        processed_count = 0
+    def _is_security_relevant(self, activity_log: UserActivityLogCreate) -> bool:
+        return activity_log.risk_level in (RiskLevel.HIGH, RiskLevel.CRITICAL)
+    
+    def enqueue(self, activity_log: UserActivityLogCreate) -> bool:
+        """
+        Reiht einen Log ohne zu blockieren ein.
+        Sicherheitsrelevante Logs verdrängen bei voller Queue den ältesten Eintrag,
+        alle anderen werden gemäß Overflow-Policy verworfen bzw. gesampelt.
+        """
+        queue = self.log_queue
+        security_relevant = self._is_security_relevant(activity_log)
+        
+        if (
+            not security_relevant
+            and self.overflow_policy == "sample"
+            and queue.maxsize
+            and queue.qsize() >= queue.maxsize * 0.8
+        ):
+            self._pressure_counter += 1
+            if self._pressure_counter % self.pressure_sample_rate != 0:
+                self.sampled_out_count += 1
+                return False
+        
         try:
-            while not self.log_queue.empty():
+            queue.put_nowait(activity_log)
+            return True
+        except asyncio.QueueFull:
+            if security_relevant:
                 try:
-                    activity_log = await asyncio.wait_for(self.log_queue.get(), timeout=1.0)
-                    await self.save_activity_log(activity_log)
-                    processed_count += 1
-                    logger.debug(f"Processed activity log {processed_count}")
-                except asyncio.TimeoutError:
-                    logger.debug("Queue processing timeout - stopping")
-                    break
-                except Exception as e:
-                    logger.error(f"Error processing log queue item: {e}", exc_info=True)
-        finally:
-            logger.debug(f"Finished processing {processed_count} activity logs")
-            self.is_processing = False
+                    queue.get_nowait()
+                    queue.task_done()
+                    self.dropped_count += 1
+                    queue.put_nowait(activity_log)
+                    return True
+                except (asyncio.QueueEmpty, asyncio.QueueFull):
+                    pass
+            self.dropped_count += 1
+            if self.dropped_count % 1000 == 1:
+                logger.warning(f"Activity log queue full - dropped {self.dropped_count} logs so far")
+            return False
     
-    async def save_activity_log(self, activity_log: UserActivityLogCreate):
-        """Speichert Activity Log in die Datenbank"""
+    def start_writer(self):
+        """Startet den Writer-Task (im FastAPI lifespan oder lazy beim ersten Log)."""
+        if self._writer_task is None or self._writer_task.done():
+            self._stopping = False
+            self._writer_task = asyncio.create_task(self._writer_loop())
+            logger.debug("Activity log writer started")
+        if self.spill:
+            self.spill.start_replayer(self._insert_logs)
+        if self._aggregate_task is None or self._aggregate_task.done():
+            self._aggregate_task = asyncio.create_task(self._aggregate_flush_loop())
+    
+    async def _collect_batch(self) -> list[UserActivityLogCreate]:
+        """Sammelt bis zu batch_size Logs oder bis das Flush-Intervall abgelaufen ist."""
+        batch: list[UserActivityLogCreate] = []
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        
+        while len(batch) < self.batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.log_queue.get(), timeout=timeout))
+                self.log_queue.task_done()
+            except asyncio.TimeoutError:
+                break
+        
+        return batch
+    
+    async def _writer_loop(self):
+        """Schreibt die Queue in Batches - Flush bei batch_size oder nach flush_interval."""
+        while not self._stopping:
+            batch = await self._collect_batch()
+            if batch:
+                await self.save_activity_logs(batch)
+    
+    async def flush(self):
+        """Schreibt alle aktuell gequeueten Logs sofort."""
+        while not self.log_queue.empty():
+            batch = []
+            while len(batch) < self.batch_size and not self.log_queue.empty():
+                batch.append(self.log_queue.get_nowait())
+                self.log_queue.task_done()
+            await self.save_activity_logs(batch)
+    
+    async def shutdown(self, timeout: float = 10.0):
+        """Graceful Drain beim App-Shutdown: Writer stoppen und Rest-Queue flushen."""
+        self._stopping = True
+        if self._writer_task:
+            try:
+                await asyncio.wait_for(self._writer_task, timeout=self.flush_interval + 1)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                self._writer_task.cancel()
+            self._writer_task = None
         try:
-            # Verwende eigene Session für Logging (async pattern)
-            async for db in get_session():
-                try:
-                    db_log = UserActivityLog(**activity_log.model_dump())
-                    db.add(db_log)
-                    await db.commit()
-                    await db.refresh(db_log)
-                    
-                    logger.debug(f"Successfully saved activity log: {db_log.id}")
-                    
-                    # Bei kritischen Aktivitäten sofortiges Alert
-                    if activity_log.risk_level == RiskLevel.CRITICAL:
-                        await self.send_security_alert(db_log)
-                        
-                except Exception as inner_e:
-                    await db.rollback()
-                    logger.error(f"Error in database transaction: {inner_e}", exc_info=True)
-                    raise inner_e
-                finally:
-                    break  # Exit the async generator after first iteration
-                    
+            await asyncio.wait_for(self.flush(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Activity log drain timed out - {self.log_queue.qsize()} logs lost")
+        if self._aggregate_task:
+            self._aggregate_task.cancel()
+            self._aggregate_task = None
+        await self.flush_aggregates(include_current=True)
+        if self.spill:
+            await self.spill.stop_replayer()
+        logger.info(f"Activity logger stopped: {self.stats()}")
+    
+    def stats(self) -> Dict[str, Any]:
+        stats = {
+            "queued": self.log_queue.qsize(),
+            "queue_max": self.log_queue.maxsize,
+            "written": self.written_count,
+            "dropped": self.dropped_count,
+            "sampled_out": self.sampled_out_count,
+            "failed_batches": self.failed_batches,
+        }
+        if self.spill:
+            stats["spill"] = self.spill.stats()
+        return stats
+    
+    async def _aggregate_flush_loop(self):
+        while True:
+            await asyncio.sleep(self.aggregate_flush_interval)
+            await self.flush_aggregates()
+    
+    async def flush_aggregates(self, include_current: bool = False):
+        """Schreibt abgeschlossene Minuten-Aggregate per Upsert (mehrere Worker addieren sich)."""
+        rows = self.aggregator.pop_rows(include_current=include_current)
+        if not rows:
+            return
+        try:
+            stmt = pg_insert(ActivityLogAggregate).values(rows)
+            counter_columns = ["count", "total_response_time_ms", *LATENCY_COLUMNS]
+            stmt = stmt.on_conflict_do_update(
+                constraint="uq_activity_log_aggregates_bucket",
+                set_={
+                    column: getattr(ActivityLogAggregate, column) + getattr(stmt.excluded, column)
+                    for column in counter_columns
+                },
+            )
+            async with create_session() as db:
+                await db.execute(stmt)
+            logger.debug(f"Flushed {len(rows)} activity aggregate buckets")
+        except Exception as e:
+            logger.error(f"Error flushing activity aggregates: {e}", exc_info=True)
+            self.aggregator.restore_rows(rows)
+    
+    async def _insert_logs(self, activity_logs: list[UserActivityLogCreate]):
+        """Multi-Row INSERT eines Batches - wirft bei DB-Fehlern"""
+        rows = [activity_log.model_dump() for activity_log in activity_logs]
+        async with create_session() as db:
+            await db.execute(insert(UserActivityLog), rows)
+        self.written_count += len(rows)
+    
+    async def save_activity_logs(self, activity_logs: list[UserActivityLogCreate]):
+        """Speichert einen Batch Activity Logs - bei DB-Fehlern in die Spill-Datei"""
+        try:
+            await self._insert_logs(activity_logs)
+            logger.debug(f"Successfully saved {len(activity_logs)} activity logs")
         except Exception as e:
-            logger.error(f"Error saving activity log: {e}", exc_info=True)
+            self.failed_batches += 1
+            logger.error(f"Error saving {len(activity_logs)} activity logs: {e}", exc_info=True)
+            if self.spill:
+                try:
+                    await self.spill.write(activity_logs)
+                except Exception as spill_e:
+                    logger.error(f"Error spilling activity logs: {spill_e}", exc_info=True)
+        
+        # Bei kritischen Aktivitäten sofortiges Alert (unabhängig vom DB-Zustand)
+        for activity_log in activity_logs:
+            if activity_log.risk_level == RiskLevel.CRITICAL:
+                await self.send_security_alert(activity_log)
+    
+    async def save_activity_log(self, activity_log: UserActivityLogCreate):
+        """Speichert einen einzelnen Activity Log in die Datenbank"""
+        await self.save_activity_logs([activity_log])
     
-    async def send_security_alert(self, activity_log: UserActivityLog):
+    async def send_security_alert(self, activity_log: Union[UserActivityLog, UserActivityLogCreate]):
         """Sendet Security Alert bei kritischen Aktivitäten"""
         # Hier könnte Integration mit Alerting-System (Email, Slack, etc.)
         logger.critical(f"SECURITY ALERT: Critical activity detected - "
@@ -0,0 +1,155 @@
+"""
+Sampling-Policy und Minuten-Aggregate für hochvolumige Activity Events.
+
+- Sicherheitsrelevante Events und Fehler (>= 400) werden immer vollständig geloggt
+- Pro ActivityActionType konfigurierbare Sample-Rate (ACTIVITY_LOG_SAMPLE_RATES, JSON)
+- Gesampelte Action Types werden zusätzlich exakt in Minuten-Aggregaten gezählt
+"""
+
+import json
+import logging
+import random
+import re
+from datetime import datetime
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import get_config
+from app.models.user_activity_log_model import ActivityActionType
+
+logger = logging.getLogger("activity_logger")
+
+# Immer als vollständige Log-Zeile (inkl. Risk Scoring)
+ALWAYS_LOG_ACTIONS = frozenset({
+    ActivityActionType.LOGIN_FAILED,
+    ActivityActionType.REGISTER_FAILED,
+    ActivityActionType.OTP_VERIFY_FAILED,
+    ActivityActionType.UNAUTHORIZED_ACCESS_ATTEMPT,
+    ActivityActionType.RATE_LIMIT_EXCEEDED,
+    ActivityActionType.SUSPICIOUS_ACTIVITY_DETECTED,
+    ActivityActionType.LLM_PROMPT_INJECTION_DETECTED,
+})
+
+# Default: Lese-Events nur aggregieren
+DEFAULT_SAMPLE_RATES: Dict[ActivityActionType, float] = {
+    ActivityActionType.WORKOUT_VIEW: 0.0,
+    ActivityActionType.EXERCISE_VIEW: 0.0,
+    ActivityActionType.TRAINING_PLAN_VIEW: 0.0,
+    ActivityActionType.SHOWCASE_VIEW: 0.0,
+}
+
+# Polling-Endpoints werden unabhängig vom Action Type wie Lese-Events behandelt
+POLLING_ENDPOINT_MARKERS = ("/llm/workout-status/", "/llm/workout-revision-status/")
+POLLING_SAMPLE_KEY = "polling"
+
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500)
+LATENCY_COLUMNS = [f"latency_le_{b}_ms" for b in LATENCY_BUCKETS_MS] + [f"latency_gt_{LATENCY_BUCKETS_MS[-1]}_ms"]
+
+_ID_SEGMENT = re.compile(r"/(\d+|[0-9a-fA-F-]{32,36})(?=/|$)")
+
+
+def normalize_endpoint(path: str) -> str:
+    """Ersetzt numerische IDs/UUIDs im Pfad durch {id}, um die Kardinalität zu begrenzen."""
+    return _ID_SEGMENT.sub("/{id}", path)
+
+
+def _load_sample_rates() -> Dict[str, float]:
+    rates: Dict[str, float] = {action.value: rate for action, rate in DEFAULT_SAMPLE_RATES.items()}
+    rates[POLLING_SAMPLE_KEY] = 0.0
+    raw = get_config().ACTIVITY_LOG_SAMPLE_RATES
+    if raw:
+        try:
+            rates.update({key: float(value) for key, value in json.loads(raw).items()})
+        except Exception as e:
+            logger.error(f"Invalid ACTIVITY_LOG_SAMPLE_RATES, using defaults: {e}")
+    return rates
+
+
+class ActivitySampler:
+    """Entscheidet pro Event: volle Log-Zeile oder nur Aggregat."""
+
+    def __init__(self):
+        self.sample_rates = _load_sample_rates()
+
+    def sample_rate(self, action_type: ActivityActionType, status_code: int, endpoint: str) -> float:
+        """Sample-Rate für dieses Event (1.0 = immer vollständig loggen)."""
+        if action_type in ALWAYS_LOG_ACTIONS or status_code >= 400:
+            return 1.0
+        if any(marker in endpoint for marker in POLLING_ENDPOINT_MARKERS):
+            return self.sample_rates.get(POLLING_SAMPLE_KEY, 1.0)
+        return self.sample_rates.get(action_type.value, 1.0)
+
+    @staticmethod
+    def keep(rate: float) -> bool:
+        return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+
+
+class ActivityAggregator:
+    """In-Memory Minuten-Buckets (Endpoint, Methode, Action, Statusklasse) mit Latenz-Histogramm."""
+
+    def __init__(self):
+        self._buckets: Dict[Tuple, Dict[str, int]] = {}
+        self._lock = Lock()
+
+    @staticmethod
+    def _empty_counters() -> Dict[str, int]:
+        counters = {"count": 0, "total_response_time_ms": 0}
+        counters.update({column: 0 for column in LATENCY_COLUMNS})
+        return counters
+
+    @staticmethod
+    def _latency_column(response_time_ms: int) -> str:
+        for bucket, column in zip(LATENCY_BUCKETS_MS, LATENCY_COLUMNS):
+            if response_time_ms <= bucket:
+                return column
+        return LATENCY_COLUMNS[-1]
+
+    def record(self,
+               endpoint: str,
+               http_method: str,
+               action_type: ActivityActionType,
+               status_code: int,
+               response_time_ms: Optional[int],
+               timestamp: Optional[datetime] = None) -> None:
+        bucket_start = (timestamp or datetime.utcnow()).replace(second=0, microsecond=0)
+        key = (
+            bucket_start,
+            normalize_endpoint(endpoint),
+            http_method,
+            action_type.value,
+            f"{status_code // 100}xx",
+        )
+        with self._lock:
+            counters = self._buckets.setdefault(key, self._empty_counters())
+            counters["count"] += 1
+            if response_time_ms is not None:
+                counters["total_response_time_ms"] += response_time_ms
+                counters[self._latency_column(response_time_ms)] += 1
+
+    def pop_rows(self, include_current: bool = False) -> List[Dict[str, Any]]:
+        """Entnimmt abgeschlossene Minuten-Buckets (bzw. alle bei include_current) als Insert-Rows."""
+        current_minute = datetime.utcnow().replace(second=0, microsecond=0)
+        rows = []
+        with self._lock:
+            for key in list(self._buckets.keys()):
+                if include_current or key[0] < current_minute:
+                    counters = self._buckets.pop(key)
+                    bucket_start, endpoint, http_method, action_type, status_class = key
+                    rows.append({
+                        "bucket_start": bucket_start,
+                        "endpoint": endpoint,
+                        "http_method": http_method,
+                        "action_type": action_type,
+                        "status_class": status_class,
+                        **counters,
+                    })
+        return rows
+
+    def restore_rows(self, rows: List[Dict[str, Any]]) -> None:
+        """Legt nicht geschriebene Rows zurück in die Buckets (für den nächsten Flush)."""
+        with self._lock:
+            for row in rows:
+                key = (row["bucket_start"], row["endpoint"], row["http_method"], row["action_type"], row["status_class"])
+                counters = self._buckets.setdefault(key, self._empty_counters())
+                for column in counters:
+                    counters[column] += row[column]
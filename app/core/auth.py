@@ -2,6 +2,9 @@ from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from app.core.supabase import get_supabase_client
+from app.core.config import get_config
+from app.core.jwks import get_jwt_verifier, UnknownSigningKeyError
+from app.core.token_cache import get_token_cache, hash_token
 from pydantic import BaseModel, EmailStr
 from typing import Optional
 from datetime import datetime
@@ -17,7 +20,83 @@ class User(BaseModel):
     email: EmailStr
     role: Optional[str] = None
 
-async def get_current_user(token: str = Depends(oauth2_scheme)):
+async def _get_user_remote(token: str) -> Optional[User]:
+    """Validiert den Token über supabase.auth.get_user (Netzwerk-Roundtrip)."""
+    # ✅ WICHTIG: use_service_role=True für Backend Token-Validierung
+    supabase = await get_supabase_client(use_service_role=True)
+    user_response = await supabase.auth.get_user(token)
+
+    if not user_response or not user_response.user:
+        return None
+
+    user = user_response.user
+    return User(
+        id=user.id,
+        email=user.email,
+        role=user.app_metadata.get("role") if user.app_metadata else None
+    )
+
+
+async def _get_user_local(token: str) -> Optional[User]:
+    """
+    Validiert den Token lokal gegen die gecachten JWKS.
+    Fällt nur bei unbekanntem Signing-Key auf die Remote-Validierung zurück.
+    """
+    try:
+        claims = await get_jwt_verifier().verify(token)
+    except UnknownSigningKeyError as e:
+        logger.warning(f"[auth] {e} - falling back to remote validation")
+        return await _get_user_remote(token)
+
+    if not claims.get("sub") or not claims.get("email"):
+        return None
+
+    app_metadata = claims.get("app_metadata") or {}
+    return User(
+        id=claims["sub"],
+        email=claims["email"],
+        role=app_metadata.get("role")
+    )
+
+
+async def validate_token(token: str) -> Optional[User]:
+    """
+    Validiert einen Access Token je nach AUTH_VERIFICATION_MODE lokal oder remote.
+    Gibt None zurück, wenn kein User gefunden wurde; JWTError bei ungültigem Token.
+    """
+    if get_config().AUTH_VERIFICATION_MODE == "local":
+        return await _get_user_local(token)
+    return await _get_user_remote(token)
+
+
+# Request-Scope Key: Middleware und Dependency teilen sich ein Ergebnis pro Request
+REQUEST_USER_MEMO_KEY = "verified_user"
+
+
+async def resolve_user(token: str, request: Optional[Request] = None) -> Optional[User]:
+    """
+    Validiert einen Token mit Request-Memo und prozessweitem Cache davor.
+    Nur erfolgreich verifizierte User werden gemerkt.
+    """
+    token_hash = hash_token(token)
+    if request is not None:
+        memo = request.scope.get("state", {}).get(REQUEST_USER_MEMO_KEY)
+        if memo and memo[0] == token_hash:
+            return memo[1]
+
+    cache_enabled = get_config().TOKEN_CACHE_ENABLED
+    user = get_token_cache().get(token) if cache_enabled else None
+    if user is None:
+        user = await validate_token(token)
+        if user and cache_enabled:
+            get_token_cache().put(token, user)
+
+    if user and request is not None:
+        request.scope.setdefault("state", {})[REQUEST_USER_MEMO_KEY] = (token_hash, user)
+    return user
+
+
+async def get_current_user(request: Request, token: str = Depends(oauth2_scheme)):
     """
     Dependency to get the current user from the JWT token.
     """
@@ -30,23 +109,18 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     try:
         logger.info(f"[get_current_user] Validating token: {token[:8]}...")
         
-        # ✅ WICHTIG: use_service_role=True für Backend Token-Validierung
-        supabase = await get_supabase_client(use_service_role=True)
-        user_response = await supabase.auth.get_user(token)
+        user = await resolve_user(token, request)
         
-        if not user_response or not user_response.user:
+        if not user:
             logger.warning(f"[get_current_user] No user found for token: {token[:8]}...")
             raise credentials_exception
             
-        user = user_response.user
         logger.info(f"[get_current_user] User validated: {user.email}")
         
-        return User(
-            id=user.id,
-            email=user.email,
-            role=user.app_metadata.get("role") if user.app_metadata else None
-        )
+        return user
         
+    except HTTPException:
+        raise
     except JWTError as e:
         logger.error(f"[get_current_user] JWTError: {e}")
         raise credentials_exception
@@ -65,21 +139,21 @@ async def get_current_user_optional(request: Request) -> Optional[User]:
         if not authorization or not authorization.startswith("Bearer "):
             return None
         
-        token = authorization.split("")[1]
+        token = authorization.split(" ", 1)[1]
         
-        # ✅ WICHTIG: use_service_role=True auch hier
-        supabase = await get_supabase_client(use_service_role=True)
-        user_response = await supabase.auth.get_user(token)
-        
-        if not user_response or not user_response.user:
-            return None
-            
-        user = user_response.user
-        return User(
-            id=user.id,
-            email=user.email,
-            role=user.app_metadata.get("role") if user.app_metadata else None
-        )
+        return await resolve_user(token, request)
         
     except Exception:
-        return None
\ No newline at end of file
+        return None
+
+ADMIN_ROLE = "admin"
+
+
+async def require_admin(current_user: User = Depends(get_current_user)) -> User:
+    """Nur für User mit app_metadata.role == "admin" (in Supabase gesetzt)."""
+    if current_user.role != ADMIN_ROLE:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required",
+        )
+    return current_user
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 import os
+import tempfile
 
 # Determine environment
 def get_environment():
@@ -9,6 +10,17 @@ class Settings(BaseSettings):
     OPENAI_API_KEY2: str
     ANTHROPIC_API_KEY: str
     GOOGLE_API_KEY: str = ""
+    # Max. Dauer eines LLM-Aufrufs der Workout-Generierung, danach Abbruch
+    LLM_GENERATION_TIMEOUT_SECONDS: float = 90.0
+    # Streaming-Generierung: Blöcke werden gespeichert und gepusht, sobald sie fertig sind
+    # (Default für CreateWorkoutRequest.stream)
+    LLM_STREAMING_GENERATION_ENABLED: bool = False
+    # LLM-Response-Cache: gleicher User + byte-identischer Prompt -> gespeicherte Antwort statt Gemini-Call
+    LLM_RESPONSE_CACHE_ENABLED: bool = True
+    LLM_RESPONSE_CACHE_TTL_SECONDS: int = 900
+    # In-Process-LRU vor der Postgres-Stufe (llm_response_cache)
+    LLM_RESPONSE_CACHE_MAX_ENTRIES: int = 256
+    LLM_RESPONSE_CACHE_PERSISTENT: bool = True
     
     # Supabase
     SUPABASE_URL: str
@@ -16,7 +28,94 @@ class Settings(BaseSettings):
     SUPABASE_DB_URL: str
     SUPABASE_SERVICE_ROLE: str
     ALEMBIC_DB_URL: str
-    
+
+    # DB Connection Pool
+    # "null": NullPool (Serverless), "queue": persistenter Pool (uvicorn), "pgbouncer": Pool gegen Transaction-Mode-Pooler
+    DB_POOL_STRATEGY: str = "null"
+    DB_POOL_SIZE: int = 5
+    DB_POOL_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+
+    # Read-Replica für Lese-Endpoints (leer = alle Reads auf den Primary)
+    SUPABASE_READ_DB_URL: str = ""
+    READ_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    READ_REPLICA_LAG_CHECK_SECONDS: float = 5.0
+    # Nach einem Schreibzugriff liest der User so lange vom Primary
+    READ_YOUR_WRITES_SECONDS: float = 10.0
+
+    # Auth - Token-Verifikation
+    # "remote": supabase.auth.get_user() pro Request
+    # "local": Signatur/exp/aud/iss lokal gegen gecachte JWKS prüfen, Remote nur bei unbekanntem Key
+    AUTH_VERIFICATION_MODE: str = "remote"
+    SUPABASE_JWT_AUDIENCE: str = "authenticated"
+    SUPABASE_JWT_SECRET: str = ""  # Nur für Legacy-HS256-Tokens nötig
+    # Erlaubte Signatur-Algorithmen (ENV als JSON-Liste); HS256 kommt nur mit SUPABASE_JWT_SECRET dazu
+    SUPABASE_JWT_ALGORITHMS: list[str] = ["RS256", "ES256"]
+    SUPABASE_JWKS_REFRESH_SECONDS: int = 600
+
+    # Cache für verifizierte Tokens (prozessweit, LRU)
+    TOKEN_CACHE_ENABLED: bool = True
+    TOKEN_CACHE_MAX_ENTRIES: int = 10000
+    TOKEN_CACHE_MAX_TTL_SECONDS: int = 300
+
+    # Activity Logging: max. Request-Body-Größe, die für das Logging mitgeschnitten wird
+    ACTIVITY_LOG_MAX_BODY_BYTES: int = 16384
+    # Activity Logging: gebatchter Writer
+    ACTIVITY_LOG_QUEUE_MAX: int = 10000
+    ACTIVITY_LOG_BATCH_SIZE: int = 200
+    ACTIVITY_LOG_FLUSH_INTERVAL_SECONDS: float = 2.0
+    # Verhalten bei Rückstau: "drop" (volle Queue verwirft) oder "sample" (ab 80% nur jedes N-te Event)
+    ACTIVITY_LOG_OVERFLOW_POLICY: str = "drop"
+    ACTIVITY_LOG_PRESSURE_SAMPLE_RATE: int = 10
+    # Activity Logging: Sample-Raten pro Action Type als JSON, z.B. {"workout_view": 0.05, "polling": 0}
+    ACTIVITY_LOG_SAMPLE_RATES: str = ""
+    ACTIVITY_LOG_AGGREGATE_FLUSH_SECONDS: float = 60.0
+    # Activity Logging: zstd-Spill-Dateien bei DB-Ausfall
+    ACTIVITY_LOG_SPILL_ENABLED: bool = True
+    ACTIVITY_LOG_SPILL_DIR: str = os.path.join(tempfile.gettempdir(), "s3ssions_activity_spill")
+    ACTIVITY_LOG_SPILL_SEGMENT_BYTES: int = 8 * 1024 * 1024
+    ACTIVITY_LOG_SPILL_REPLAY_INTERVAL_SECONDS: float = 30.0
+    # Offene/geclaimte Segmente ohne Änderung seit N Sekunden gehören einem beendeten Prozess und werden übernommen
+    ACTIVITY_LOG_SPILL_STALE_SECONDS: float = 600.0
+    # Activity Logging: Monats-Partitionen, die vorab angelegt werden (Retention: LOG_RETENTION_DAYS)
+    ACTIVITY_LOG_PARTITION_MONTHS_AHEAD: int = 3
+    # Activity Analytics: stündliche Rollups rechnen die letzten N Stunden neu (verspätete Logs)
+    ACTIVITY_ROLLUP_LOOKBACK_HOURS: int = 3
+
+    # Übungskatalog (exercise_descriptions) als In-Memory-Snapshot: so oft wird max(updated_at)/count geprüft
+    EXERCISE_CATALOG_CHECK_SECONDS: float = 60.0
+
+    # Event-Loop-Monitor: Messintervall und ab wann eine Verzögerung als Stall zählt
+    EVENT_LOOP_MONITOR_INTERVAL_SECONDS: float = 0.5
+    EVENT_LOOP_STALL_THRESHOLD_MS: float = 100.0
+
+    # LLM-Job-Queue (llm_jobs + app/worker.py). Aus: Generierung/Revision laufen als BackgroundTasks im API-Prozess
+    JOB_QUEUE_ENABLED: bool = False
+    JOB_WORKER_CONCURRENCY: int = 4
+    JOB_POLL_INTERVAL_SECONDS: float = 2.0
+    # Visibility Timeout: so lange gehört ein Job dem Worker; der Heartbeat verlängert das Lease
+    JOB_VISIBILITY_TIMEOUT_SECONDS: int = 300
+    JOB_HEARTBEAT_SECONDS: float = 30.0
+    JOB_MAX_ATTEMPTS: int = 3
+    # Backoff zwischen Versuchen: base * 2^(attempt-1), gedeckelt
+    JOB_RETRY_BASE_SECONDS: float = 10.0
+    JOB_RETRY_MAX_SECONDS: float = 600.0
+
+    # LLM-Status per SSE (LISTEN/NOTIFY). Leer = SUPABASE_DB_URL; bei pgbouncer eine Session-Mode-URL setzen
+    LLM_STATUS_LISTEN_DB_URL: str = ""
+    LLM_STATUS_STREAM_MAX_SECONDS: float = 300.0
+    # Keepalive-Kommentar und DB-Gegencheck (falls ein NOTIFY verloren ging)
+    LLM_STATUS_STREAM_KEEPALIVE_SECONDS: float = 15.0
+
+    # Supabase HTTP-Client (Keep-Alive / HTTP/2)
+    SUPABASE_HTTP2: bool = True
+    SUPABASE_HTTP_TIMEOUT: float = 10.0
+    SUPABASE_HTTP_MAX_CONNECTIONS: int = 20
+    SUPABASE_HTTP_MAX_KEEPALIVE: int = 10
+    SUPABASE_HTTP_KEEPALIVE_EXPIRY: float = 30.0
+
     # Email settings
     MAIL_USERNAME: str = os.getenv("MAIL_USERNAME", "")
     MAIL_PASSWORD: str = os.getenv("MAIL_PASSWORD", "")
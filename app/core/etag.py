@@ -0,0 +1,31 @@
+"""
+Starke ETags und If-None-Match-Auswertung für Conditional GETs.
+
+Der ETag wird aus einem billigen Versionsstempel gebaut (z.B. Workout.revision), nicht aus
+dem Response-Body - so kann ein 304 beantwortet werden, bevor die Daten geladen werden.
+"""
+
+import hashlib
+from typing import Optional
+
+from fastapi import Response, status
+
+
+def make_etag(*parts: object) -> str:
+    """Starker ETag aus den Teilen eines Versionsstempels, z.B. make_etag("workout", 12, 7)."""
+    digest = hashlib.sha256("|".join(str(part) for part in parts).encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True wenn der If-None-Match-Header den ETag enthält (oder "*" ist)."""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    # Schwache Validatoren (W/"...") gelten für GET als gleich (RFC 9110, weak comparison)
+    candidates = [candidate[2:] if candidate.startswith("W/") else candidate for candidate in candidates]
+    return "*" in candidates or etag in candidates
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
@@ -0,0 +1,87 @@
+"""
+Misst, wie lange der Event Loop blockiert ist (z.B. durch synchrone LLM- oder CPU-Arbeit).
+
+Ein Hintergrund-Task schläft in festen Intervallen; wacht er später auf als geplant, war
+der Loop in dieser Zeit blockiert. Verzögerungen über EVENT_LOOP_STALL_THRESHOLD_MS zählen
+als Stall. Gestartet im FastAPI lifespan, abrufbar über /health/event-loop.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from app.core.config import get_config
+
+logger = logging.getLogger(__name__)
+
+
+class EventLoopMonitor:
+    def __init__(self, interval_seconds: float, stall_threshold_ms: float):
+        self.interval_seconds = interval_seconds
+        self.stall_threshold_ms = stall_threshold_ms
+        self._task: Optional[asyncio.Task] = None
+
+        self.samples = 0
+        self.stalls = 0
+        self.total_stall_ms = 0.0
+        self.max_lag_ms = 0.0
+        self.last_lag_ms = 0.0
+
+    def record_lag(self, lag_ms: float) -> None:
+        self.samples += 1
+        self.last_lag_ms = lag_ms
+        self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+        if lag_ms >= self.stall_threshold_ms:
+            self.stalls += 1
+            self.total_stall_ms += lag_ms
+            logger.warning(f"Event loop blocked for {lag_ms:.0f}ms")
+
+    async def _monitor_loop(self) -> None:
+        while True:
+            expected = time.perf_counter() + self.interval_seconds
+            await asyncio.sleep(self.interval_seconds)
+            self.record_lag(max(0.0, (time.perf_counter() - expected) * 1000))
+
+    def start(self) -> None:
+        """Startet die Messung (im FastAPI lifespan)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._monitor_loop())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "interval_ms": round(self.interval_seconds * 1000, 1),
+            "stall_threshold_ms": self.stall_threshold_ms,
+            "samples": self.samples,
+            "stalls": self.stalls,
+            "total_stall_ms": round(self.total_stall_ms, 1),
+            "max_lag_ms": round(self.max_lag_ms, 1),
+            "last_lag_ms": round(self.last_lag_ms, 1),
+        }
+
+
+_event_loop_monitor: Optional[EventLoopMonitor] = None
+
+
+def get_event_loop_monitor() -> EventLoopMonitor:
+    """
+    Returns a singleton instance of the EventLoopMonitor.
+    """
+    global _event_loop_monitor
+    if _event_loop_monitor is None:
+        config = get_config()
+        _event_loop_monitor = EventLoopMonitor(
+            interval_seconds=config.EVENT_LOOP_MONITOR_INTERVAL_SECONDS,
+            stall_threshold_ms=config.EVENT_LOOP_STALL_THRESHOLD_MS,
+        )
+    return _event_loop_monitor
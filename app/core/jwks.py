@@ -0,0 +1,137 @@
+"""
+Lokale Verifikation von Supabase Access Tokens gegen einen gecachten JWKS.
+
+Spart den Netzwerk-Roundtrip zu supabase.auth.get_user() pro Request.
+Unbekannte Key-IDs lösen einen (gedrosselten) JWKS-Refresh aus; bleibt der Key
+unbekannt, fällt get_current_user auf die Remote-Validierung zurück.
+"""
+
+import asyncio
+import time
+import logging
+from typing import Any, Dict, Optional
+
+from jose import jwt, JWTError
+
+from app.core.config import get_config
+from app.core.supabase import get_http_client
+
+logger = logging.getLogger("auth")
+
+# Mindestabstand zwischen zwei JWKS-Abrufen, die durch unbekannte Keys ausgelöst werden
+MIN_REFRESH_INTERVAL_SECONDS = 30
+
+
+class UnknownSigningKeyError(Exception):
+    """Token ist mit einem Key signiert, der (noch) nicht im JWKS-Cache liegt."""
+
+
+class SupabaseJWTVerifier:
+    """
+    Hält den JWKS des Supabase-Projekts im Speicher und prüft Tokens lokal.
+    """
+
+    def __init__(self):
+        config = get_config()
+        self.issuer = f"{config.SUPABASE_URL.rstrip('/')}/auth/v1"
+        self.jwks_url = f"{self.issuer}/.well-known/jwks.json"
+        self.audience = config.SUPABASE_JWT_AUDIENCE
+        self.jwt_secret = config.SUPABASE_JWT_SECRET
+        # Feste Allowlist - der alg-Header des Tokens ist unverifiziert und darf sie nicht erweitern
+        self.algorithms = {alg for alg in config.SUPABASE_JWT_ALGORITHMS if alg != "HS256"}
+        if self.jwt_secret:
+            self.algorithms.add("HS256")
+        self.refresh_seconds = config.SUPABASE_JWKS_REFRESH_SECONDS
+
+        self._keys: Dict[str, Dict[str, Any]] = {}
+        self._last_fetch: float = 0.0
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def refresh_keys(self, force: bool = False) -> None:
+        """Lädt den JWKS neu (gedrosselt, außer bei force=True)."""
+        async with self._lock:
+            if not force and time.monotonic() - self._last_fetch < MIN_REFRESH_INTERVAL_SECONDS:
+                return
+            try:
+                response = await get_http_client().get(self.jwks_url, timeout=5.0)
+                response.raise_for_status()
+                jwks = response.json()
+                self._keys = {key["kid"]: key for key in jwks.get("keys", []) if key.get("kid")}
+                logger.info(f"[jwks] Loaded {len(self._keys)} signing keys")
+            except Exception as e:
+                # Alte Keys behalten - ein fehlgeschlagener Refresh darf Auth nicht lahmlegen
+                logger.error(f"[jwks] Refresh failed: {e}")
+            finally:
+                self._last_fetch = time.monotonic()
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await self.refresh_keys(force=True)
+            await asyncio.sleep(self.refresh_seconds)
+
+    def start_background_refresh(self) -> None:
+        """Startet den periodischen JWKS-Refresh (im FastAPI lifespan)."""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop_background_refresh(self) -> None:
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    async def _resolve_key(self, header: Dict[str, Any]) -> Any:
+        if header.get("alg") == "HS256":
+            return self.jwt_secret
+
+        kid = header.get("kid")
+        if kid not in self._keys:
+            await self.refresh_keys()
+        if kid not in self._keys:
+            raise UnknownSigningKeyError(f"Unknown signing key: {kid}")
+        return self._keys[kid]
+
+    async def verify(self, token: str) -> Dict[str, Any]:
+        """
+        Prüft Signatur, exp, aud und iss lokal und gibt die Claims zurück.
+
+        Raises:
+            UnknownSigningKeyError: Key nicht im Cache -> Remote-Fallback verwenden
+            JWTError: Token ungültig (Signatur, abgelaufen, falsche aud/iss)
+        """
+        header = jwt.get_unverified_header(token)
+        alg = header.get("alg")
+        if alg == "HS256" and not self.jwt_secret:
+            # Legacy-Projekt ohne Secret: Supabase prüft das Token remote
+            raise UnknownSigningKeyError("HS256 token but no SUPABASE_JWT_SECRET configured")
+        if alg not in self.algorithms:
+            raise JWTError(f"Signing algorithm not allowed: {alg}")
+
+        key = await self._resolve_key(header)
+        if isinstance(key, dict) and key.get("alg") and key["alg"] != alg:
+            raise JWTError("Token algorithm does not match signing key")
+        # alg ist hier bereits gegen die Allowlist geprüft
+        return jwt.decode(
+            token,
+            key,
+            algorithms=[alg],
+            audience=self.audience,
+            issuer=self.issuer,
+        )
+
+
+_verifier: Optional[SupabaseJWTVerifier] = None
+
+
+def get_jwt_verifier() -> SupabaseJWTVerifier:
+    """
+    Returns a singleton instance of the SupabaseJWTVerifier.
+    """
+    global _verifier
+    if _verifier is None:
+        _verifier = SupabaseJWTVerifier()
+    return _verifier
@@ -1,7 +1,90 @@
-from supabase import create_async_client
+import asyncio
+import logging
+from typing import Dict, Optional
+
+import httpx
+from supabase import create_async_client, AsyncClient, AsyncClientOptions
 from app.core.config import get_config
 
-async def get_supabase_client(use_service_role: bool = False):
+logger = logging.getLogger(__name__)
+
+# ✅ Langlebige Clients pro Key (anon / service_role) statt create_async_client pro Aufruf
+_clients: Dict[bool, AsyncClient] = {}
+_http_client: Optional[httpx.AsyncClient] = None
+_lock = asyncio.Lock()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Gemeinsamer httpx-Client (Keep-Alive, HTTP/2) für Supabase-Aufrufe."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        config = get_config()
+        _http_client = httpx.AsyncClient(
+            http2=config.SUPABASE_HTTP2,
+            timeout=config.SUPABASE_HTTP_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=config.SUPABASE_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=config.SUPABASE_HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=config.SUPABASE_HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
+    return _http_client
+
+
+def _client_options() -> AsyncClientOptions:
+    # Geteilter Client: keine Session-Persistenz und keine Refresh-Timer pro Login
+    options = {"auto_refresh_token": False, "persist_session": False}
+    # Neuere supabase-py Versionen erlauben einen eigenen httpx-Client
+    if "httpx_client" in getattr(AsyncClientOptions, "__dataclass_fields__", {}):
+        options["httpx_client"] = get_http_client()
+    return AsyncClientOptions(**options)
+
+
+async def _create_client(use_service_role: bool) -> AsyncClient:
     config = get_config()
     key = config.SUPABASE_SERVICE_ROLE if use_service_role else config.SUPABASE_API_KEY
-    return await create_async_client(config.SUPABASE_URL, key) 
\ No newline at end of file
+    return await create_async_client(config.SUPABASE_URL, key, options=_client_options())
+
+
+async def get_supabase_client(use_service_role: bool = False) -> AsyncClient:
+    client = _clients.get(use_service_role)
+    if client is not None:
+        return client
+
+    async with _lock:
+        if use_service_role not in _clients:
+            _clients[use_service_role] = await _create_client(use_service_role)
+            logger.info(f"✅ Supabase client created (service_role={use_service_role})")
+        return _clients[use_service_role]
+
+
+async def create_supabase_sign_in_client() -> AsyncClient:
+    """
+    Eigener, kurzlebiger anon-Client für sign_in_*: gotrue merkt sich die Session des
+    angemeldeten Users und der Auth-Listener setzt dessen JWT als Authorization-Header.
+    Auf dem geteilten Client wäre das User-übergreifender Zustand (parallele Logins racen).
+    """
+    return await _create_client(use_service_role=False)
+
+
+async def init_supabase_clients():
+    """Erstellt anon- und service_role-Client beim App-Start (FastAPI lifespan)."""
+    await get_supabase_client(use_service_role=False)
+    await get_supabase_client(use_service_role=True)
+
+
+async def close_supabase_clients():
+    """Schließt alle Supabase-Clients und den geteilten httpx-Client."""
+    global _http_client
+    for client in list(_clients.values()):
+        try:
+            close = getattr(client.auth, "close", None)
+            if close:
+                await close()
+        except Exception as e:
+            logger.warning(f"⚠️ Error closing Supabase client: {e}")
+    _clients.clear()
+
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
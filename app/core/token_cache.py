@@ -0,0 +1,103 @@
+"""
+Prozessweiter LRU-Cache für bereits verifizierte Access Tokens.
+
+Key ist der SHA-256 des Tokens (der Token selbst wird nicht gespeichert).
+Einträge laufen zum `exp` des Tokens ab, spätestens aber nach
+TOKEN_CACHE_MAX_TTL_SECONDS, damit widerrufene Sessions nicht unbegrenzt gültig bleiben.
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional, Tuple, TYPE_CHECKING
+
+from jose import jwt
+
+from app.core.config import get_config
+
+if TYPE_CHECKING:
+    from app.core.auth import User
+
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class VerifiedTokenCache:
+    """Größenbegrenzter LRU-Cache mit Ablauf pro Eintrag und Hit/Miss-Zählern."""
+
+    def __init__(self, max_entries: int, max_ttl_seconds: int):
+        self.max_entries = max_entries
+        self.max_ttl_seconds = max_ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, User]]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, token: str) -> Optional["User"]:
+        key = hash_token(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, user = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return user
+
+    def put(self, token: str, user: "User") -> None:
+        now = time.time()
+        expires_at = now + self.max_ttl_seconds
+        try:
+            # Token ist zu diesem Zeitpunkt bereits verifiziert
+            exp = jwt.get_unverified_claims(token).get("exp")
+            if exp:
+                expires_at = min(expires_at, float(exp))
+        except Exception:
+            pass
+        if expires_at <= now:
+            return
+
+        key = hash_token(token)
+        with self._lock:
+            self._entries[key] = (expires_at, user)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+_token_cache: Optional[VerifiedTokenCache] = None
+
+
+def get_token_cache() -> VerifiedTokenCache:
+    """
+    Returns a singleton instance of the VerifiedTokenCache.
+    """
+    global _token_cache
+    if _token_cache is None:
+        config = get_config()
+        _token_cache = VerifiedTokenCache(
+            max_entries=config.TOKEN_CACHE_MAX_ENTRIES,
+            max_ttl_seconds=config.TOKEN_CACHE_MAX_TTL_SECONDS,
+        )
+    return _token_cache
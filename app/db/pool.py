@@ -0,0 +1,142 @@
+"""
+Connection-Pool-Strategien für die App-Engine (DB_POOL_STRATEGY).
+
+- "null":      NullPool - jede Session öffnet eine neue Verbindung (Serverless/Vercel)
+- "queue":     AsyncAdaptedQueuePool mit pre_ping + recycle (langlaufende uvicorn-Worker)
+- "pgbouncer": QueuePool gegen PgBouncer/Supavisor im Transaction Mode - Prepared-Statement-Caches
+               aus, eindeutige Statement-Namen (sonst "prepared statement already exists")
+
+Alle Pools messen die Checkout-Latenz (Warten auf bzw. Aufbau einer Verbindung).
+"""
+
+import time
+import uuid
+from collections import deque
+from threading import Lock
+from typing import Any, Deque, Dict
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+POOL_STRATEGIES = ("null", "queue", "pgbouncer")
+
+# Anzahl Checkouts, über die p50/p95 berechnet werden
+_LATENCY_WINDOW = 1000
+
+
+class PoolMetrics:
+    """Prozessweite Zähler für Checkouts und physische Verbindungen."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._recent_ms: Deque[float] = deque(maxlen=_LATENCY_WINDOW)
+        self.checkouts = 0
+        self.total_checkout_ms = 0.0
+        self.max_checkout_ms = 0.0
+        self.connects = 0
+        self.invalidations = 0
+
+    def record_checkout(self, elapsed_ms: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.total_checkout_ms += elapsed_ms
+            self.max_checkout_ms = max(self.max_checkout_ms, elapsed_ms)
+            self._recent_ms.append(elapsed_ms)
+
+    def _percentile(self, values, percentile: float) -> float:
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * percentile / 100))], 2)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            recent = list(self._recent_ms)
+            return {
+                "checkouts": self.checkouts,
+                "avg_checkout_ms": round(self.total_checkout_ms / self.checkouts, 2) if self.checkouts else 0.0,
+                "p50_checkout_ms": self._percentile(recent, 50),
+                "p95_checkout_ms": self._percentile(recent, 95),
+                "max_checkout_ms": round(self.max_checkout_ms, 2),
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+class _TimedCheckoutMixin:
+    """Misst die Zeit in _do_get: Warten auf eine freie Verbindung bzw. deren Aufbau."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_metrics.record_checkout((time.perf_counter() - start) * 1000)
+
+
+class InstrumentedNullPool(_TimedCheckoutMixin, NullPool):
+    pass
+
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _unique_statement_name() -> str:
+    return f"__asyncpg_{uuid.uuid4()}__"
+
+
+def engine_pool_options(settings) -> Dict[str, Any]:
+    """kwargs für create_async_engine je nach DB_POOL_STRATEGY."""
+    strategy = settings.DB_POOL_STRATEGY
+    if strategy not in POOL_STRATEGIES:
+        raise ValueError(f"DB_POOL_STRATEGY must be one of {POOL_STRATEGIES}, got '{strategy}'")
+
+    if strategy == "null":
+        return {"poolclass": InstrumentedNullPool, "connect_args": {}}
+
+    options: Dict[str, Any] = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_POOL_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "connect_args": {},
+    }
+    if strategy == "pgbouncer":
+        # Transaction Mode: Server-Verbindung wechselt pro Transaktion -> keine gecachten Prepared Statements
+        options["connect_args"] = {
+            "statement_cache_size": 0,                 # asyncpg-eigener Cache
+            "prepared_statement_cache_size": 0,        # SQLAlchemy asyncpg-Adapter
+            "prepared_statement_name_func": _unique_statement_name,
+        }
+    return options
+
+
+def register_pool_events(engine: AsyncEngine) -> None:
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        pool_metrics.connects += 1
+
+    @event.listens_for(engine.sync_engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        pool_metrics.invalidations += 1
+
+
+def pool_stats(engine: AsyncEngine, strategy: str) -> Dict[str, Any]:
+    """Aktueller Pool-Zustand (in use / overflow) plus Checkout-Metriken."""
+    pool = engine.pool
+    stats: Dict[str, Any] = {"strategy": strategy, **pool_metrics.stats()}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "pool_size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(0, pool.overflow()),
+        })
+    return stats
@@ -0,0 +1,153 @@
+"""
+Routing von Lese-Requests auf die Read-Replica (SUPABASE_READ_DB_URL).
+
+- Replica-Lag wird gecacht gemessen; über READ_REPLICA_MAX_LAG_SECONDS oder bei Fehlern
+  gehen Reads auf den Primary
+- Read-your-writes: nach einem Schreibvorgang wird der User für READ_YOUR_WRITES_SECONDS
+  auf den Primary gepinnt. Der Pin liegt in Postgres (read_your_writes_pins, auf dem Primary),
+  weil der nächste Read meist auf einer anderen Serverless-Instanz bzw. einem anderen Worker
+  landet und Generierung/Revision im Job-Worker-Prozess schreiben. Der prozesslokale Pin
+  spart nur den Lookup, wenn derselbe Prozess wieder liest.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from threading import Lock
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.models.read_your_writes_pin_model import ReadYourWritesPin
+
+logger = logging.getLogger(__name__)
+
+# 0 wenn die Replica alles empfangene WAL eingespielt hat, sonst Alter der letzten Transaktion
+_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+# Obergrenze für gepinnte User, damit der Speicher nicht wächst
+_MAX_PINNED_USERS = 10000
+
+
+class ReplicaRouter:
+    """Entscheidet pro Request, ob die Replica genutzt werden darf."""
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        primary_engine: AsyncEngine,
+        max_lag_seconds: float,
+        check_interval_seconds: float,
+        pin_seconds: float,
+    ):
+        self.engine = engine
+        self.primary_engine = primary_engine
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self.pin_seconds = pin_seconds
+
+        self._lag_seconds: Optional[float] = None
+        self._checked_at = 0.0
+        self._check_lock = asyncio.Lock()
+
+        self._pinned: Dict[str, float] = {}
+        self._pin_lock = Lock()
+
+        self.replica_reads = 0
+        self.primary_fallbacks = 0
+        self.pinned_reads = 0
+        self.pin_errors = 0
+
+    # --- Replica-Lag ---
+
+    async def _measure_lag(self) -> Optional[float]:
+        try:
+            async with self.engine.connect() as conn:
+                return float((await conn.execute(_LAG_QUERY)).scalar() or 0.0)
+        except Exception as e:
+            logger.warning(f"Read replica lag check failed - routing reads to primary: {e}")
+            return None
+
+    async def replica_usable(self) -> bool:
+        """True wenn die Replica erreichbar ist und ihr Lag unter dem Limit liegt."""
+        if time.monotonic() - self._checked_at >= self.check_interval_seconds:
+            async with self._check_lock:
+                # Nur ein Request misst, die anderen nutzen das Ergebnis
+                if time.monotonic() - self._checked_at >= self.check_interval_seconds:
+                    self._lag_seconds = await self._measure_lag()
+                    self._checked_at = time.monotonic()
+        return self._lag_seconds is not None and self._lag_seconds <= self.max_lag_seconds
+
+    # --- Read-your-writes ---
+
+    def _pin_locally(self, user_id: str) -> None:
+        with self._pin_lock:
+            if len(self._pinned) >= _MAX_PINNED_USERS:
+                now = time.monotonic()
+                self._pinned = {uid: until for uid, until in self._pinned.items() if until > now}
+            self._pinned[str(user_id)] = time.monotonic() + self.pin_seconds
+
+    def _is_pinned_locally(self, user_id: str) -> bool:
+        with self._pin_lock:
+            until = self._pinned.get(str(user_id))
+            if until is None:
+                return False
+            if until <= time.monotonic():
+                del self._pinned[str(user_id)]
+                return False
+            return True
+
+    async def pin_user(self, user_id: str) -> None:
+        """Pin für alle Prozesse setzen (Upsert auf dem Primary, Zeit aus der DB-Uhr)."""
+        self._pin_locally(user_id)
+        pinned_until = func.timezone("utc", func.now()) + timedelta(seconds=self.pin_seconds)
+        stmt = insert(ReadYourWritesPin).values(user_id=str(user_id), pinned_until=pinned_until)
+        try:
+            async with self.primary_engine.begin() as conn:
+                await conn.execute(stmt.on_conflict_do_update(
+                    index_elements=[ReadYourWritesPin.user_id],
+                    set_={"pinned_until": stmt.excluded.pinned_until},
+                ))
+        except Exception as e:
+            # Andere Prozesse lesen evtl. kurz von der Replica - der Schreibvorgang selbst ist durch
+            self.pin_errors += 1
+            logger.warning(f"Could not store read-your-writes pin for user {user_id}: {e}")
+
+    async def is_pinned(self, user_id: str) -> bool:
+        """Lookup auf dem Primary; im Fehlerfall gilt der User als gepinnt (lieber Primary als stale)."""
+        if self._is_pinned_locally(user_id):
+            return True
+        try:
+            async with self.primary_engine.connect() as conn:
+                pinned = await conn.scalar(
+                    select(ReadYourWritesPin.user_id).where(
+                        ReadYourWritesPin.user_id == str(user_id),
+                        ReadYourWritesPin.pinned_until > func.timezone("utc", func.now()),
+                    )
+                )
+        except Exception as e:
+            self.pin_errors += 1
+            logger.warning(f"Read-your-writes pin lookup failed - reading from primary: {e}")
+            return True
+        return pinned is not None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "lag_seconds": self._lag_seconds,
+            "max_lag_seconds": self.max_lag_seconds,
+            "replica_usable": self._lag_seconds is not None and self._lag_seconds <= self.max_lag_seconds,
+            "pinned_users_local": len(self._pinned),
+            "replica_reads": self.replica_reads,
+            "primary_fallbacks": self.primary_fallbacks,
+            "pinned_reads": self.pinned_reads,
+            "pin_errors": self.pin_errors,
+        }
@@ -1,10 +1,15 @@
 from sqlmodel import SQLModel
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
-from sqlalchemy.pool import NullPool
-from typing import AsyncGenerator
+from sqlalchemy.orm import Session
+from sqlalchemy import event
+from fastapi import Depends, Request
+from typing import AsyncGenerator, Optional
 from contextlib import asynccontextmanager
 from app.core.config import get_config
+from app.core.auth import REQUEST_USER_MEMO_KEY, User, get_current_user_optional
+from app.db.pool import engine_pool_options, register_pool_events, pool_stats
+from app.db.read_replica import ReplicaRouter
 import logging
 from sqlalchemy import text
 
@@ -13,46 +18,111 @@ logger = logging.getLogger(__name__)
 
 settings = get_config()
 
-# Single Engine - Supabase Session Mode für Vercel Pro + Background Tasks
-db_url = settings.SUPABASE_DB_URL  # Port 5432 - Session Mode
-logger.info("🚀 Unified Engine: Session Mode (Port 5432) - Vercel Pro + Background Tasks")
-
-# Single Engine - Optimized for Supabase Session Mode + Vercel Pro
-engine = create_async_engine(
-    db_url,  # Session Mode URL (5432) - für alle Operations
-    echo=False,
-    poolclass=NullPool,      # ✅ Vercel Pro: Keine persistenten Connections zwischen Requests
-    connect_args={
-        "timeout": 20,                   # ✅ Längere Timeouts für Session Mode
-        "command_timeout": 120,          # ✅ 2min für Background Tasks
-        "server_settings": {
-            "application_name": "s3ssions_unified_session",
+# Single Engine - Supabase Session Mode (5432) bzw. Pooler-URL bei DB_POOL_STRATEGY=pgbouncer
+db_url = settings.SUPABASE_DB_URL
+pool_strategy = settings.DB_POOL_STRATEGY
+
+
+def _create_engine(url: str, application_name: str):
+    pool_options = engine_pool_options(settings)
+    pool_class = pool_options.pop("poolclass")
+    pool_connect_args = pool_options.pop("connect_args")
+
+    new_engine = create_async_engine(
+        url,
+        echo=False,
+        poolclass=pool_class,    # null (Serverless) / queue (uvicorn) / pgbouncer
+        connect_args={
+            "timeout": 20,                   # ✅ Längere Timeouts für Session Mode
+            "command_timeout": 120,          # ✅ 2min für Background Tasks
+            "server_settings": {
+                "application_name": application_name,
+            },
+            **pool_connect_args,
         },
-    },
-    execution_options={
-        "isolation_level": "READ_COMMITTED"
-    },
-)
+        execution_options={
+            "isolation_level": "READ_COMMITTED"
+        },
+        **pool_options,
+    )
+    register_pool_events(new_engine)
+    return new_engine
+
+
+def _create_session_maker(bind):
+    return async_sessionmaker(
+        bind=bind,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autoflush=False,        # ✅ Vercel Serverless: Manuelle Kontrolle
+    )
+
+
+engine = _create_engine(db_url, "s3ssions_unified_session")
 
 # Single session maker - für alle Operations
-session_maker = async_sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autoflush=False,        # ✅ Vercel Serverless: Manuelle Kontrolle
-)
+session_maker = _create_session_maker(engine)
+
+# Optionale Read-Replica für Lese-Endpoints (get_read_session)
+read_engine = None
+read_session_maker = None
+replica_router = None
+if settings.SUPABASE_READ_DB_URL:
+    read_engine = _create_engine(settings.SUPABASE_READ_DB_URL, "s3ssions_read_replica")
+    read_session_maker = _create_session_maker(read_engine)
+    replica_router = ReplicaRouter(
+        read_engine,
+        primary_engine=engine,
+        max_lag_seconds=settings.READ_REPLICA_MAX_LAG_SECONDS,
+        check_interval_seconds=settings.READ_REPLICA_LAG_CHECK_SECONDS,
+        pin_seconds=settings.READ_YOUR_WRITES_SECONDS,
+    )
+    logger.info("✅ Read replica engine configured")
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flush_writes(session, flush_context):
+    session.info["has_writes"] = True
 
-logger.info("✅ Unified Supabase engine configured:")
-logger.info(f"   🚀 Single Engine: NullPool + Session Mode (5432) - Prepared statements enabled")
-logger.info(f"   📊 Optimized for: API Endpoints + Background Tasks + Vercel Pro")
-logger.info(f"   ⚡ Benefits: Better performance, longer timeouts, no pgbouncer restrictions")
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_statement_writes(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["has_writes"] = True
+
+
+async def pin_user_to_primary(user_id: str) -> None:
+    """
+    Read-your-writes: Reads dieses Users gehen für READ_YOUR_WRITES_SECONDS auf den Primary -
+    prozessübergreifend (Pin in Postgres). Ohne SUPABASE_READ_DB_URL ein No-op; der Job-Worker
+    braucht daher dieselbe SUPABASE_READ_DB_URL wie die API.
+    """
+    if replica_router:
+        await replica_router.pin_user(user_id)
+
+logger.info(f"✅ Unified Supabase engine configured: pool strategy '{pool_strategy}'")
+if pool_strategy != "null":
+    logger.info(
+        f"   🔁 Pool: size={settings.DB_POOL_SIZE}, max_overflow={settings.DB_POOL_MAX_OVERFLOW}, "
+        f"recycle={settings.DB_POOL_RECYCLE_SECONDS}s, pre_ping={settings.DB_POOL_PRE_PING}"
+    )
 
 
 def get_engine():
     return engine
 
+
+def get_pool_stats() -> dict:
+    """Checkout-Latenz, in use und overflow des App-Pools"""
+    return pool_stats(engine, pool_strategy) if engine else {"strategy": pool_strategy, "disposed": True}
+
+def _request_user_id(request: Request):
+    memo = request.scope.get("state", {}).get(REQUEST_USER_MEMO_KEY)
+    return memo[1].id if memo else None
+
+
 # FastAPI dependency für API endpoints - Unified session
-async def get_session() -> AsyncGenerator[AsyncSession, None]:
+async def get_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
     """Get database session for API endpoints - Unified Supabase Session Mode"""
     async with session_maker() as session:
         try:
@@ -62,9 +132,49 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
             await session.rollback()
             raise
         finally:
+            # Nach Schreibzugriffen den User kurz auf den Primary pinnen (read-your-writes)
+            if session.info.get("has_writes"):
+                user_id = _request_user_id(request)
+                if user_id:
+                    await pin_user_to_primary(user_id)
             # ✅ Vercel Pro: Explicit cleanup
             await session.close()
 
+
+# FastAPI dependency für Lese-Endpoints - Replica mit Fallback auf den Primary
+async def get_read_session(
+    request: Request,
+    user: Optional[User] = Depends(get_current_user_optional),
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Read-only Session: Replica, solange ihr Lag unter READ_REPLICA_MAX_LAG_SECONDS liegt
+    und der User nicht gerade selbst geschrieben hat - sonst Primary.
+    """
+    maker = session_maker
+    if replica_router is not None:
+        # Erst Lag prüfen (gecacht) - ist die Replica eh nicht nutzbar, spart das den Pin-Lookup
+        if not await replica_router.replica_usable():
+            replica_router.primary_fallbacks += 1
+        elif user and await replica_router.is_pinned(user.id):
+            replica_router.pinned_reads += 1
+        else:
+            replica_router.replica_reads += 1
+            maker = read_session_maker
+
+    async with maker() as session:
+        try:
+            yield session
+        except Exception as e:
+            logger.error(f"API read session error: {e}", exc_info=True)
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
+
+
+def get_replica_stats() -> dict:
+    return replica_router.stats() if replica_router else {"configured": False}
+
 # Background task sessions - Same unified session
 @asynccontextmanager
 async def get_background_session():
@@ -96,11 +206,46 @@ async def create_session():
         finally:
             await session.close()
 
+class JobContext:
+    """
+    Hält eine physische Verbindung für einen ganzen Background-Job (z.B. Workout-Generierung).
+    Jeder Schritt läuft in einer eigenen kurzen Transaktion auf dieser Verbindung -
+    zwischen den Schritten (LLM-Call) ist keine Transaktion offen.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    @asynccontextmanager
+    async def step(self):
+        """Transaktion auf der Job-Verbindung - commit bei Erfolg, rollback bei Fehler"""
+        try:
+            yield self.session
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+
+
+@asynccontextmanager
+async def job_context():
+    """Eine Verbindung pro Background-Job statt create_session() pro Schritt"""
+    async with engine.connect() as connection:
+        async with session_maker(bind=connection) as session:
+            yield JobContext(session)
+
+
 # Engine cleanup
 async def close_engine():
     """Close unified SQLAlchemy engine"""
-    global engine, session_maker
+    global engine, session_maker, read_engine, read_session_maker
     
+    if read_engine:
+        await read_engine.dispose()
+        read_engine = None
+        read_session_maker = None
+        logger.info("✅ Read replica engine disposed")
+
     if engine:
         await engine.dispose()
         engine = None
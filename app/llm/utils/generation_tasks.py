@@ -0,0 +1,76 @@
+"""
+Laufende LLM-Generierungen pro Workout (prozessweit), damit sie abgebrochen werden können.
+
+Die Generierung läuft als eigener asyncio-Task. cancel() bricht ihn ab; die Cancellation
+wandert durch chain.ainvoke bis in den ausgehenden HTTP-Request zu Gemini, der geschlossen
+wird - es wird nicht weiter auf Tokens gewartet, die niemand mehr braucht.
+
+Im Job-Worker (app/worker.py) kann ein Abbruch ankommen, bevor die Generierung läuft:
+cancel(..., pending=True) merkt ihn vor, run() bricht dann sofort ab.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Dict, Set, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class GenerationCancelled(Exception):
+    """Die Generierung wurde über cancel() abgebrochen (nicht durch Shutdown)."""
+
+
+class GenerationTaskRegistry:
+    def __init__(self):
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._pending_cancel: Set[int] = set()
+        self.cancelled = 0
+
+    async def run(self, workout_id: int, coro: Awaitable[T]) -> T:
+        """Führt coro als abbrechbaren Task aus; GenerationCancelled wenn cancel(workout_id) kam."""
+        if workout_id in self._pending_cancel:
+            self._pending_cancel.discard(workout_id)
+            if asyncio.iscoroutine(coro):
+                coro.close()
+            raise GenerationCancelled(f"Generation for workout {workout_id} was cancelled before it started")
+        task = asyncio.ensure_future(coro)
+        self._tasks[workout_id] = task
+        try:
+            return await task
+        except asyncio.CancelledError:
+            current = asyncio.current_task()
+            # Wird der aufrufende Task selbst abgebrochen (Shutdown), Cancellation weiterreichen
+            if current is not None and current.cancelling():
+                raise
+            raise GenerationCancelled(f"Generation for workout {workout_id} was cancelled")
+        finally:
+            if self._tasks.get(workout_id) is task:
+                del self._tasks[workout_id]
+
+    def cancel(self, workout_id: int, pending: bool = False) -> bool:
+        """
+        True wenn auf diesem Prozess eine Generierung für das Workout lief und abgebrochen wurde.
+        Mit pending=True wird ein Abbruch für eine noch nicht gestartete Generierung vorgemerkt.
+        """
+        task = self._tasks.get(workout_id)
+        if task is None or task.done():
+            if pending:
+                self._pending_cancel.add(workout_id)
+                return True
+            return False
+        task.cancel()
+        self.cancelled += 1
+        logger.info(f"Cancelled generation for workout {workout_id}")
+        return True
+
+    def discard_pending(self, workout_id: int) -> None:
+        """Vorgemerkten Abbruch verwerfen (Job ist ohne Generierung fertig geworden)."""
+        self._pending_cancel.discard(workout_id)
+
+    def stats(self) -> Dict[str, int]:
+        return {"in_flight": len(self._tasks), "pending_cancel": len(self._pending_cancel), "cancelled": self.cancelled}
+
+
+generation_tasks = GenerationTaskRegistry()
@@ -1,38 +1,18 @@
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlmodel import select
-from app.models.exercise_description_model import ExerciseDescription
+from app.services.exercise_catalog_service import get_exercise_catalog
 
 
 async def get_all_exercises_for_prompt(db_session: AsyncSession) -> str:
     """
-    Loads all English exercise names from the database for the prompt, using a provided session.
-    If no session is provided, it returns a minimal, hardcoded list.
+    Returns all English exercise names formatted for the prompt from the in-process catalog
+    snapshot; the session is only used when the catalog version has to be checked.
+    If loading fails, it returns a minimal, hardcoded list.
     """
     try:
-        # Lade nur die benötigten Spalten, nicht das komplette Model
-        # Das umgeht das Problem mit der fehlenden 'aliases' Spalte
-        stmt = select(
-            ExerciseDescription.name_english,
-            ExerciseDescription.is_unilateral
-        ).order_by(ExerciseDescription.name_german)
-        
-        result = await db_session.execute(stmt)
-        exercises = result.all()
-        
-        # Namen mit unilateral Tag extrahieren und formatieren
-        formatted_names = []
-        for name_english, is_unilateral in exercises:
-            if name_english:
-                name = name_english
-                # Füge [unilateral] Tag hinzu wenn nötig
-                if is_unilateral:
-                    name = f"{name} [unilateral]"
-                formatted_names.append(f"- {name}")
-        
-        formatted_names.sort()  # Alphabetisch sortieren
-        
-        return "# Available Exercises\n\n" + "\n".join(formatted_names)
-            
+        # ✅ Vorberechnete Liste aus dem In-Memory-Katalog - DB nur bei geänderter Version
+        catalog = await get_exercise_catalog().get(db_session)
+        return catalog.prompt_exercise_list
+
     except Exception as e:
         print(f"❌ Error loading exercises from database: {e}")
         return "# Available Exercises\n\n- Push-up\n- Squat\n- Pull-up\n- Plank"
\ No newline at end of file
@@ -1,37 +1,18 @@
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlmodel import select
-from app.models.exercise_description_model import ExerciseDescription
+from app.services.exercise_catalog_service import get_exercise_catalog
 
 
 async def get_all_exercises_for_prompt(db_session: AsyncSession) -> str:
     """
-    Loads all English exercise names from the database for the prompt, using a provided session.
-    If no session is provided, it returns a minimal, hardcoded list.
+    Returns all English exercise names formatted for the prompt from the in-process catalog
+    snapshot; the session is only used when the catalog version has to be checked.
+    If loading fails, it returns a minimal, hardcoded list.
     """
     try:
-        # Load only the required columns to avoid issues with missing columns
-        stmt = select(
-            ExerciseDescription.name_english,
-            ExerciseDescription.is_unilateral
-        ).order_by(ExerciseDescription.name_german)
-        
-        result = await db_session.execute(stmt)
-        exercises = result.all()
-        
-        # Extract names with unilateral tag and format
-        formatted_names = []
-        for name_english, is_unilateral in exercises:
-            if name_english:
-                name = name_english
-                # Add [unilateral] tag if needed
-                if is_unilateral:
-                    name = f"{name} [unilateral]"
-                formatted_names.append(f"- {name}")
-        
-        formatted_names.sort()  # Sort alphabetically
-        
-        return "# Available Exercises\n\n" + "\n".join(formatted_names)
-            
+        # Precomputed list from the in-memory catalog - DB only when the version changed
+        catalog = await get_exercise_catalog().get(db_session)
+        return catalog.prompt_exercise_list
+
     except Exception as e:
         print(f"❌ Error loading exercises from database: {e}")
         # Return a basic set of exercises as fallback
@@ -4,20 +4,18 @@
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate
 from .schemas import CompactWorkoutSchema
+from typing import AsyncIterator, Optional
+import asyncio
 import os
 
 
-def create_compressed_workout_chain(api_key: str = None):
-    """
-    Creates a chain for compressed workout generation using array-based format.
-    
-    Args:
-        api_key: Google API key for Gemini. If not provided, tries app config then environment variable.
-        
-    Returns:
-        A LangChain chain that generates workouts in compressed format
-    """
-    # Get API key with multiple fallbacks
+# Model and parameters - also part of the response cache key
+MODEL_NAME = "gemini-2.5-flash"
+MODEL_PARAMS = {"thinking_budget": 512}
+
+
+def _resolve_api_key(api_key: Optional[str]) -> str:
+    """API key from parameter, app config or GOOGLE_API_KEY environment variable."""
     if not api_key:
         # Try app config (for API usage)
         try:
@@ -36,11 +34,27 @@ def create_compressed_workout_chain(api_key: str = None):
     if not api_key:
         raise ValueError("Google API key must be provided as parameter, in app config, or set in GOOGLE_API_KEY environment variable")
     
+    return api_key
+
+
+def create_compressed_workout_chain(api_key: str = None):
+    """
+    Creates a chain for compressed workout generation using array-based format.
+    
+    Args:
+        api_key: Google API key for Gemini. If not provided, tries app config then environment variable.
+        
+    Returns:
+        A LangChain chain that generates workouts in compressed format
+    """
+    # Get API key with multiple fallbacks
+    api_key = _resolve_api_key(api_key)
+    
     # Initialize LLM with Gemini 2.5 Flash
     llm = ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash",
+        model=MODEL_NAME,
         google_api_key=api_key,
-        thinking_budget=512
+        **MODEL_PARAMS
     ).with_structured_output(CompactWorkoutSchema)    
 
     # Create prompt template (prompts will be loaded from files)
@@ -66,4 +80,101 @@ def invoke_compressed_workout_chain(chain, full_prompt: str) -> CompactWorkoutSc
     Returns:
         CompactWorkoutSchema: The structured workout in compressed format
     """
-    return chain.invoke({"prompt": full_prompt})
\ No newline at end of file
+    return chain.invoke({"prompt": full_prompt})
+
+
+async def ainvoke_compressed_workout_chain(
+    chain,
+    full_prompt: str,
+    timeout_seconds: Optional[float] = None,
+) -> CompactWorkoutSchema:
+    """
+    Async version of invoke_compressed_workout_chain - does not block the event loop while
+    the model is thinking.
+    
+    Args:
+        chain: The LangChain chain
+        full_prompt: The complete prompt including user context and format instructions
+        timeout_seconds: Deadline for the call; None waits indefinitely
+        
+    Returns:
+        CompactWorkoutSchema: The structured workout in compressed format
+        
+    Raises:
+        TimeoutError: If the deadline is exceeded (the request to the model is cancelled)
+        asyncio.CancelledError: If the calling task is cancelled (propagates to the HTTP request)
+    """
+    try:
+        return await asyncio.wait_for(chain.ainvoke({"prompt": full_prompt}), timeout=timeout_seconds)
+    except asyncio.TimeoutError:
+        raise TimeoutError(f"LLM call exceeded the deadline of {timeout_seconds}s")
+
+
+def create_compressed_workout_stream_chain(api_key: str = None):
+    """
+    Creates a chain for streaming generation: same model, but plain JSON text output
+    instead of a structured-output tool call, so tokens arrive while the model writes.
+    Use with the output_format_json prompt and CompactBlockStreamParser.
+    """
+    llm = ChatGoogleGenerativeAI(
+        model=MODEL_NAME,
+        google_api_key=_resolve_api_key(api_key),
+        response_mime_type="application/json",
+        **MODEL_PARAMS
+    )
+    
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", "Du bist ein erfahrener Personal Trainer, der individuelle Workouts erstellt."),
+        ("human", "{prompt}")
+    ])
+    
+    return prompt | llm
+
+
+async def astream_compressed_workout_chain(
+    chain,
+    full_prompt: str,
+    timeout_seconds: Optional[float] = None,
+) -> AsyncIterator[str]:
+    """
+    Streams the raw text of the model response chunk by chunk.
+    
+    The deadline only covers the time spent waiting for the model: it is applied per
+    chunk and never held open across a yield. Whatever the consumer does between chunks
+    (e.g. persisting a block) neither counts against it nor gets cancelled by it.
+    
+    Args:
+        chain: Chain from create_compressed_workout_stream_chain
+        full_prompt: The complete prompt including user context and format instructions
+        timeout_seconds: Total time budget for receiving the stream; None waits indefinitely
+        
+    Raises:
+        TimeoutError: If the deadline is exceeded (the stream to the model is closed)
+    """
+    loop = asyncio.get_running_loop()
+    remaining = timeout_seconds
+    stream = chain.astream({"prompt": full_prompt})
+    try:
+        while True:
+            started = loop.time()
+            try:
+                chunk = await asyncio.wait_for(anext(stream), timeout=remaining)
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"LLM stream exceeded the deadline of {timeout_seconds}s")
+            if remaining is not None:
+                remaining = max(remaining - (loop.time() - started), 0)
+            
+            content = chunk.content
+            if isinstance(content, list):
+                # Gemini may return content parts instead of a plain string
+                content = "".join(
+                    part.get("text", "") if isinstance(part, dict) else str(part) for part in content
+                )
+            if content:
+                yield content
+    finally:
+        aclose = getattr(stream, "aclose", None)
+        if aclose is not None:
+            await aclose()
@@ -1,4 +1,4 @@
-from typing import List, Dict, Optional, Tuple, Union
+from typing import Awaitable, Callable, List, Dict, Optional, Tuple, Union, TYPE_CHECKING
 from pathlib import Path
 import json
 import time
@@ -16,9 +16,26 @@ from ...shared.formatting.training_plan import format_training_plan_for_llm_v2
 from ...shared.formatting.training_history import format_training_history_for_llm
 from ...shared.formatting.training_history_compressed import format_training_history_compressed
 from ...shared.exercise_library import get_all_exercises_for_prompt
-from .chain import create_compressed_workout_chain, invoke_compressed_workout_chain
+from app.services.llm_response_cache import (
+    cached_llm_call,
+    get_llm_response_cache,
+    make_cache_key,
+    record_cache_hit,
+)
+from .chain import (
+    MODEL_NAME,
+    MODEL_PARAMS,
+    create_compressed_workout_chain,
+    ainvoke_compressed_workout_chain,
+    create_compressed_workout_stream_chain,
+    astream_compressed_workout_chain,
+)
+from .stream_parser import CompactBlockStreamParser
 from .schemas import CompactWorkoutSchema, ArrayExerciseSchema, CompactBlockSchema
 
+if TYPE_CHECKING:
+    from app.db.session import JobContext
+
 
 class CompressedWorkoutInput(BaseModel):
     """Input for compressed workout generation"""
@@ -27,6 +44,8 @@ class CompressedWorkoutInput(BaseModel):
     profile_id: Optional[int] = None
     google_api_key: Optional[str] = None
     session_duration: Optional[int] = None
+    log_id: Optional[int] = None  # LlmCallLog of the operation (cache hits are recorded there)
+    bypass_cache: bool = False  # Skip the response cache lookup (fresh response is still stored)
 
 
 class CompressedWorkoutOutput(BaseModel):
@@ -37,6 +56,7 @@ class CompressedWorkoutOutput(BaseModel):
     exercise_count: int
     prompt_version: str = "compressed"
     token_reduction: str = "~90%"
+    cache_hit: bool = False
 
 
 async def load_prompt_templates() -> Dict[str, str]:
@@ -219,20 +239,22 @@ def format_sets_string(values: List[int], unit: str) -> str:
         return " → ".join([f"{v} {unit}" for v in values])
 
 
-async def generate_compressed_workout(
-    input_data: CompressedWorkoutInput
-) -> Tuple[str, CompressedWorkoutOutput]:
+async def build_compressed_workout_prompt(
+    input_data: CompressedWorkoutInput,
+    job: Optional["JobContext"] = None,
+    output_format_template: str = "output_format_structured",
+) -> str:
     """
-    Generate a workout using the compressed array-based format.
+    Load training history, training plan and exercise library and assemble the full prompt.
     
     Args:
         input_data: Input parameters for workout generation
+        job: Optional job context - reuses the job's connection for the data loading step
+        output_format_template: Prompt file with the output format instructions
         
     Returns:
-        Tuple of (full_prompt, workout_output)
+        The complete prompt for the LLM call
     """
-    start_time = time.time()
-    
     # Load prompt templates
     templates = await load_prompt_templates()
     
@@ -244,8 +266,8 @@ async def generate_compressed_workout(
     from app.models.block_model import Block
     from app.models.set_model import Set, SetStatus
     
-    # Create session only for database operations
-    async with create_session() as db:
+    # Session only for database operations - the transaction ends before the LLM call
+    async with (job.step() if job else create_session()) as db:
         # Get user training history workouts
         workout_query = (
             select(Workout)
@@ -298,7 +320,7 @@ async def generate_compressed_workout(
     
     # Build the full prompt
     base_prompt_template = templates.get("workout_generation_prompt_base", "")
-    output_format = templates.get("output_format_structured", "")
+    output_format = templates.get(output_format_template, "")
     
     # Format the base prompt with all variables
     base_prompt_formatted = base_prompt_template.format(
@@ -310,13 +332,54 @@ async def generate_compressed_workout(
     )
     
     # Combine formatted base prompt with output format
-    full_prompt = f"{base_prompt_formatted}\n\n{output_format}"
+    return f"{base_prompt_formatted}\n\n{output_format}"
+    
+
+
+async def generate_compressed_workout(
+    input_data: CompressedWorkoutInput,
+    job: Optional["JobContext"] = None,
+    timeout_seconds: Optional[float] = None,
+) -> Tuple[str, CompressedWorkoutOutput]:
+    """
+    Generate a workout using the compressed array-based format.
+    
+    The LLM call is awaited with ainvoke, so the event loop keeps serving other requests.
+    Cancelling the calling task aborts the request to the model.
+    
+    Args:
+        input_data: Input parameters for workout generation
+        job: Optional job context - reuses the job's connection for the data loading step
+        timeout_seconds: Deadline for the LLM call (default: LLM_GENERATION_TIMEOUT_SECONDS)
+        
+    Returns:
+        Tuple of (full_prompt, workout_output)
+    """
+    start_time = time.time()
+    
+    full_prompt = await build_compressed_workout_prompt(input_data, job=job)
     
     # Create and invoke the chain
     chain = create_compressed_workout_chain(api_key=input_data.google_api_key)
     
+    if timeout_seconds is None:
+        from app.core.config import get_config
+        timeout_seconds = get_config().LLM_GENERATION_TIMEOUT_SECONDS
+    
     try:
-        workout_schema = invoke_compressed_workout_chain(chain, full_prompt)
+        # Byte-identical prompt of the same user within the TTL -> cached response, no LLM call
+        workout_schema, cache_hit = await cached_llm_call(
+            operation="workout_generation",
+            model=MODEL_NAME,
+            params=MODEL_PARAMS,
+            prompt=full_prompt,
+            user_scope=str(input_data.user_id),
+            schema=CompactWorkoutSchema,
+            call=lambda: ainvoke_compressed_workout_chain(chain, full_prompt, timeout_seconds),
+            bypass=input_data.bypass_cache,
+            log_id=input_data.log_id,
+            job=job,
+        )
         
         # Convert to markdown
         markdown_workout = format_compressed_workout_as_markdown(workout_schema)
@@ -332,7 +395,8 @@ async def generate_compressed_workout(
             workout=workout_schema,
             markdown_workout=markdown_workout,
             generation_time=generation_time,
-            exercise_count=exercise_count
+            exercise_count=exercise_count,
+            cache_hit=cache_hit
         )
         
         return full_prompt, output
@@ -349,6 +413,104 @@ async def generate_compressed_workout(
         return full_prompt, error_output
 
 
+async def generate_compressed_workout_streaming(
+    input_data: CompressedWorkoutInput,
+    on_block: Callable[[int, CompactBlockSchema], Awaitable[None]],
+    job: Optional["JobContext"] = None,
+    timeout_seconds: Optional[float] = None,
+) -> Tuple[str, CompressedWorkoutOutput]:
+    """
+    Streaming variant of generate_compressed_workout.
+    
+    Consumes the model's token stream and calls on_block(position, block) for every block
+    as soon as its JSON object is complete, so blocks can be persisted and pushed to the
+    client while the rest of the workout is still being generated. The complete response
+    is parsed at the end and returned like generate_compressed_workout does.
+    
+    Errors raised by on_block abort the generation and propagate to the caller.
+    
+    Args:
+        input_data: Input parameters for workout generation
+        on_block: Async callback for each completed block (0-based position)
+        job: Optional job context - reuses the job's connection for the data loading step
+        timeout_seconds: Deadline for the whole stream (default: LLM_GENERATION_TIMEOUT_SECONDS)
+        
+    Returns:
+        Tuple of (full_prompt, workout_output)
+    """
+    start_time = time.time()
+    
+    full_prompt = await build_compressed_workout_prompt(
+        input_data, job=job, output_format_template="output_format_json"
+    )
+    
+    chain = create_compressed_workout_stream_chain(api_key=input_data.google_api_key)
+    
+    if timeout_seconds is None:
+        from app.core.config import get_config
+        timeout_seconds = get_config().LLM_GENERATION_TIMEOUT_SECONDS
+    
+    # Cache hit: replay the cached blocks through on_block instead of streaming from the model
+    cache = get_llm_response_cache()
+    cache_scope = str(input_data.user_id)
+    cache_key = make_cache_key("workout_generation_stream", MODEL_NAME, MODEL_PARAMS, full_prompt, cache_scope)
+    if cache is not None and input_data.bypass_cache:
+        cache.bypassed += 1
+    elif cache is not None:
+        cached_workout = await cache.get(cache_key, CompactWorkoutSchema, job=job)
+        if cached_workout is not None:
+            await record_cache_hit(input_data.log_id, cache_key, job=job)
+            for position, block in enumerate(cached_workout.blocks):
+                await on_block(position, block)
+            return full_prompt, CompressedWorkoutOutput(
+                workout=cached_workout,
+                markdown_workout=format_compressed_workout_as_markdown(cached_workout),
+                generation_time=time.time() - start_time,
+                exercise_count=sum(len(block.exercises) for block in cached_workout.blocks),
+                cache_hit=True
+            )
+    
+    parser = CompactBlockStreamParser()
+    position = 0
+    in_callback = False
+    try:
+        async for chunk in astream_compressed_workout_chain(chain, full_prompt, timeout_seconds):
+            for block in parser.feed(chunk):
+                in_callback = True
+                await on_block(position, block)
+                in_callback = False
+                position += 1
+        
+        workout_schema = parser.parse_workout()
+    except Exception as e:
+        if in_callback:
+            raise
+        # Fallback response (same as generate_compressed_workout)
+        generation_time = time.time() - start_time
+        error_output = CompressedWorkoutOutput(
+            workout=None,
+            markdown_workout=f"❌ Fehler bei der Workout-Generierung: {str(e)}",
+            generation_time=generation_time,
+            exercise_count=0
+        )
+        return full_prompt, error_output
+    
+    if cache is not None:
+        await cache.put(
+            cache_key, workout_schema,
+            operation="workout_generation_stream", model=MODEL_NAME, user_scope=cache_scope, job=job
+        )
+    
+    exercise_count = sum(len(block.exercises) for block in workout_schema.blocks)
+    output = CompressedWorkoutOutput(
+        workout=workout_schema,
+        markdown_workout=format_compressed_workout_as_markdown(workout_schema),
+        generation_time=time.time() - start_time,
+        exercise_count=exercise_count
+    )
+    return full_prompt, output
+
+
 async def parse_compressed_workout_to_db_models(
     workout_schema: CompactWorkoutSchema,
     user_id: UUID,
@@ -449,6 +611,84 @@ async def parse_compressed_workout_to_db_models(
     return workout
 
 
+async def build_block_from_compact(
+    block_schema: CompactBlockSchema,
+    block_idx: int,
+    workout_id: int
+) -> Block:
+    """
+    Build one Block (with exercises and sets) for an existing workout from its compressed schema.
+    Used for the full parse and for blocks persisted while the generation is still streaming.
+    """
+    block = Block(
+        workout_id=workout_id,  # Set the correct workout_id from the start
+        name=block_schema.name,
+        description="",
+        position=block_idx,
+        duration_min=block_schema.duration_min  # Add duration from schema
+    )
+    
+    # Process exercises in the block
+    exercise_position = 0
+    for exercise_schema in block_schema.exercises:
+        # Handle unilateral exercises
+        if "[unilateral]" in exercise_schema.name or "(rechts)" in exercise_schema.name or "(links)" in exercise_schema.name:
+            # Exercise already split by LLM
+            exercises_to_add = [(exercise_schema, exercise_schema.name)]
+        elif any(unilateral_marker in exercise_schema.name.lower() for unilateral_marker in ["single", "einarmig", "einbeinig", "unilateral"]):
+            # Need to split into left/right
+            base_name = exercise_schema.name
+            exercises_to_add = [
+                (exercise_schema, f"{base_name} (rechts)"),
+                (exercise_schema, f"{base_name} (links)")
+            ]
+        else:
+            # Regular exercise
+            exercises_to_add = [(exercise_schema, exercise_schema.name)]
+        
+        # Create exercise(s)
+        for ex_schema, ex_name in exercises_to_add:
+            exercise = Exercise(
+                name=ex_name,
+                position=exercise_position,
+                superset_id=ex_schema.superset if ex_schema.superset else None,
+                notes=ex_schema.note if hasattr(ex_schema, 'note') and ex_schema.note else None
+            )
+            
+            # Expand compressed sets
+            sets_data = await expand_compressed_exercise(ex_schema)
+            
+            # Create Set objects
+            for set_idx, set_data in enumerate(sets_data):
+                # Import SetTag enum for tag conversion
+                from app.models.set_model import SetTag
+                
+                # Convert tag string to enum if present
+                tag = None
+                if set_data.get("tag"):
+                    try:
+                        tag = SetTag(set_data["tag"])
+                    except ValueError:
+                        print(f"Warning: Invalid tag value: {set_data['tag']}")
+                        tag = None
+                
+                set_obj = Set(
+                    weight=set_data.get("weight"),
+                    reps=set_data.get("reps"),
+                    duration=set_data.get("duration"),
+                    distance=set_data.get("distance"),
+                    rest_time=set_data.get("rest_time", 60),
+                    position=set_idx,
+                    tag=tag
+                )
+                exercise.sets.append(set_obj)
+            
+            block.exercises.append(exercise)
+            exercise_position += 1
+    
+    return block
+
+
 async def parse_compressed_blocks_for_workout(
     workout_schema: CompactWorkoutSchema,
     workout_id: int
@@ -467,72 +707,7 @@ async def parse_compressed_blocks_for_workout(
     
     # Process each block
     for block_idx, block_schema in enumerate(workout_schema.blocks):
-        block = Block(
-            workout_id=workout_id,  # Set the correct workout_id from the start
-            name=block_schema.name,
-            description="",
-            position=block_idx,
-            duration_min=block_schema.duration_min  # Add duration from schema
-        )
-        
-        # Process exercises in the block
-        exercise_position = 0
-        for exercise_schema in block_schema.exercises:
-            # Handle unilateral exercises
-            if "[unilateral]" in exercise_schema.name or "(rechts)" in exercise_schema.name or "(links)" in exercise_schema.name:
-                # Exercise already split by LLM
-                exercises_to_add = [(exercise_schema, exercise_schema.name)]
-            elif any(unilateral_marker in exercise_schema.name.lower() for unilateral_marker in ["single", "einarmig", "einbeinig", "unilateral"]):
-                # Need to split into left/right
-                base_name = exercise_schema.name
-                exercises_to_add = [
-                    (exercise_schema, f"{base_name} (rechts)"),
-                    (exercise_schema, f"{base_name} (links)")
-                ]
-            else:
-                # Regular exercise
-                exercises_to_add = [(exercise_schema, exercise_schema.name)]
-            
-            # Create exercise(s)
-            for ex_schema, ex_name in exercises_to_add:
-                exercise = Exercise(
-                    name=ex_name,
-                    position=exercise_position,
-                    superset_id=ex_schema.superset if ex_schema.superset else None,
-                    notes=ex_schema.note if hasattr(ex_schema, 'note') and ex_schema.note else None
-                )
-                
-                # Expand compressed sets
-                sets_data = await expand_compressed_exercise(ex_schema)
-                
-                # Create Set objects
-                for set_idx, set_data in enumerate(sets_data):
-                    # Import SetTag enum for tag conversion
-                    from app.models.set_model import SetTag
-                    
-                    # Convert tag string to enum if present
-                    tag = None
-                    if set_data.get("tag"):
-                        try:
-                            tag = SetTag(set_data["tag"])
-                        except ValueError:
-                            print(f"Warning: Invalid tag value: {set_data['tag']}")
-                            tag = None
-                    
-                    set_obj = Set(
-                        weight=set_data.get("weight"),
-                        reps=set_data.get("reps"),
-                        duration=set_data.get("duration"),
-                        distance=set_data.get("distance"),
-                        rest_time=set_data.get("rest_time", 60),
-                        position=set_idx,
-                        tag=tag
-                    )
-                    exercise.sets.append(set_obj)
-                
-                block.exercises.append(exercise)
-                exercise_position += 1
-        
+        block = await build_block_from_compact(block_schema, block_idx, workout_id)
         blocks.append(block)
     
     # Prepare workout field updates
@@ -0,0 +1,119 @@
+# Incremental parser for the streamed compressed workout JSON.
+# Emits each CompactBlockSchema as soon as its closing brace arrives, long before the
+# whole CompactWorkoutSchema is complete.
+
+import json
+import logging
+from typing import List, Optional
+
+from pydantic import ValidationError
+
+from .schemas import CompactBlockSchema, CompactWorkoutSchema
+
+logger = logging.getLogger(__name__)
+
+
+class CompactBlockStreamParser:
+    """
+    Scans the model output character by character (string/escape aware) and tracks the
+    nesting depth. Objects directly inside the top-level "blocks" array are cut out and
+    validated as CompactBlockSchema.
+
+    Usage:
+        parser = CompactBlockStreamParser()
+        for chunk in stream:
+            for block in parser.feed(chunk):
+                ...
+        workout = parser.parse_workout()
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._started = False
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._top_level_key: Optional[str] = None
+        self._blocks_level: Optional[int] = None
+        self._block_start: Optional[int] = None
+        self.blocks_emitted = 0
+
+    @property
+    def text(self) -> str:
+        return self._buffer
+
+    def feed(self, chunk: str) -> List[CompactBlockSchema]:
+        """Appends a chunk and returns the blocks completed by it."""
+        self._buffer += chunk
+        completed: List[CompactBlockSchema] = []
+        buffer = self._buffer
+
+        for i in range(self._pos, len(buffer)):
+            char = buffer[i]
+
+            if not self._started:
+                # Skip anything before the root object (e.g. a ```json fence)
+                if char != "{":
+                    continue
+                self._started = True
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._last_string = buffer[self._string_start + 1:i]
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif char == ":":
+                if len(self._stack) == 1:
+                    self._top_level_key = self._last_string
+            elif char in "{[":
+                if char == "[" and self._stack == ["{"] and self._top_level_key == "blocks":
+                    self._blocks_level = len(self._stack) + 1
+                elif char == "{" and self._blocks_level is not None and len(self._stack) == self._blocks_level:
+                    self._block_start = i
+                self._stack.append(char)
+            elif char in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if (
+                    char == "}"
+                    and self._block_start is not None
+                    and self._blocks_level is not None
+                    and len(self._stack) == self._blocks_level
+                ):
+                    block = self._parse_block(buffer[self._block_start:i + 1])
+                    self._block_start = None
+                    if block is not None:
+                        completed.append(block)
+                elif char == "]" and self._blocks_level is not None and len(self._stack) < self._blocks_level:
+                    self._blocks_level = None
+
+        self._pos = len(buffer)
+        self.blocks_emitted += len(completed)
+        return completed
+
+    def _parse_block(self, raw: str) -> Optional[CompactBlockSchema]:
+        try:
+            return CompactBlockSchema.model_validate(json.loads(raw))
+        except (ValueError, ValidationError) as e:
+            # The final parse of the full response decides; a broken block is not streamed
+            logger.warning(f"Skipping unparsable streamed block: {e}")
+            return None
+
+    def parse_workout(self) -> CompactWorkoutSchema:
+        """Parses the complete response (after the stream has ended)."""
+        start = self._buffer.find("{")
+        end = self._buffer.rfind("}")
+        if start == -1 or end < start:
+            raise ValueError("Streamed response contains no JSON object")
+        return CompactWorkoutSchema.model_validate_json(self._buffer[start:end + 1])
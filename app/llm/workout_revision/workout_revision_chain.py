@@ -6,12 +6,20 @@ from app.llm.utils.llm_documentation import document_llm_session, document_llm_i
 import json
 from app.core.config import get_config
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, TYPE_CHECKING
 from pathlib import Path
+from app.services.llm_response_cache import cached_llm_call
+
+if TYPE_CHECKING:
+    from app.db.session import JobContext
 
 # V2 Single-step workout revision prompt
 PROMPT_FILE_V2 = "workout_revision_prompt_v2.md"
 
+# Model and parameters - also part of the response cache key
+REVISION_MODEL_NAME = "gemini-2.5-flash"
+REVISION_MODEL_PARAMS: Dict[str, Any] = {}  # Using model default temperature for creativity in revisions
+
 # ============================================================
 # Single-step workout revision V2: Clean implementation
 # ============================================================
@@ -29,6 +37,10 @@ async def execute_workout_revision_sequence_v2(
     training_plan_str: Optional[str] = None,
     training_history_str: Optional[str] = None,
     exercise_library_str: str = "",
+    user_id: Optional[str] = None,
+    log_id: Optional[int] = None,
+    bypass_cache: bool = False,
+    job: Optional["JobContext"] = None,
 ) -> CompactWorkoutSchema:
     """
     Executes the streamlined, single-step workout revision sequence.
@@ -42,6 +54,10 @@ async def execute_workout_revision_sequence_v2(
         training_plan_str (Optional[str]): Formatted training plan as a string
         training_history_str (Optional[str]): Summarized training history as a string
         exercise_library_str (str): String representation of the exercise library
+        user_id (Optional[str]): Scope for the LLM response cache; None disables caching
+        log_id (Optional[int]): LlmCallLog of the revision, cache hits are recorded there
+        bypass_cache (bool): Skip the cache lookup (the fresh response is still stored)
+        job (Optional[JobContext]): Job connection for the cache's Postgres tier
         
     Returns:
         CompactWorkoutSchema: The revised workout object
@@ -53,9 +69,9 @@ async def execute_workout_revision_sequence_v2(
     # --- LLM and Prompt Setup ---
     config = get_config()
     base_llm = ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash",
+        model=REVISION_MODEL_NAME,
         google_api_key=config.GOOGLE_API_KEY,
-        # Using model default temperature for creativity in revisions
+        **REVISION_MODEL_PARAMS
     )
     llm_with_structure = base_llm.with_structured_output(CompactWorkoutSchema)
     
@@ -80,7 +96,24 @@ async def execute_workout_revision_sequence_v2(
     }
     
     try:
-        revised_workout = await chain.ainvoke(chain_inputs)
+        if user_id is None:
+            revised_workout = await chain.ainvoke(chain_inputs)
+        else:
+            # Same user, byte-identical prompt within the TTL -> cached revision, no LLM call
+            revised_workout, cache_hit = await cached_llm_call(
+                operation="workout_revision",
+                model=REVISION_MODEL_NAME,
+                params=REVISION_MODEL_PARAMS,
+                prompt=revision_prompt.format(**chain_inputs),
+                user_scope=str(user_id),
+                schema=CompactWorkoutSchema,
+                call=lambda: chain.ainvoke(chain_inputs),
+                bypass=bypass_cache,
+                log_id=log_id,
+                job=job,
+            )
+            if cache_hit:
+                print("♻️ Revised workout served from response cache.")
         print("✅ Revised workout generated.")
     except Exception as e:
         print(f"❌ Error during revision generation: {e}")
@@ -7,6 +7,7 @@ class WorkoutRevisionRequestSchema(BaseModel):
     """Schema for workout revision requests (V2 - Simplified)."""
     workout_id: int = Field(..., description="ID des zu überarbeitenden Workouts")
     user_feedback: str = Field(..., description="Feedback/Kommentar des Users zur gewünschten Änderung")
+    bypass_cache: bool = Field(False, description="LLM-Response-Cache nicht lesen (gleiche Revision bewusst neu erzeugen)")
     # Note: training_plan and training_history are automatically loaded from the database
     # in V2, so they are no longer part of the request schema
 
@@ -1,3 +1,4 @@
+from contextlib import AsyncExitStack
 from typing import Dict, Any, Optional
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -156,10 +157,13 @@ async def revise_workout_background_v2(
     user_id: str,
     user_feedback: str,
     log_id: int,
+    reraise: bool = False,
+    bypass_cache: bool = False,
 ):
     """
     ✅ V2: Background task for workout revision using the EXACT same pattern
     as the successful generate_workout_background function.
+    reraise=True (Job-Worker): Fehler weiterreichen statt loggen, die Queue macht den Retry.
     
     Pattern:
     1. Gathers all necessary data strings in one DB session
@@ -173,7 +177,7 @@ async def revise_workout_background_v2(
     from app.services.llm_logging_service import log_operation_success, log_operation_failed, OperationTimer
     from app.models.training_plan_model import TrainingPlan
     from sqlalchemy import select
-    from app.db.session import create_session
+    from app.db.session import create_session, job_context, pin_user_to_primary
     from app.llm.workout_generation.workout_utils import summarize_training_history
     from app.llm.workout_generation.exercise_filtering_service import get_all_exercises_for_prompt
     from app.llm.workout_generation.create_workout_service import format_training_plan_for_llm
@@ -185,109 +189,125 @@ async def revise_workout_background_v2(
 
     user_id_uuid = UUID(user_id)
 
-    try:
-        # --- STEP 1: Gather all necessary data in one DB session ---
-        formatted_training_plan = None
-        summarized_history_str = None
-        exercise_library_str = ""
-        existing_workout_dict = None
-        training_plan_id_for_saving = None
-
-        async with create_session() as db:
-            logger.info(f"[revise_workout_background_v2] Loading workout {workout_id} for revision...")
-
-            # Load existing workout
-            existing_workout_obj = await get_workout_details(
-                workout_id=workout_id,
-                db=db
-            )
-            existing_workout_dict = workout_to_dict(existing_workout_obj)
-            training_plan_id_for_saving = existing_workout_obj.training_plan_id
+    # Eine Verbindung für den ganzen Job - keine Transaktion während des LLM-Calls.
+    # Im try geöffnet: schlägt schon das Holen der Verbindung fehl, wird der Fehler trotzdem geloggt.
+    job = None
+    async with AsyncExitStack() as job_stack:
+        try:
+            job = await job_stack.enter_async_context(job_context())
+
+            # --- STEP 1: Gather all necessary data in one DB session ---
+            formatted_training_plan = None
+            summarized_history_str = None
+            exercise_library_str = ""
+            existing_workout_dict = None
+            training_plan_id_for_saving = None
+
+            async with job.step() as db:
+                logger.info(f"[revise_workout_background_v2] Loading workout {workout_id} for revision...")
+
+                # Load existing workout
+                existing_workout_obj = await get_workout_details(
+                    workout_id=workout_id,
+                    db=db
+                )
+                existing_workout_dict = workout_to_dict(existing_workout_obj)
+                training_plan_id_for_saving = existing_workout_obj.training_plan_id
             
-            # Load and format TrainingPlan (same as workout generation)
-            training_plan_db_obj = await db.scalar(
-                select(TrainingPlan).where(TrainingPlan.user_id == user_id_uuid)
+                # Load and format TrainingPlan (same as workout generation)
+                training_plan_db_obj = await db.scalar(
+                    select(TrainingPlan).where(TrainingPlan.user_id == user_id_uuid)
+                )
+                if training_plan_db_obj:
+                    formatted_training_plan = format_training_plan_for_llm(training_plan_db_obj)
+                    logger.info("[revise_workout_background_v2] Training plan loaded and formatted.")
+
+                # Load, summarize, and format Training History (same as workout generation)
+                raw_training_history = await get_latest_workouts_with_details(
+                    db=db, user_id=user_id_uuid, number_of_workouts=10
+                )
+                if raw_training_history:
+                    summarized_history_str = summarize_training_history(raw_training_history)
+                    logger.info("[revise_workout_background_v2] Training history loaded and summarized.")
+
+                # Load exercise library (same as workout generation)
+                exercise_library_str = await get_all_exercises_for_prompt(db)
+                logger.info(f"[revise_workout_background_v2] Loaded {len(exercise_library_str.splitlines())} exercises.")
+
+            logger.info("[revise_workout_background_v2] DB data gathering complete. Starting LLM revision...")
+
+            # --- STEP 2: Execute LLM revision chain (no DB connection) ---
+            compact_workout_schema = await execute_workout_revision_sequence_v2(
+                existing_workout=existing_workout_dict,
+                user_feedback=user_feedback,
+                training_plan_str=formatted_training_plan,
+                training_history_str=summarized_history_str,
+                exercise_library_str=exercise_library_str,
+                user_id=user_id,
+                log_id=log_id,
+                bypass_cache=bypass_cache,
+                job=job,
             )
-            if training_plan_db_obj:
-                formatted_training_plan = format_training_plan_for_llm(training_plan_db_obj)
-                logger.info("[revise_workout_background_v2] Training plan loaded and formatted.")
 
-            # Load, summarize, and format Training History (same as workout generation)
-            raw_training_history = await get_latest_workouts_with_details(
-                db=db, user_id=user_id_uuid, number_of_workouts=10
+            logger.info("[revise_workout_background_v2] LLM revision completed. Parsing to frontend-compatible format...")
+
+            # --- STEP 3: Parse the LLM output into a standard Workout model structure ---
+            # This creates a transient object tree with the correct field names (e.g., 'duration').
+            parsed_workout_obj = parse_compact_workout_to_db_models(
+                compact_workout=compact_workout_schema,
+                user_id=user_id_uuid,
+                training_plan_id=training_plan_id_for_saving,
             )
-            if raw_training_history:
-                summarized_history_str = summarize_training_history(raw_training_history)
-                logger.info("[revise_workout_background_v2] Training history loaded and summarized.")
-
-            # Load exercise library (same as workout generation)
-            exercise_library_str = await get_all_exercises_for_prompt(db)
-            logger.info(f"[revise_workout_background_v2] Loaded {len(exercise_library_str.splitlines())} exercises.")
-
-        logger.info("[revise_workout_background_v2] DB data gathering complete. Starting LLM revision...")
-
-        # --- STEP 2: Execute LLM revision chain (no DB connection) ---
-        compact_workout_schema = await execute_workout_revision_sequence_v2(
-            existing_workout=existing_workout_dict,
-            user_feedback=user_feedback,
-            training_plan_str=formatted_training_plan,
-            training_history_str=summarized_history_str,
-            exercise_library_str=exercise_library_str,
-        )
-
-        logger.info("[revise_workout_background_v2] LLM revision completed. Parsing to frontend-compatible format...")
-
-        # --- STEP 3: Parse the LLM output into a standard Workout model structure ---
-        # This creates a transient object tree with the correct field names (e.g., 'duration').
-        parsed_workout_obj = parse_compact_workout_to_db_models(
-            compact_workout=compact_workout_schema,
-            user_id=user_id_uuid,
-            training_plan_id=training_plan_id_for_saving,
-        )
         
-        # Convert the parsed model structure into a dictionary for JSON storage.
-        # This dictionary is what the frontend preview screen will use.
-        revision_dict = format_workout_for_frontend_preview(parsed_workout_obj)
+            # Convert the parsed model structure into a dictionary for JSON storage.
+            # This dictionary is what the frontend preview screen will use.
+            revision_dict = format_workout_for_frontend_preview(parsed_workout_obj)
 
-        logger.info("[revise_workout_background_v2] Parsed workout. Saving to DB...")
+            logger.info("[revise_workout_background_v2] Parsed workout. Saving to DB...")
 
-        # --- STEP 4: Store revision as JSON instead of direct update ---
-        async with create_session() as save_db:
-            # Load the original workout
-            stmt = select(Workout).where(Workout.id == workout_id)
-            result = await save_db.execute(stmt)
-            original_workout = result.scalar_one_or_none()
+            # --- STEP 4: Store revision as JSON instead of direct update ---
+            async with job.step() as save_db:
+                # Load the original workout
+                stmt = select(Workout).where(Workout.id == workout_id)
+                result = await save_db.execute(stmt)
+                original_workout = result.scalar_one_or_none()
 
-            if not original_workout:
-                raise ValueError(f"Original workout with ID {workout_id} not found.")
+                if not original_workout:
+                    raise ValueError(f"Original workout with ID {workout_id} not found.")
 
-            # Store the frontend-compatible dictionary as JSON
-            original_workout.revised_workout_data = revision_dict
+                # Store the frontend-compatible dictionary as JSON
+                original_workout.revised_workout_data = revision_dict
             
-            save_db.add(original_workout)
+                save_db.add(original_workout)
             
-            logger.info(f"[revise_workout_background_v2] Revised workout stored as JSON for workout {workout_id}.")
-
-        # --- STEP 5: Log success (EXACT same as workout generation) ---
-        async with create_session() as log_db:
-            await log_operation_success(
-                db=log_db,
-                log_id=log_id,
-                duration_ms=timer.get_duration_ms()
-            )
+                logger.info(f"[revise_workout_background_v2] Revised workout stored as JSON for workout {workout_id}.")
 
-        logger.info(f"[revise_workout_background_v2] Completed successfully in {timer.get_duration_ms()}ms")
+            # Revision direkt vom Primary lesen (Replica-Lag)
+            await pin_user_to_primary(user_id)
 
-    except Exception as e:
-        logger.error(f"[revise_workout_background_v2] Error: {e}", exc_info=True)
-        # Log failure in a separate session (EXACT same as workout generation)
-        try:
-            async with create_session() as error_db:
-                await log_operation_failed(
-                    db=error_db,
+            # --- STEP 5: Log success (EXACT same as workout generation) ---
+            async with job.step() as log_db:
+                await log_operation_success(
+                    db=log_db,
                     log_id=log_id,
-                    error_message=str(e),
                     duration_ms=timer.get_duration_ms()
                 )
-        except Exception as log_e:
-            logger.error(f"[revise_workout_background_v2] CRITICAL: Failed to log error: {log_e}")
\ No newline at end of file
+
+            logger.info(f"[revise_workout_background_v2] Completed successfully in {timer.get_duration_ms()}ms")
+
+        except Exception as e:
+            if reraise:
+                raise
+            logger.error(f"[revise_workout_background_v2] Error: {e}", exc_info=True)
+            # Log failure on the job connection (EXACT same as workout generation) -
+            # eigene Session, falls die Job-Verbindung gar nicht geöffnet werden konnte
+            try:
+                async with (job.step() if job is not None else create_session()) as error_db:
+                    await log_operation_failed(
+                        db=error_db,
+                        log_id=log_id,
+                        error_message=str(e),
+                        duration_ms=timer.get_duration_ms()
+                    )
+            except Exception as log_e:
+                logger.error(f"[revise_workout_background_v2] CRITICAL: Failed to log error: {log_e}")
\ No newline at end of file
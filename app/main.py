@@ -6,7 +6,16 @@ from app.middleware.activity_logging_middleware import ActivityLoggingMiddleware
 from contextlib import asynccontextmanager
 import os
 from sqlalchemy import text
-from app.db.session import get_engine, close_engine
+from app.db.session import get_engine, close_engine, get_pool_stats, get_replica_stats
+from app.core.config import get_config
+from app.core.jwks import get_jwt_verifier
+from app.core.token_cache import get_token_cache
+from app.core.supabase import init_supabase_clients, close_supabase_clients
+from app.core.activity_logger import activity_logger
+from app.core.event_loop_monitor import get_event_loop_monitor
+from app.llm.utils.generation_tasks import generation_tasks
+from app.services.llm_status_events import get_llm_status_listener
+from app.services.llm_response_cache import get_llm_response_cache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -29,8 +38,41 @@ async def lifespan(app: FastAPI):
         # ✅ Don't crash - Vercel kann trotzdem starten
         logger.info("🔄 Continuing startup - DB connections will be established on demand")
     
+    # ✅ Langlebige Supabase-Clients (anon + service_role) einmalig erstellen
+    try:
+        await init_supabase_clients()
+    except Exception as e:
+        logger.error(f"⚠️ Supabase client init failed: {e} - clients will be created on demand")
+    
+    # ✅ Lokale JWT-Verifikation: JWKS vorladen und periodisch aktualisieren
+    auth_local = get_config().AUTH_VERIFICATION_MODE == "local"
+    if auth_local:
+        get_jwt_verifier().start_background_refresh()
+    
+    # ✅ Gebatchter Activity-Log Writer
+    activity_logger.start_writer()
+    
+    # ✅ Event-Loop-Stalls messen (blockierende Aufrufe im Loop sichtbar machen)
+    get_event_loop_monitor().start()
+    
     yield
     
+    await get_event_loop_monitor().stop()
+    
+    # ✅ LISTEN-Verbindung der SSE-Status-Streams schließen (wird lazy beim ersten Stream geöffnet)
+    await get_llm_status_listener().stop()
+    
+    # ✅ Activity Logs vor dem Engine-Dispose vollständig schreiben
+    await activity_logger.shutdown()
+    
+    if auth_local:
+        await get_jwt_verifier().stop_background_refresh()
+    
+    try:
+        await close_supabase_clients()
+    except Exception as e:
+        logger.error(f"⚠️ Supabase client shutdown error: {e}")
+    
     # ✅ Vercel Serverless: Graceful cleanup
     try:
         await close_engine()
@@ -74,6 +116,36 @@ def health():
         "environment": os.getenv("ENVIRONMENT", "unknown")
     }
 
+@app.get("/health/auth-cache")
+def health_auth_cache():
+    """Hit/Miss-Zähler des prozessweiten Token-Caches"""
+    return {
+        "status": "ok",
+        "mode": get_config().AUTH_VERIFICATION_MODE,
+        "token_cache": get_token_cache().stats(),
+    }
+
+@app.get("/health/activity-log")
+def health_activity_log():
+    """Queue- und Writer-Zähler des Activity Loggers"""
+    return {"status": "ok", "activity_log": activity_logger.stats()}
+
+@app.get("/health/db-pool")
+def health_db_pool():
+    """Checkout-Latenz, in use und overflow des DB-Pools"""
+    return {"status": "ok", "db_pool": get_pool_stats(), "read_replica": get_replica_stats()}
+
+@app.get("/health/event-loop")
+def health_event_loop():
+    """Event-Loop-Stalls und laufende LLM-Generierungen dieses Workers"""
+    return {
+        "status": "ok",
+        "event_loop": get_event_loop_monitor().stats(),
+        "llm_generations": generation_tasks.stats(),
+        "llm_status_listener": get_llm_status_listener().stats(),
+        "llm_response_cache": cache.stats() if (cache := get_llm_response_cache()) else None,
+    }
+
 @app.get("/health/db")
 async def health_db():
     """Vercel Pro DB health check - Unified Supabase Session Mode"""
@@ -88,7 +160,7 @@ async def health_db():
                     "platform": "vercel_pro",
                     "mode": "unified_engine", 
                     "engine": "supabase_session_5432",
-                    "config": "prepared_statements_enabled_better_performance"
+                    "pool_strategy": get_config().DB_POOL_STRATEGY,
                 }
             return {"status": "error", "database": "query_failed"}
     except Exception as e:
@@ -1,47 +1,103 @@
 import time
 import json
-from typing import Callable, Optional
-from fastapi import Request, Response
+from typing import Optional
+from fastapi import Request
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from app.core.activity_logger import activity_logger
+from app.core.config import get_config
 from app.models.user_activity_log_model import ActivityActionType
 from app.core.auth import get_current_user_optional
 import logging
 
 logger = logging.getLogger(__name__)
 
-class ActivityLoggingMiddleware(BaseHTTPMiddleware):
+# Nur für diese Action Types wird der (sanitisierte) Request Body geparst und geloggt
+PAYLOAD_ACTION_TYPES = frozenset({
+    ActivityActionType.LOGIN_FAILED,
+    ActivityActionType.REGISTER_FAILED,
+    ActivityActionType.OTP_VERIFY_FAILED,
+    ActivityActionType.WORKOUT_CREATE,
+    ActivityActionType.WORKOUT_UPDATE,
+    ActivityActionType.TRAINING_PLAN_CREATE,
+    ActivityActionType.TRAINING_PLAN_UPDATE,
+    ActivityActionType.LLM_WORKOUT_GENERATE,
+    ActivityActionType.LLM_TRAINING_PLAN_GENERATE,
+    ActivityActionType.LLM_FEEDBACK_ANALYZE,
+    ActivityActionType.APP_FEEDBACK_CREATE,
+    ActivityActionType.APP_FEEDBACK_UPDATE,
+    ActivityActionType.SHOWCASE_TEMPLATE_CREATE,
+    ActivityActionType.SHOWCASE_TEMPLATE_UPDATE,
+})
+
+class ActivityLoggingMiddleware:
     """
-    Vereinfachte Middleware für User Activity Logging.
+    Reine ASGI-Middleware für User Activity Logging.
+    
+    - Request Body wird nicht vorab gelesen, sondern beim Durchreichen mitgeschnitten (bis max_body_bytes)
+    - JSON wird nur für Action Types aus PAYLOAD_ACTION_TYPES geparst
+    - Status und Antwortzeit kommen aus der http.response.start Message, der Response Body bleibt unberührt
     """
     
-    def __init__(self, app, exclude_paths: Optional[list] = None):
-        super().__init__(app)
+    def __init__(self, app: ASGIApp, exclude_paths: Optional[list] = None, max_body_bytes: Optional[int] = None):
+        self.app = app
         self.exclude_paths = exclude_paths or [
             "/docs", "/openapi.json", "/redoc", "/favicon.ico",
             "/health", "/metrics"
         ]
+        self.max_body_bytes = (
+            max_body_bytes if max_body_bytes is not None
+            else get_config().ACTIVITY_LOG_MAX_BODY_BYTES
+        )
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
         # Skip excluded paths
-        if any(request.url.path.startswith(path) for path in self.exclude_paths):
-            return await call_next(request)
+        path = scope.get("path", "")
+        if any(path.startswith(excluded) for excluded in self.exclude_paths):
+            await self.app(scope, receive, send)
+            return
         
         start_time = time.time()
+        request = Request(scope)
         
-        # Parse request body if JSON
-        request_data = None
-        try:
-            if request.headers.get("content-type", "").startswith("application/json"):
-                body = await request.body()
-                if body:
-                    request_data = json.loads(body.decode())
-                    request._body = body
-        except Exception as e:
-            logger.warning(f"Could not parse request body: {e}")
+        # Tee: Body-Chunks beim Durchreichen mitschneiden (nur JSON, nur bis zum Limit)
+        capture_body = request.headers.get("content-type", "").startswith("application/json")
+        body_chunks: list[bytes] = []
+        body_size = 0
+        body_truncated = False
+        
+        async def receive_wrapper() -> Message:
+            nonlocal body_size, body_truncated
+            message = await receive()
+            if capture_body and message["type"] == "http.request":
+                chunk = message.get("body", b"")
+                if chunk and not body_truncated:
+                    if body_size + len(chunk) <= self.max_body_bytes:
+                        body_chunks.append(chunk)
+                    else:
+                        body_truncated = True
+                        body_chunks.clear()
+                body_size += len(chunk)
+            return message
         
-        # Get user if authenticated
+        # Status und Timing aus http.response.start
+        status_code = 500
+        response_time_ms: Optional[int] = None
+        response_started = False
+        
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_time_ms, response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                status_code = message["status"]
+                response_time_ms = int((time.time() - start_time) * 1000)
+            await send(message)
+        
+        # Get user if authenticated (Ergebnis wird im Request-Scope für get_current_user gemerkt)
         user = None
         try:
             user = await get_current_user_optional(request)
@@ -49,28 +105,41 @@ class ActivityLoggingMiddleware(BaseHTTPMiddleware):
             pass
         
         # Process request
-        response = None
         error_message = None
         
         try:
-            response = await call_next(request)
+            await self.app(scope, receive_wrapper, send_wrapper)
         except Exception as e:
             error_message = str(e)
             logger.error(f"Request failed: {e}")
+            if response_started:
+                raise
             response = JSONResponse(
                 status_code=500,
                 content={"detail": "Internal server error"}
             )
+            await response(scope, receive, send_wrapper)
         
         # Determine action type and extract resource info
-        action_type = self.determine_action_type(request, response)
-        resource_id, resource_type = self.extract_resource_info(request, response)
+        action_type = self.determine_action_type(request, status_code)
+        resource_id, resource_type = self.extract_resource_info(request)
+        
+        # Parse request body only where the sanitized payload is logged
+        request_data = None
+        if action_type in PAYLOAD_ACTION_TYPES and body_size:
+            if body_truncated:
+                request_data = {"truncated": True, "size_bytes": body_size}
+            else:
+                try:
+                    request_data = json.loads(b"".join(body_chunks).decode())
+                except Exception as e:
+                    logger.warning(f"Could not parse request body: {e}")
         
         # Log activity (always enabled for simplicity)
         try:
             await activity_logger.log_activity(
                 request=request,
-                response=response,
+                status_code=status_code,
                 action_type=action_type,
                 user=user,
                 resource_id=resource_id,
@@ -78,14 +147,13 @@ class ActivityLoggingMiddleware(BaseHTTPMiddleware):
                 request_data=request_data,
                 error_message=error_message,
                 start_time=start_time,
+                response_time_ms=response_time_ms,
                 analytics_enabled=True  # Simplifikation: Immer aktiviert
             )
         except Exception as e:
             logger.error(f"Failed to log activity: {e}")
-        
-        return response
     
-    def determine_action_type(self, request: Request, response: Response) -> ActivityActionType:
+    def determine_action_type(self, request: Request, status_code: int) -> ActivityActionType:
         """
         Bestimmt den Action Type basierend auf Endpoint und HTTP Method.
         """
@@ -95,15 +163,15 @@ class ActivityLoggingMiddleware(BaseHTTPMiddleware):
         # Authentication Endpoints
         if "/auth/" in path:
             if "login" in path:
-                return ActivityActionType.LOGIN_SUCCESS if response.status_code < 400 else ActivityActionType.LOGIN_FAILED
+                return ActivityActionType.LOGIN_SUCCESS if status_code < 400 else ActivityActionType.LOGIN_FAILED
             elif "logout" in path:
                 return ActivityActionType.LOGOUT
             elif "register" in path:
-                return ActivityActionType.REGISTER_SUCCESS if response.status_code < 400 else ActivityActionType.REGISTER_FAILED
+                return ActivityActionType.REGISTER_SUCCESS if status_code < 400 else ActivityActionType.REGISTER_FAILED
             elif "request-otp" in path:
                 return ActivityActionType.OTP_REQUEST
             elif "verify-otp" in path:
-                return ActivityActionType.OTP_VERIFY_SUCCESS if response.status_code < 400 else ActivityActionType.OTP_VERIFY_FAILED
+                return ActivityActionType.OTP_VERIFY_SUCCESS if status_code < 400 else ActivityActionType.OTP_VERIFY_FAILED
             elif "set-password" in path:
                 return ActivityActionType.PASSWORD_CHANGE
             elif "change-email" in path:
@@ -170,19 +238,19 @@ class ActivityLoggingMiddleware(BaseHTTPMiddleware):
                 return ActivityActionType.EXERCISE_VIEW
         
         # Error Handling
-        if response.status_code >= 500:
+        if status_code >= 500:
             return ActivityActionType.API_ERROR
-        elif response.status_code == 401:
+        elif status_code == 401:
             return ActivityActionType.UNAUTHORIZED_ACCESS_ATTEMPT
-        elif response.status_code == 429:
+        elif status_code == 429:
             return ActivityActionType.RATE_LIMIT_EXCEEDED
         
         # Default fallback
         return ActivityActionType.API_ERROR
     
-    def extract_resource_info(self, request: Request, response: Response) -> tuple[Optional[str], Optional[str]]:
+    def extract_resource_info(self, request: Request) -> tuple[Optional[str], Optional[str]]:
         """
-        Extrahiert Resource ID und Type aus Request/Response.
+        Extrahiert Resource ID und Type aus dem Request-Pfad.
         """
         path_parts = request.url.path.strip("/").split("/")
         
@@ -199,17 +267,6 @@ class ActivityLoggingMiddleware(BaseHTTPMiddleware):
                         resource_id = path_parts[i + 1]
                     break
         
-        # Versuche Resource ID aus Response Body zu extrahieren (bei POST)
-        if not resource_id and request.method == "POST" and response.status_code in [200, 201]:
-            try:
-                # Response Body lesen (falls verfügbar)
-                if hasattr(response, 'body'):
-                    response_data = json.loads(response.body.decode())
-                    if isinstance(response_data, dict):
-                        resource_id = response_data.get('id') or response_data.get('resource_id')
-            except Exception:
-                pass
-        
         return resource_id, resource_type
 
  
\ No newline at end of file
@@ -7,5 +7,10 @@ from .set_model import Set
 from .app_feedback_model import AppFeedbackModel
 from .showcase_feedback_model import Waitlist
 from .user_activity_log_model import UserActivityLog, ActivityActionType, RiskLevel
+from .activity_log_aggregate_model import ActivityLogAggregate
+from .activity_log_rollup_model import ActivityLogEndpointRollup, ActivityLogUserRollup, ActivityLogRollupWatermark
+from .llm_job_model import LlmJob, LlmJobStatus
+from .llm_response_cache_model import LlmResponseCacheEntry
+from .read_your_writes_pin_model import ReadYourWritesPin
 from .landing_page_survey_model import LandingPageSurvey
 from .exercise_description_model import ExerciseDescription
\ No newline at end of file
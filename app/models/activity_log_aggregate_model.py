@@ -0,0 +1,41 @@
+from typing import Optional
+from datetime import datetime
+from sqlmodel import SQLModel, Field
+from sqlalchemy import BigInteger, UniqueConstraint
+
+
+class ActivityLogAggregate(SQLModel, table=True):
+    """
+    Minütliche Aggregat-Zähler für hochvolumige, wenig aussagekräftige Events
+    (Workout-/Exercise-Views, Status-Polling), die nicht als einzelne Log-Zeile gespeichert werden.
+    Latenz-Histogramm als feste Bucket-Spalten, damit Upserts einfach addieren können.
+    """
+
+    __tablename__ = "activity_log_aggregates"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+    bucket_start: datetime = Field(index=True, description="Minute (UTC), auf die aggregiert wird")
+    endpoint: str = Field(max_length=255, description="Normalisierter Endpoint ({id} statt numerischer IDs)")
+    http_method: str = Field(max_length=10)
+    action_type: str = Field(max_length=100)
+    status_class: str = Field(max_length=3, description="2xx, 3xx, 4xx, 5xx")
+
+    count: int = Field(default=0)
+    total_response_time_ms: int = Field(default=0, sa_type=BigInteger)
+
+    # Latenz-Histogramm (Anzahl Requests je Bucket)
+    latency_le_50_ms: int = Field(default=0)
+    latency_le_100_ms: int = Field(default=0)
+    latency_le_250_ms: int = Field(default=0)
+    latency_le_500_ms: int = Field(default=0)
+    latency_le_1000_ms: int = Field(default=0)
+    latency_le_2500_ms: int = Field(default=0)
+    latency_gt_2500_ms: int = Field(default=0)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "bucket_start", "endpoint", "http_method", "action_type", "status_class",
+            name="uq_activity_log_aggregates_bucket",
+        ),
+    )
@@ -0,0 +1,76 @@
+from typing import Optional
+from datetime import datetime
+from sqlmodel import SQLModel, Field
+from sqlalchemy import BigInteger, UniqueConstraint
+
+
+class ActivityLogEndpointRollup(SQLModel, table=True):
+    """
+    Stündliche/tägliche Rollups pro Endpoint: Requests, Fehler und Latenz-Histogramm
+    (gleiche Buckets wie activity_log_aggregates, daraus werden p50/p95/p99 geschätzt).
+    Quelle: user_activity_logs (ungesampelte Zeilen) + activity_log_aggregates.
+    """
+
+    __tablename__ = "activity_log_endpoint_rollups"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+    granularity: str = Field(max_length=4, description="hour oder day")
+    bucket_start: datetime = Field(index=True, description="Stunde bzw. Tag (UTC)")
+    endpoint: str = Field(max_length=255, description="Normalisierter Endpoint ({id} statt numerischer IDs)")
+    http_method: str = Field(max_length=10)
+
+    request_count: int = Field(default=0)
+    error_count: int = Field(default=0, description="Responses mit Status >= 400")
+    total_response_time_ms: int = Field(default=0, sa_type=BigInteger)
+
+    # Latenz-Histogramm (Anzahl Requests je Bucket)
+    latency_le_50_ms: int = Field(default=0)
+    latency_le_100_ms: int = Field(default=0)
+    latency_le_250_ms: int = Field(default=0)
+    latency_le_500_ms: int = Field(default=0)
+    latency_le_1000_ms: int = Field(default=0)
+    latency_le_2500_ms: int = Field(default=0)
+    latency_gt_2500_ms: int = Field(default=0)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "granularity", "bucket_start", "endpoint", "http_method",
+            name="uq_activity_log_endpoint_rollups_bucket",
+        ),
+    )
+
+
+class ActivityLogUserRollup(SQLModel, table=True):
+    """
+    Stündliche/tägliche Aktionen pro anonymisiertem User-Hash.
+    Gesampelte Zeilen werden mit 1/sample_rate hochgerechnet.
+    """
+
+    __tablename__ = "activity_log_user_rollups"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+    granularity: str = Field(max_length=4, description="hour oder day")
+    bucket_start: datetime = Field(index=True, description="Stunde bzw. Tag (UTC)")
+    user_id_hash: str = Field(max_length=64)
+
+    action_count: int = Field(default=0)
+    error_count: int = Field(default=0)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "granularity", "bucket_start", "user_id_hash",
+            name="uq_activity_log_user_rollups_bucket",
+        ),
+    )
+
+
+class ActivityLogRollupWatermark(SQLModel, table=True):
+    """Bis zu welchem Zeitpunkt (exklusiv) ein Rollup-Job die Rohdaten verarbeitet hat."""
+
+    __tablename__ = "activity_log_rollup_watermarks"
+
+    name: str = Field(primary_key=True, max_length=50)
+    processed_until: datetime
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -1,7 +1,8 @@
 from sqlmodel import SQLModel, Field, Column
 from typing import List, Optional
 from datetime import datetime
-from sqlalchemy import JSON, String, Boolean, Index
+from sqlalchemy import String, Boolean, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from enum import Enum
 
 
@@ -13,8 +14,11 @@ class ExerciseDescription(SQLModel, table=True):
     - Stabile Primary Key (name_german) für Uploads
     - Basic Indexing für Standard-Filterung
     - Vollständige Schema-Kompatibilität
+    - Suche: pg_trgm-GIN-Indexes auf den Namen, gewichteter tsvector (search_vector)
+    - JSONB-Arrays mit GIN-Indexes für Muskelgruppen-/Equipment-Filter (@>)
     
-    📝 GIN-Indexes für JSON-Arrays: Später hinzufügen wenn >1000 Übungen und häufige Equipment-Filter
+    📝 search_vector ist eine generierte Spalte (siehe Migration) und bewusst nicht gemappt,
+    damit der Katalog-Snapshot sie nicht mitlädt - Zugriff über SEARCH_VECTOR im Service.
     """
     __tablename__ = "exercise_descriptions"
     
@@ -46,20 +50,20 @@ class ExerciseDescription(SQLModel, table=True):
         description="True wenn einseitig/asymmetrisch ausgeführt"
     )
     
-    # === JSON ARRAYS (erstmal ohne GIN-Indexes) ===
+    # === JSONB ARRAYS (GIN-Indexes in __table_args__) ===
     equipment_options: List[str] = Field(
         default_factory=list,
-        sa_column=Column(JSON),
+        sa_column=Column(JSONB),
         description="Equipment-Optionen als JSON Array"
     )
     target_muscle_groups: List[str] = Field(
         default_factory=list,
-        sa_column=Column(JSON),
+        sa_column=Column(JSONB),
         description="Zielmuskelgruppen als JSON Array"
     )
     execution_steps: List[str] = Field(
         default_factory=list,
-        sa_column=Column(JSON),
+        sa_column=Column(JSONB),
         description="Ausführungsschritte als JSON Array"
     )
     
@@ -87,6 +91,32 @@ class ExerciseDescription(SQLModel, table=True):
             'name_german',
             'name_english'
         ),
+        # ✅ Fuzzy-/Teilstring-Suche (ILIKE, %, similarity) über pg_trgm
+        Index(
+            'ix_exercise_descriptions_name_german_trgm',
+            'name_german',
+            postgresql_using='gin',
+            postgresql_ops={'name_german': 'gin_trgm_ops'}
+        ),
+        Index(
+            'ix_exercise_descriptions_name_english_trgm',
+            'name_english',
+            postgresql_using='gin',
+            postgresql_ops={'name_english': 'gin_trgm_ops'}
+        ),
+        # ✅ Containment-Filter (@>) auf den JSONB-Arrays
+        Index(
+            'ix_exercise_descriptions_target_muscle_groups',
+            'target_muscle_groups',
+            postgresql_using='gin',
+            postgresql_ops={'target_muscle_groups': 'jsonb_path_ops'}
+        ),
+        Index(
+            'ix_exercise_descriptions_equipment_options',
+            'equipment_options',
+            postgresql_using='gin',
+            postgresql_ops={'equipment_options': 'jsonb_path_ops'}
+        ),
     )
 
     def __repr__(self) -> str:
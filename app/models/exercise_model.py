@@ -1,4 +1,5 @@
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index
 from typing import Optional, TYPE_CHECKING, List
 from uuid import uuid4
 
@@ -22,3 +23,7 @@ class Exercise(SQLModel, table=True):
     block: "Block" = Relationship(back_populates="exercises")
     sets: List["Set"] = Relationship(back_populates="exercise", cascade_delete=True, sa_relationship_kwargs={"order_by": "Set.position"})
     
+
+
+# Übungs-Historie: Übungen eines Blocks per Name finden
+Index("ix_exercises_block_id_name", Exercise.block_id, Exercise.name)
@@ -38,5 +38,9 @@ class LlmCallLog(SQLModel, table=True):
     llm_operation_type: str = Field(description="Art der Operation: workout_creation, workout_revision, workout_status_check")
     workout_id: Optional[int] = Field(default=None, description="Workout ID falls relevant für die Operation")
     
+    # Response-Cache: Antwort kam aus dem Cache statt von Gemini
+    cache_hit: bool = Field(default=False, description="True wenn die LLM-Antwort aus dem Response-Cache kam")
+    cache_key: Optional[str] = Field(default=None, max_length=64, description="Key des Cache-Eintrags bei einem Hit")
+    
     class Config:
         from_attributes = True 
\ No newline at end of file
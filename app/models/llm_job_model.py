@@ -0,0 +1,56 @@
+from typing import Optional, Dict, Any
+from datetime import datetime
+from enum import Enum
+from sqlmodel import SQLModel, Field, Column
+from sqlalchemy import BigInteger, Index, text
+from sqlalchemy.dialects.postgresql import JSONB
+
+
+class LlmJobStatus(str, Enum):
+    QUEUED = "queued"        # wartet auf run_at
+    RUNNING = "running"      # von einem Worker geleast bis locked_until
+    SUCCEEDED = "succeeded"
+    DEAD = "dead"            # Dead Letter: max_attempts erreicht oder unbekannter Job-Typ
+
+
+class LlmJob(SQLModel, table=True):
+    """
+    Persistente Job-Queue für Workout-Generierung und -Revision (app/worker.py).
+
+    Worker leasen Jobs per SELECT ... FOR UPDATE SKIP LOCKED und setzen locked_until
+    (Visibility Timeout). Stirbt ein Worker, läuft das Lease ab und ein anderer Worker
+    übernimmt den Job. Fehlschläge werden mit exponentiellem Backoff wiederholt, nach
+    max_attempts landet der Job als "dead" in der Tabelle (Dead Letter).
+    """
+
+    __tablename__ = "llm_jobs"
+
+    id: Optional[int] = Field(default=None, sa_type=BigInteger, primary_key=True)
+    kind: str = Field(max_length=64, description="workout_generation oder workout_revision")
+    payload: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSONB, nullable=False))
+    # Als String gespeichert (kein Postgres-Enum), damit die Lease-Queries einfach bleiben
+    status: str = Field(default=LlmJobStatus.QUEUED.value, max_length=20)
+
+    attempts: int = Field(default=0)
+    max_attempts: int = Field(default=3)
+    run_at: datetime = Field(default_factory=datetime.utcnow, description="Frühester nächster Versuch")
+    locked_until: Optional[datetime] = Field(default=None, description="Ende des Leases (Visibility Timeout)")
+    locked_by: Optional[str] = Field(default=None, max_length=255)
+    last_error: Optional[str] = Field(default=None)
+    cancel_requested: bool = Field(default=False)
+
+    workout_id: Optional[int] = Field(default=None, index=True)
+    log_id: Optional[int] = Field(default=None, description="LlmCallLog des Jobs")
+
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+
+    __table_args__ = (
+        # Lease-Query: nur offene Jobs, sortiert nach Fälligkeit
+        Index(
+            "ix_llm_jobs_open_run_at",
+            "run_at",
+            postgresql_where=text("status IN ('queued', 'running')"),
+        ),
+    )
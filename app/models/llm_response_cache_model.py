@@ -0,0 +1,27 @@
+from typing import Optional, Dict, Any
+from datetime import datetime
+from sqlmodel import SQLModel, Field, Column
+from sqlalchemy.dialects.postgresql import JSONB
+
+
+class LlmResponseCacheEntry(SQLModel, table=True):
+    """
+    Persistente Stufe des LLM-Response-Caches (app/services/llm_response_cache.py).
+
+    cache_key ist der SHA-256 über Operation, Modell, Modell-Parameter, User-Scope und den
+    fertigen Prompt - identische Prompts desselben Users bekommen innerhalb der TTL dieselbe
+    Antwort, ohne dass Gemini erneut aufgerufen wird.
+    """
+
+    __tablename__ = "llm_response_cache"
+
+    cache_key: str = Field(primary_key=True, max_length=64)
+    operation: str = Field(max_length=64, description="workout_generation, workout_generation_stream, workout_revision")
+    model: str = Field(max_length=100)
+    user_scope: str = Field(max_length=255, description="User-ID, für die der Eintrag gilt")
+    response: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSONB, nullable=False))
+
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: datetime = Field(index=True)
+    hits: int = Field(default=0)
+    last_hit_at: Optional[datetime] = None
@@ -0,0 +1,17 @@
+from datetime import datetime
+from sqlmodel import SQLModel, Field
+
+
+class ReadYourWritesPin(SQLModel, table=True):
+    """
+    Read-your-writes über Prozessgrenzen (app/db/read_replica.py): nach einem Schreibvorgang
+    gehen Reads des Users bis pinned_until auf den Primary - auch wenn sie auf einer anderen
+    Serverless-Instanz, einem anderen uvicorn-Worker landen oder der Job-Worker geschrieben hat.
+
+    Eine Zeile pro User (Upsert), abgelaufene Zeilen sind wirkungslos und werden überschrieben.
+    """
+
+    __tablename__ = "read_your_writes_pins"
+
+    user_id: str = Field(primary_key=True, max_length=255)
+    pinned_until: datetime
@@ -1,4 +1,5 @@
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index, text
 from typing import Optional, TYPE_CHECKING, List, Union
 from enum import Enum
 from datetime import datetime
@@ -110,3 +111,12 @@ class Set(SQLModel, table=True):
             status=SetStatus.open,
             tag=tag
         )
+
+
+# Übungs-Historie: erledigte Sets je Übung, neueste zuerst (Top-N per Index-Range-Scan)
+Index(
+    "ix_sets_done_exercise_id_completed_at",
+    Set.exercise_id,
+    Set.completed_at.desc(),
+    postgresql_where=text("status = 'done' AND completed_at IS NOT NULL"),
+)
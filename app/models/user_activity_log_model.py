@@ -87,14 +87,15 @@ class UserActivityLog(SQLModel, table=True):
     
     __tablename__ = "user_activity_logs"
     
-    id: int = Field(primary_key=True)
+    # Tabelle ist nach timestamp range-partitioniert (monatlich) -> timestamp ist Teil des Primary Keys
+    id: int = Field(primary_key=True, sa_column_kwargs={"autoincrement": True})
     
     # User Information (anonymized for privacy)
     user_id_hash: Optional[str] = Field(max_length=64, index=True, description="Anonymized user ID hash")
     session_id: Optional[str] = Field(max_length=255, index=True, description="Session identifier")
     
     # Timestamp Information
-    timestamp: datetime = Field(default_factory=datetime.utcnow, index=True)
+    timestamp: datetime = Field(default_factory=datetime.utcnow, primary_key=True, index=True)
     
     # Request Information
     endpoint: str = Field(max_length=255, description="API endpoint path")
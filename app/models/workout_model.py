@@ -1,7 +1,7 @@
 from typing import Optional, List, TYPE_CHECKING, Dict, Any
 from datetime import datetime
 from sqlmodel import SQLModel, Field, Relationship, Column
-from sqlalchemy import JSON
+from sqlalchemy import JSON, Index
 from enum import Enum
 from uuid import UUID
 
@@ -15,6 +15,15 @@ class WorkoutStatusEnum(str, Enum):
     STARTED = "started"
     DONE = "done"
 
+def status_from_set_counts(total_sets: int, done_sets: int) -> WorkoutStatusEnum:
+    if not total_sets:
+        return WorkoutStatusEnum.NOT_STARTED
+    if done_sets >= total_sets:
+        return WorkoutStatusEnum.DONE
+    if done_sets > 0:
+        return WorkoutStatusEnum.STARTED
+    return WorkoutStatusEnum.NOT_STARTED
+
 class Workout(SQLModel, table=True):
     __tablename__ = "workouts"
 
@@ -33,6 +42,13 @@ class Workout(SQLModel, table=True):
         description="List of muscle groups loaded during the workout"
     )
     focus_derivation: Optional[str] = Field(default=None)
+
+    # Gepflegte Set-Zähler (refresh_workout_set_counters) - Status ohne Join über alle Sets
+    total_sets: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    done_sets: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    last_completed_at: Optional[datetime] = Field(default=None)
+    # Versionsstempel für ETags - jede Änderung am Workout-Baum erhöht ihn
+    revision: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
     
     # ✅ NEW: Revision data as JSON column (SQLModel best practice)
     revised_workout_data: Optional[Dict[str, Any]] = Field(
@@ -51,24 +67,8 @@ class Workout(SQLModel, table=True):
 
     @property
     def status(self) -> WorkoutStatusEnum:
-        """Berechnet Status direkt am Model - keine separate Funktion nötig!"""
-        sorted_blocks = self.get_sorted_blocks()
-        if not sorted_blocks:
-            return WorkoutStatusEnum.NOT_STARTED
-        
-        from .set_model import SetStatus  # Import hier um Circular Import zu vermeiden
-        all_sets = [s for block in sorted_blocks for ex in block.exercises for s in ex.sets]
-        
-        if not all_sets:
-            return WorkoutStatusEnum.NOT_STARTED
-        
-        done_sets = [s for s in all_sets if s.status == SetStatus.done]
-        
-        if len(done_sets) == len(all_sets):
-            return WorkoutStatusEnum.DONE
-        elif len(done_sets) > 0:
-            return WorkoutStatusEnum.STARTED
-        return WorkoutStatusEnum.NOT_STARTED
+        """Status aus den gepflegten Set-Zählern - keine Relations nötig"""
+        return status_from_set_counts(self.total_sets, self.done_sets)
     
     # ✅ NEW: Helper methods for revision handling
     def has_pending_revision(self) -> bool:
@@ -86,3 +86,12 @@ class Workout(SQLModel, table=True):
     def get_revision_data(self) -> Optional[Dict[str, Any]]:
         """Get revision data"""
         return self.revised_workout_data
+
+
+# Keyset-Pagination der Workout-Liste: WHERE user_id = ? AND (date_created, id) < (?, ?)
+Index(
+    "ix_workouts_user_id_date_created_id",
+    Workout.user_id,
+    Workout.date_created.desc(),
+    Workout.id.desc(),
+)
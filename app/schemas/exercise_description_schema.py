@@ -18,6 +18,11 @@ class ExerciseDescriptionRead(BaseModel):
     updated_at: datetime
 
 
+
+class ExerciseDescriptionSearchResult(ExerciseDescriptionRead):
+    """Suchtreffer mit Relevanz (höher = besser)"""
+    score: float
+
 # ==========================================
 # MULTI-PHASE EXERCISE DESCRIPTION SCHEMAS
 # ==========================================
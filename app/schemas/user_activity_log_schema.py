@@ -5,6 +5,8 @@ from app.models.user_activity_log_model import ActivityActionType, RiskLevel
 
 class UserActivityLogCreate(BaseModel):
     """Schema für die Erstellung eines User Activity Logs"""
+    # Zeitpunkt des Requests, nicht des (gebatchten) DB-Inserts
+    timestamp: datetime = Field(default_factory=datetime.utcnow)
     user_id_hash: Optional[str] = None
     session_id: Optional[str] = None
     endpoint: str
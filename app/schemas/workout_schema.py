@@ -135,6 +135,12 @@ class BlockSaveResponse(BaseModel):
     block: BlockRead
     temp_id_mappings: Dict[str, int] = {}  # Maps temp IDs to real IDs
 
+class SetBatchUpdateResponse(BaseModel):
+    """Response für Batch-Updates von Sets - IDs/UIDs, die nicht (mehr) existieren, werden gemeldet"""
+    sets: List[SetRead] = []
+    not_found_ids: List[int] = []
+    not_found_uids: List[str] = []
+
 # ==========================================
 # WORKOUT SCHEMAS - Optimiert für verschiedene Use Cases
 # ==========================================
@@ -154,6 +160,12 @@ class WorkoutListRead(BaseModel):
     notes: Optional[str] = None
     status: WorkoutStatusEnum  # ✅ Wird direkt von der DB gesetzt
 
+# Keyset-paginierte Workout-Liste
+class WorkoutListPage(BaseModel):
+    """Eine Seite der Workout-Liste - next_cursor ist None auf der letzten Seite"""
+    items: List[WorkoutListRead]
+    next_cursor: Optional[str] = None
+
 # Vollständiges Schema für Workout-Details (mit Relations)
 class WorkoutRead(BaseModel):
     """Vollständiges Schema mit Relations für Detail-Ansichten"""
@@ -0,0 +1,159 @@
+"""
+Wartung der monatlich range-partitionierten Tabelle user_activity_logs.
+
+- Legt Partitionen für die kommenden Monate vorab an
+- Löscht Partitionen, deren Obergrenze älter als privacy_config.log_retention_days ist
+  (DROP TABLE statt DELETE: O(1), kein Vacuum-Aufwand)
+- DEFAULT-Partition: fängt Inserts auf, falls die Wartung einmal ausgefallen ist. Liegen dort
+  Zeilen eines Monats, wird sie für das Anlegen der Monats-Partition kurz abgehängt, die Zeilen
+  umgezogen und wieder angehängt. Abgelaufene Zeilen darin werden per DELETE entfernt.
+"""
+
+import logging
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_config
+from app.core.privacy_config import privacy_config
+
+logger = logging.getLogger("activity_log_partitions")
+
+PARENT_TABLE = "user_activity_logs"
+_UPPER_BOUND = re.compile(r"TO \('([^']+)'\)")
+
+
+def month_start(value: datetime) -> datetime:
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    month_index = value.month - 1 + months
+    return value.replace(year=value.year + month_index // 12, month=month_index % 12 + 1)
+
+
+def partition_name(start: datetime) -> str:
+    return f"{PARENT_TABLE}_p{start:%Y%m}"
+
+
+async def list_partitions(db: AsyncSession) -> List[Tuple[str, Optional[datetime]]]:
+    """Alle Partitionen mit ihrer Obergrenze (None für die DEFAULT-Partition)."""
+    result = await db.execute(text("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = :parent
+    """), {"parent": PARENT_TABLE})
+
+    partitions = []
+    for name, bound in result.all():
+        match = _UPPER_BOUND.search(bound or "")
+        partitions.append((name, datetime.fromisoformat(match.group(1)) if match else None))
+    return partitions
+
+
+async def _default_partition_months(db: AsyncSession, default_name: str) -> Set[datetime]:
+    """Monate, für die Zeilen in der DEFAULT-Partition liegen."""
+    result = await db.execute(text(
+        f"SELECT DISTINCT date_trunc('month', \"timestamp\") FROM \"{default_name}\""
+    ))
+    return {month_start(row[0]) for row in result.all() if row[0] is not None}
+
+
+async def _create_partition_with_default_rows(
+    db: AsyncSession, name: str, start: datetime, end: datetime, default_name: str
+) -> int:
+    """
+    Solange die DEFAULT-Partition Zeilen des Bereichs enthält, schlägt CREATE ... PARTITION OF fehl.
+    Daher: DEFAULT abhängen, Partition anlegen, Zeilen umziehen, DEFAULT wieder anhängen.
+    Läuft in der Transaktion des Aufrufers - parallele Inserts warten auf den Lock des Parents.
+    """
+    await db.execute(text(f'ALTER TABLE {PARENT_TABLE} DETACH PARTITION "{default_name}"'))
+    await db.execute(text(
+        f'CREATE TABLE "{name}" PARTITION OF {PARENT_TABLE} '
+        f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+    ))
+    result = await db.execute(text(
+        f'WITH moved AS ('
+        f'  DELETE FROM "{default_name}" WHERE "timestamp" >= :start AND "timestamp" < :end RETURNING *'
+        f') INSERT INTO {PARENT_TABLE} SELECT * FROM moved'
+    ), {"start": start, "end": end})
+    await db.execute(text(f'ALTER TABLE {PARENT_TABLE} ATTACH PARTITION "{default_name}" DEFAULT'))
+    return result.rowcount
+
+
+async def ensure_future_partitions(db: AsyncSession, months_ahead: int, retention_days: Optional[int] = None) -> List[str]:
+    """
+    Legt fehlende Monats-Partitionen vom aktuellen Monat bis months_ahead an - sowie für jeden
+    (noch nicht abgelaufenen) Monat, dessen Zeilen mangels Partition in der DEFAULT-Partition gelandet sind.
+    """
+    partitions = await list_partitions(db)
+    existing = {name for name, upper_bound in partitions if upper_bound is not None}
+    default_name = next((name for name, upper_bound in partitions if upper_bound is None), None)
+    created = []
+    current = month_start(datetime.utcnow())
+
+    months = {add_months(current, offset) for offset in range(months_ahead + 1)}
+    default_months: Set[datetime] = set()
+    if default_name is not None:
+        default_months = await _default_partition_months(db, default_name)
+        oldest_kept = month_start(datetime.utcnow() - timedelta(days=retention_days)) if retention_days is not None else None
+        months |= {month for month in default_months if oldest_kept is None or month >= oldest_kept}
+
+    for start in sorted(months):
+        name = partition_name(start)
+        if name in existing:
+            continue
+        end = add_months(start, 1)
+        if start in default_months:
+            moved = await _create_partition_with_default_rows(db, name, start, end, default_name)
+            logger.warning(f"Created partition {name} and moved {moved} rows out of {default_name}")
+        else:
+            await db.execute(text(
+                f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF {PARENT_TABLE} '
+                f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+            ))
+            logger.info(f"Created partition {name}")
+        created.append(name)
+
+    return created
+
+
+async def drop_expired_partitions(db: AsyncSession, retention_days: int) -> List[str]:
+    """Löscht Partitionen, die vollständig außerhalb des Retention-Fensters liegen."""
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    dropped = []
+
+    for name, upper_bound in await list_partitions(db):
+        if upper_bound is None:
+            # DEFAULT-Partition kann nicht gedroppt werden - abgelaufene Zeilen einzeln löschen
+            result = await db.execute(
+                text(f'DELETE FROM "{name}" WHERE "timestamp" < :cutoff'), {"cutoff": cutoff}
+            )
+            if result.rowcount:
+                logger.info(f"Deleted {result.rowcount} expired rows from {name}")
+        elif upper_bound <= cutoff:
+            await db.execute(text(f'DROP TABLE IF EXISTS "{name}"'))
+            dropped.append(name)
+            logger.info(f"Dropped expired partition {name} (upper bound {upper_bound:%Y-%m-%d})")
+
+    return dropped
+
+
+async def run_partition_maintenance(
+    db: AsyncSession,
+    months_ahead: Optional[int] = None,
+    retention_days: Optional[int] = None,
+) -> Dict[str, List[str]]:
+    """Erstellt zukünftige Partitionen und entfernt abgelaufene. Commit erfolgt durch den Aufrufer."""
+    months_ahead = months_ahead if months_ahead is not None else get_config().ACTIVITY_LOG_PARTITION_MONTHS_AHEAD
+    retention_days = retention_days if retention_days is not None else privacy_config.log_retention_days
+
+    # Retention zuerst: abgelaufene Zeilen der DEFAULT-Partition brauchen keine eigene Partition mehr
+    dropped = await drop_expired_partitions(db, retention_days)
+    created = await ensure_future_partitions(db, months_ahead, retention_days)
+    return {"created": created, "dropped": dropped}
@@ -0,0 +1,290 @@
+"""
+Inkrementelle Rollups für Activity Analytics.
+
+- Stündliche Rollups werden aus user_activity_logs + activity_log_aggregates berechnet,
+  ab einem Watermark bis zur letzten abgeschlossenen Stunde
+- Die letzten ACTIVITY_ROLLUP_LOOKBACK_HOURS werden jedes Mal neu berechnet (Upsert mit
+  Überschreiben), damit verspätete Logs (Batch-Writer, Spill-Replay) noch einfließen
+- Tägliche Rollups werden aus den stündlichen Rollups der betroffenen Tage neu summiert
+- Reports und Admin-Endpoints lesen ausschließlich die Rollup-Tabellen
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.activity_sampling import LATENCY_BUCKETS_MS, LATENCY_COLUMNS
+from app.core.config import get_config
+
+logger = logging.getLogger("activity_rollups")
+
+WATERMARK_NAME = "activity_hourly"
+GRANULARITIES = ("hour", "day")
+PERCENTILES = (50, 95, 99)
+
+# Pro Lauf maximal so viele Stunden Rohdaten auf einmal verarbeiten (Backfill in Tages-Schritten)
+_CHUNK_HOURS = 24
+
+_NORMALIZED_ENDPOINT = r"regexp_replace(endpoint, '/([0-9]+|[0-9a-fA-F-]{32,36})(?=/|$)', '/{id}', 'g')"
+_UNSAMPLED = "(context_data IS NULL OR context_data->>'sample_rate' IS NULL)"
+_SAMPLE_WEIGHT = "COALESCE(1.0 / NULLIF((context_data->>'sample_rate')::float, 0), 1.0)"
+
+
+def _latency_filters() -> str:
+    """COUNT(*) FILTER (...) je Latenz-Bucket, passend zu LATENCY_COLUMNS."""
+    filters = []
+    lower = None
+    for bucket, column in zip(LATENCY_BUCKETS_MS, LATENCY_COLUMNS):
+        condition = f"response_time_ms <= {bucket}"
+        if lower is not None:
+            condition += f" AND response_time_ms > {lower}"
+        filters.append(f"COUNT(*) FILTER (WHERE {condition}) AS {column}")
+        lower = bucket
+    filters.append(f"COUNT(*) FILTER (WHERE response_time_ms > {lower}) AS {LATENCY_COLUMNS[-1]}")
+    return ",\n               ".join(filters)
+
+
+def _sum_columns(columns: Sequence[str]) -> str:
+    return ", ".join(f"SUM({column})" for column in columns)
+
+
+def _overwrite(columns: Sequence[str]) -> str:
+    return ", ".join(f"{column} = EXCLUDED.{column}" for column in columns)
+
+
+_ENDPOINT_COUNTERS = ["request_count", "error_count", "total_response_time_ms", *LATENCY_COLUMNS]
+_USER_COUNTERS = ["action_count", "error_count"]
+
+_HOURLY_ENDPOINT_SQL = f"""
+    INSERT INTO activity_log_endpoint_rollups
+        (granularity, bucket_start, endpoint, http_method, {", ".join(_ENDPOINT_COUNTERS)})
+    SELECT 'hour', bucket_start, endpoint, http_method, {_sum_columns(_ENDPOINT_COUNTERS)}
+    FROM (
+        SELECT date_trunc('hour', "timestamp") AS bucket_start,
+               {_NORMALIZED_ENDPOINT} AS endpoint,
+               http_method,
+               COUNT(*) AS request_count,
+               COUNT(*) FILTER (WHERE response_status_code >= 400) AS error_count,
+               COALESCE(SUM(response_time_ms), 0) AS total_response_time_ms,
+               {_latency_filters()}
+        FROM user_activity_logs
+        WHERE "timestamp" >= :start AND "timestamp" < :end AND {_UNSAMPLED}
+        GROUP BY 1, 2, 3
+        UNION ALL
+        SELECT date_trunc('hour', bucket_start),
+               endpoint,
+               http_method,
+               SUM(count),
+               COALESCE(SUM(count) FILTER (WHERE status_class IN ('4xx', '5xx')), 0),
+               SUM(total_response_time_ms),
+               {_sum_columns(LATENCY_COLUMNS)}
+        FROM activity_log_aggregates
+        WHERE bucket_start >= :start AND bucket_start < :end
+        GROUP BY 1, 2, 3
+    ) AS combined
+    GROUP BY bucket_start, endpoint, http_method
+    ON CONFLICT ON CONSTRAINT uq_activity_log_endpoint_rollups_bucket
+    DO UPDATE SET {_overwrite(_ENDPOINT_COUNTERS)}
+"""
+
+_HOURLY_USER_SQL = f"""
+    INSERT INTO activity_log_user_rollups
+        (granularity, bucket_start, user_id_hash, action_count, error_count)
+    SELECT 'hour',
+           date_trunc('hour', "timestamp"),
+           user_id_hash,
+           ROUND(SUM({_SAMPLE_WEIGHT}))::int,
+           ROUND(COALESCE(SUM({_SAMPLE_WEIGHT}) FILTER (WHERE response_status_code >= 400), 0))::int
+    FROM user_activity_logs
+    WHERE "timestamp" >= :start AND "timestamp" < :end AND user_id_hash IS NOT NULL
+    GROUP BY 2, 3
+    ON CONFLICT ON CONSTRAINT uq_activity_log_user_rollups_bucket
+    DO UPDATE SET {_overwrite(_USER_COUNTERS)}
+"""
+
+_DAILY_ENDPOINT_SQL = f"""
+    INSERT INTO activity_log_endpoint_rollups
+        (granularity, bucket_start, endpoint, http_method, {", ".join(_ENDPOINT_COUNTERS)})
+    SELECT 'day', date_trunc('day', bucket_start), endpoint, http_method, {_sum_columns(_ENDPOINT_COUNTERS)}
+    FROM activity_log_endpoint_rollups
+    WHERE granularity = 'hour' AND bucket_start >= :start AND bucket_start < :end
+    GROUP BY 2, 3, 4
+    ON CONFLICT ON CONSTRAINT uq_activity_log_endpoint_rollups_bucket
+    DO UPDATE SET {_overwrite(_ENDPOINT_COUNTERS)}
+"""
+
+_DAILY_USER_SQL = f"""
+    INSERT INTO activity_log_user_rollups
+        (granularity, bucket_start, user_id_hash, action_count, error_count)
+    SELECT 'day', date_trunc('day', bucket_start), user_id_hash, {_sum_columns(_USER_COUNTERS)}
+    FROM activity_log_user_rollups
+    WHERE granularity = 'hour' AND bucket_start >= :start AND bucket_start < :end
+    GROUP BY 2, 3
+    ON CONFLICT ON CONSTRAINT uq_activity_log_user_rollups_bucket
+    DO UPDATE SET {_overwrite(_USER_COUNTERS)}
+"""
+
+
+def _hour_floor(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def _day_floor(value: datetime) -> datetime:
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+async def _initial_watermark(db: AsyncSession) -> Optional[datetime]:
+    """Ohne Watermark beim ältesten vorhandenen Rohdatum beginnen."""
+    result = await db.execute(text("""
+        SELECT LEAST(
+            (SELECT min("timestamp") FROM user_activity_logs),
+            (SELECT min(bucket_start) FROM activity_log_aggregates)
+        )
+    """))
+    oldest = result.scalar()
+    return _hour_floor(oldest) if oldest else None
+
+
+async def _get_watermark(db: AsyncSession) -> Optional[datetime]:
+    result = await db.execute(
+        text("SELECT processed_until FROM activity_log_rollup_watermarks WHERE name = :name"),
+        {"name": WATERMARK_NAME},
+    )
+    return result.scalar()
+
+
+async def _set_watermark(db: AsyncSession, processed_until: datetime) -> None:
+    await db.execute(text("""
+        INSERT INTO activity_log_rollup_watermarks (name, processed_until, updated_at)
+        VALUES (:name, :processed_until, :updated_at)
+        ON CONFLICT (name) DO UPDATE
+        SET processed_until = EXCLUDED.processed_until, updated_at = EXCLUDED.updated_at
+    """), {"name": WATERMARK_NAME, "processed_until": processed_until, "updated_at": datetime.utcnow()})
+
+
+async def run_rollups(db: AsyncSession, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Aktualisiert die Rollups bis zur letzten abgeschlossenen Stunde und setzt das Watermark.
+    Parallel laufende Jobs werden per Advisory Lock übersprungen. Commit erfolgt durch den Aufrufer.
+    """
+    locked = await db.execute(text("SELECT pg_try_advisory_xact_lock(hashtext('activity_log_rollups'))"))
+    if not locked.scalar():
+        logger.info("Activity rollup already running elsewhere - skipping")
+        return {"skipped": True}
+
+    end = _hour_floor(now or datetime.utcnow())
+    watermark = await _get_watermark(db)
+    if watermark is None:
+        watermark = await _initial_watermark(db)
+        if watermark is None:
+            return {"skipped": False, "hours": 0, "processed_until": None}
+
+    lookback = timedelta(hours=get_config().ACTIVITY_ROLLUP_LOOKBACK_HOURS)
+    start = min(watermark - lookback, end)
+
+    # Stündliche Rollups in Tages-Chunks
+    chunk_start = start
+    while chunk_start < end:
+        chunk_end = min(chunk_start + timedelta(hours=_CHUNK_HOURS), end)
+        params = {"start": chunk_start, "end": chunk_end}
+        await db.execute(text(_HOURLY_ENDPOINT_SQL), params)
+        await db.execute(text(_HOURLY_USER_SQL), params)
+        chunk_start = chunk_end
+
+    # Tägliche Rollups für alle berührten Tage neu summieren
+    day_params = {"start": _day_floor(start), "end": _day_floor(end) + timedelta(days=1)}
+    await db.execute(text(_DAILY_ENDPOINT_SQL), day_params)
+    await db.execute(text(_DAILY_USER_SQL), day_params)
+
+    await _set_watermark(db, end)
+    hours = int((end - start).total_seconds() // 3600)
+    logger.info(f"Activity rollups updated for {hours}h ({start:%Y-%m-%d %H:%M} - {end:%Y-%m-%d %H:%M})")
+    return {"skipped": False, "hours": hours, "processed_until": end.isoformat()}
+
+
+# --- Lesen (Reports / Admin-Endpoints) ---
+
+def estimate_percentile(bucket_counts: Sequence[int], percentile: float) -> Optional[float]:
+    """
+    Schätzt ein Perzentil aus dem Latenz-Histogramm (lineare Interpolation innerhalb des Buckets).
+    Für den offenen letzten Bucket wird dessen Untergrenze zurückgegeben.
+    """
+    total = sum(bucket_counts)
+    if total == 0:
+        return None
+
+    target = total * percentile / 100
+    cumulative = 0
+    lower = 0
+    for bucket, count in zip(LATENCY_BUCKETS_MS, bucket_counts):
+        if count and cumulative + count >= target:
+            return round(lower + (bucket - lower) * (target - cumulative) / count, 1)
+        cumulative += count
+        lower = bucket
+    return float(LATENCY_BUCKETS_MS[-1])
+
+
+def _check_granularity(granularity: str) -> None:
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {GRANULARITIES}")
+
+
+async def get_endpoint_stats(db: AsyncSession, granularity: str, since: datetime) -> List[Dict[str, Any]]:
+    """Requests, Fehlerquote, Durchschnitt und p50/p95/p99 pro Endpoint seit `since`."""
+    _check_granularity(granularity)
+    result = await db.execute(text(f"""
+        SELECT endpoint, http_method, {_sum_columns(_ENDPOINT_COUNTERS)}
+        FROM activity_log_endpoint_rollups
+        WHERE granularity = :granularity AND bucket_start >= :since
+        GROUP BY endpoint, http_method
+        ORDER BY 3 DESC
+    """), {"granularity": granularity, "since": since})
+
+    stats = []
+    for endpoint, http_method, requests, errors, total_ms, *buckets in result.all():
+        stats.append({
+            "endpoint": endpoint,
+            "http_method": http_method,
+            "requests": requests,
+            "errors": errors,
+            "error_rate": round(errors / requests, 4) if requests else 0.0,
+            "avg_response_time_ms": round(total_ms / requests, 1) if requests else None,
+            **{f"p{p}_ms": estimate_percentile(buckets, p) for p in PERCENTILES},
+        })
+    return stats
+
+
+async def get_activity_timeseries(db: AsyncSession, granularity: str, since: datetime) -> List[Dict[str, Any]]:
+    """Gesamte Requests und Fehler pro Stunde bzw. Tag."""
+    _check_granularity(granularity)
+    result = await db.execute(text("""
+        SELECT bucket_start, SUM(request_count), SUM(error_count)
+        FROM activity_log_endpoint_rollups
+        WHERE granularity = :granularity AND bucket_start >= :since
+        GROUP BY bucket_start
+        ORDER BY bucket_start
+    """), {"granularity": granularity, "since": since})
+    return [
+        {
+            "bucket_start": bucket_start,
+            "requests": requests,
+            "errors": errors,
+            "error_rate": round(errors / requests, 4) if requests else 0.0,
+        }
+        for bucket_start, requests, errors in result.all()
+    ]
+
+
+async def get_user_activity(db: AsyncSession, granularity: str, since: datetime) -> List[Dict[str, Any]]:
+    """Aktionen pro anonymisiertem User-Hash und Bucket (ohne 'anonymous')."""
+    _check_granularity(granularity)
+    result = await db.execute(text("""
+        SELECT bucket_start, user_id_hash, action_count, error_count
+        FROM activity_log_user_rollups
+        WHERE granularity = :granularity AND bucket_start >= :since AND user_id_hash != 'anonymous'
+        ORDER BY bucket_start, action_count DESC
+    """), {"granularity": granularity, "since": since})
+    return [dict(row._mapping) for row in result.all()]
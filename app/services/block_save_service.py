@@ -0,0 +1,275 @@
+"""
+Diff-and-apply für das Speichern eines Blocks (save_block).
+
+compute_block_diff vergleicht den geladenen Block einmal mit dem Frontend-Input (über UIDs,
+Fallback IDs für Legacy-Übungen) und apply_block_diff schreibt das Ergebnis mit einer festen
+Anzahl Statements - unabhängig davon, wie viele Übungen und Sets der Block hat:
+
+- DELETE ... WHERE uid = ANY(...) für Sets und Übungen (Sets gelöschter Übungen per FK-Cascade)
+- executemany UPDATE für bestehende Übungen und Sets
+- ein mehrzeiliges INSERT ... RETURNING für neue Übungen, eins für neue Sets
+
+Die Antwort wird aus dem angewendeten Zustand gebaut, ohne den Block neu zu laden.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+from sqlalchemy import String, any_, delete, insert, literal, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.block_model import Block
+from app.models.exercise_model import Exercise
+from app.models.set_model import Set
+from app.schemas.workout_schema import BlockInput, BlockRead, ExerciseRead, SetInput, SetRead
+
+logger = logging.getLogger(__name__)
+
+_EXERCISE_FIELDS = ("name", "description", "notes", "superset_id", "position")
+_SET_FIELDS = ("weight", "reps", "duration", "distance", "rest_time", "status", "completed_at", "position")
+
+
+@dataclass
+class _ExerciseState:
+    """Endzustand einer Übung nach dem Speichern (für die Antwort)."""
+    values: Dict[str, Any]
+    sets: List[Dict[str, Any]] = field(default_factory=list)
+    new_set_rows: List[Dict[str, Any]] = field(default_factory=list)
+
+
+@dataclass
+class BlockDiff:
+    exercise_inserts: List[_ExerciseState] = field(default_factory=list)
+    exercise_updates: List[Dict[str, Any]] = field(default_factory=list)
+    exercise_delete_uids: List[str] = field(default_factory=list)
+    set_updates: List[Dict[str, Any]] = field(default_factory=list)
+    set_delete_uids: List[str] = field(default_factory=list)
+    # Reihenfolge wie im Input, bestehende und neue Übungen gemischt
+    exercises: List[_ExerciseState] = field(default_factory=list)
+
+    @property
+    def set_insert_count(self) -> int:
+        return sum(len(state.new_set_rows) for state in self.exercises)
+
+
+def _set_values(set_data: SetInput, position: Optional[int]) -> Dict[str, Any]:
+    return {
+        "weight": set_data.weight,
+        "reps": set_data.reps,
+        "duration": set_data.duration,
+        "distance": set_data.distance,
+        "rest_time": set_data.rest_time,
+        "status": set_data.status,
+        "completed_at": set_data.completed_at,
+        "position": position,
+    }
+
+
+def _existing_set_values(existing_set: Set) -> Dict[str, Any]:
+    return {
+        "id": existing_set.id,
+        "uid": existing_set.uid,
+        "exercise_id": existing_set.exercise_id,
+        "tag": existing_set.tag,
+        **{name: getattr(existing_set, name) for name in _SET_FIELDS},
+    }
+
+
+def _claim_uid(uid: Optional[str], used_uids: set) -> str:
+    """UID für eine neue Zeile: die des Clients, außer sie ist leer oder im Block schon vergeben (uid ist unique)."""
+    if not uid or uid in used_uids:
+        uid = str(uuid4())
+    used_uids.add(uid)
+    return uid
+
+
+def _diff_sets(
+    state: _ExerciseState,
+    existing_sets: List[Set],
+    incoming_sets: List[SetInput],
+    diff: BlockDiff,
+    used_set_uids: set,
+) -> None:
+    existing_sets_by_uid = {s.uid: s for s in existing_sets if s.uid}
+    matched_uids = set()
+    next_position = max((s.position for s in existing_sets if s.position is not None), default=-1) + 1
+
+    for set_data in incoming_sets:
+        existing_set = existing_sets_by_uid.get(set_data.uid) if set_data.uid else None
+        if existing_set is not None and set_data.uid not in matched_uids:
+            matched_uids.add(set_data.uid)
+            position = set_data.position if set_data.position is not None else (existing_set.position or 0)
+            values = _set_values(set_data, position)
+            diff.set_updates.append({"id": existing_set.id, **values})
+            state.sets.append({**_existing_set_values(existing_set), **values})
+        else:
+            position = set_data.position if set_data.position is not None else next_position
+            next_position = max(next_position, position) + 1
+            uid = _claim_uid(set_data.uid, used_set_uids)
+            state.new_set_rows.append({"uid": uid, **_set_values(set_data, position)})
+
+    # Sets ohne UID (Legacy) bleiben unverändert erhalten
+    for existing_set in existing_sets:
+        if existing_set.uid and existing_set.uid not in matched_uids:
+            diff.set_delete_uids.append(existing_set.uid)
+        elif not existing_set.uid:
+            state.sets.append(_existing_set_values(existing_set))
+
+
+def compute_block_diff(existing_block: Block, block: BlockInput) -> BlockDiff:
+    """Ein Durchlauf über den Input: Inserts, Updates und Deletes für Übungen und Sets."""
+    diff = BlockDiff()
+
+    existing_exercises_by_uid = {ex.uid: ex for ex in existing_block.exercises if ex.uid}
+    # Fallback for legacy exercises without UIDs
+    existing_exercises_by_id = {str(ex.id): ex for ex in existing_block.exercises}
+    matched_ids = set()
+    next_position = max((ex.position for ex in existing_block.exercises if ex.position is not None), default=-1) + 1
+
+    # 1. Durchlauf: Input-Übungen bestehenden Übungen zuordnen
+    matches = []
+    for ex_data in block.exercises:
+        existing_exercise = None
+        if ex_data.uid and ex_data.uid in existing_exercises_by_uid:
+            existing_exercise = existing_exercises_by_uid[ex_data.uid]
+        elif ex_data.id and str(ex_data.id) in existing_exercises_by_id:
+            existing_exercise = existing_exercises_by_id[str(ex_data.id)]
+        if existing_exercise is not None and existing_exercise.id in matched_ids:
+            existing_exercise = None  # Doppelte UID im Input -> als neue Übung behandeln
+        if existing_exercise is not None:
+            matched_ids.add(existing_exercise.id)
+        matches.append((ex_data, existing_exercise))
+
+    # UIDs, die nach dem Speichern weiter bestehen - neue Zeilen bekommen dann eine frische UID.
+    # Gelöschte Zeilen geben ihre UID frei (Deletes laufen zuerst), z.B. für ein verschobenes Set.
+    used_exercise_uids = {ex.uid for ex in existing_block.exercises if ex.uid and ex.id in matched_ids}
+    used_set_uids = set()
+    for ex_data, existing_exercise in matches:
+        if existing_exercise is not None:
+            incoming_uids = {set_data.uid for set_data in ex_data.sets if set_data.uid}
+            used_set_uids.update(s.uid for s in existing_exercise.sets if s.uid in incoming_uids)
+    for existing_exercise in existing_block.exercises:
+        if existing_exercise.id not in matched_ids and not existing_exercise.uid:
+            # Legacy-Übung bleibt samt Sets erhalten
+            used_set_uids.update(s.uid for s in existing_exercise.sets if s.uid)
+
+    # 2. Durchlauf: Diff aufbauen
+    for ex_data, existing_exercise in matches:
+        if existing_exercise is not None:
+            values = {
+                "uid": existing_exercise.uid or str(uuid4()),  # Legacy-Übungen bekommen eine UID
+                "name": ex_data.name,
+                "description": ex_data.description,
+                "notes": ex_data.notes,
+                "superset_id": ex_data.superset_id,
+                "position": ex_data.position if ex_data.position is not None else (existing_exercise.position or 0),
+            }
+            diff.exercise_updates.append({"id": existing_exercise.id, **values})
+            state = _ExerciseState(values={"id": existing_exercise.id, "block_id": existing_block.id, **values})
+            _diff_sets(state, existing_exercise.sets, ex_data.sets, diff, used_set_uids)
+        else:
+            position = ex_data.position if ex_data.position is not None else next_position
+            next_position = max(next_position, position) + 1
+            state = _ExerciseState(values={
+                "uid": _claim_uid(ex_data.uid, used_exercise_uids),
+                "block_id": existing_block.id,
+                "name": ex_data.name,
+                "description": ex_data.description,
+                "notes": ex_data.notes,
+                "superset_id": ex_data.superset_id,
+                "position": position,
+            })
+            _diff_sets(state, [], ex_data.sets, diff, used_set_uids)
+            diff.exercise_inserts.append(state)
+        diff.exercises.append(state)
+
+    for existing_exercise in existing_block.exercises:
+        if existing_exercise.id in matched_ids:
+            continue
+        if existing_exercise.uid:
+            diff.exercise_delete_uids.append(existing_exercise.uid)
+        else:
+            # Legacy-Übung ohne UID, die nicht im Input ist, bleibt erhalten
+            diff.exercises.append(_ExerciseState(
+                values={
+                    "id": existing_exercise.id,
+                    "uid": existing_exercise.uid,
+                    "block_id": existing_exercise.block_id,
+                    **{name: getattr(existing_exercise, name) for name in _EXERCISE_FIELDS},
+                },
+                sets=[_existing_set_values(s) for s in existing_exercise.sets],
+            ))
+
+    return diff
+
+
+def _uid_array(uids: List[str]):
+    return any_(literal(uids, ARRAY(String)))
+
+
+async def apply_block_diff(db: AsyncSession, diff: BlockDiff) -> None:
+    """Schreibt den Diff mit konstant vielen Statements; füllt IDs neuer Zeilen in den Diff zurück."""
+    # Deletes zuerst: eine UID, die zwischen Übungen verschoben wurde, ist danach wieder frei
+    if diff.set_delete_uids:
+        await db.execute(delete(Set).where(Set.uid == _uid_array(diff.set_delete_uids)))
+    if diff.exercise_delete_uids:
+        await db.execute(delete(Exercise).where(Exercise.uid == _uid_array(diff.exercise_delete_uids)))
+
+    if diff.exercise_updates:
+        await db.execute(update(Exercise), diff.exercise_updates)
+    if diff.set_updates:
+        await db.execute(update(Set), diff.set_updates)
+
+    if diff.exercise_inserts:
+        result = await db.execute(
+            insert(Exercise).returning(Exercise.id, Exercise.uid),
+            [state.values for state in diff.exercise_inserts],
+        )
+        ids_by_uid = {row.uid: row.id for row in result}
+        for state in diff.exercise_inserts:
+            state.values["id"] = ids_by_uid[state.values["uid"]]
+
+    if diff.set_insert_count:
+        set_rows = []
+        for state in diff.exercises:
+            for row in state.new_set_rows:
+                row["exercise_id"] = state.values["id"]
+                set_rows.append(row)
+        result = await db.execute(insert(Set).returning(Set.id, Set.uid), set_rows)
+        ids_by_uid = {row.uid: row.id for row in result}
+        for state in diff.exercises:
+            for row in state.new_set_rows:
+                state.sets.append({**row, "id": ids_by_uid[row["uid"]], "tag": None})
+
+    logger.debug(
+        "Block diff applied: exercises +%d ~%d -%d, sets +%d ~%d -%d",
+        len(diff.exercise_inserts), len(diff.exercise_updates), len(diff.exercise_delete_uids),
+        diff.set_insert_count, len(diff.set_updates), len(diff.set_delete_uids),
+    )
+
+
+def _position_key(values: Dict[str, Any]):
+    # Wie ORDER BY position (NULLS LAST) der Relationships, ID als Tie-Breaker
+    return (values.get("position") is None, values.get("position") or 0, values.get("id") or 0)
+
+
+def build_block_read(existing_block: Block, diff: BlockDiff) -> BlockRead:
+    """BlockRead aus dem angewendeten Zustand - kein Reload-Query nötig."""
+    exercises = []
+    for state in sorted(diff.exercises, key=lambda s: _position_key(s.values)):
+        sets = [SetRead(**values) for values in sorted(state.sets, key=_position_key)]
+        exercises.append(ExerciseRead(**state.values, sets=sets))
+
+    return BlockRead(
+        id=existing_block.id,
+        workout_id=existing_block.workout_id,
+        name=existing_block.name,
+        description=existing_block.description,
+        duration_min=existing_block.duration_min,
+        notes=existing_block.notes,
+        position=existing_block.position,
+        exercises=exercises,
+    )
@@ -0,0 +1,131 @@
+"""
+Prozessweiter Snapshot des Übungskatalogs (exercise_descriptions).
+
+Der Katalog ändert sich nur durch upload_enhanced_exercises.py. Statt ihn bei jedem Request
+bzw. jeder Workout-Generierung neu zu laden und zu serialisieren, hält jeder Prozess einen
+unveränderlichen Snapshot mit vorberechneten Sichten:
+
+- json_bytes: fertig serialisierte Liste für GET /exercise-descriptions/
+- etag: Content-Hash für 304-Antworten
+- prompt_exercise_list: formatierte Übungsliste für die LLM-Prompts
+
+Höchstens alle EXERCISE_CATALOG_CHECK_SECONDS wird ein Versionsstempel
+(max(updated_at), count) gelesen; nur wenn er sich ändert, wird der Katalog neu geladen.
+Dazwischen greifen Katalog-Reads nicht auf die Datenbank zu.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import List, Mapping, Optional, Tuple
+
+from pydantic import TypeAdapter
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_config
+from app.core.etag import make_etag
+from app.models.exercise_description_model import ExerciseDescription
+from app.schemas.exercise_description_schema import ExerciseDescriptionRead
+
+logger = logging.getLogger(__name__)
+
+_exercise_list_adapter = TypeAdapter(List[ExerciseDescriptionRead])
+
+
+def format_exercises_for_prompt(exercises: Tuple[ExerciseDescriptionRead, ...]) -> str:
+    """Übungsliste für die Prompts: englische Namen, [unilateral]-Tag, alphabetisch."""
+    formatted_names = []
+    for exercise in exercises:
+        if exercise.name_english:
+            name = exercise.name_english
+            if exercise.is_unilateral:
+                name = f"{name} [unilateral]"
+            formatted_names.append(f"- {name}")
+    formatted_names.sort()
+    return "# Available Exercises\n\n" + "\n".join(formatted_names)
+
+
+@dataclass(frozen=True)
+class ExerciseCatalogSnapshot:
+    version: Tuple[Optional[str], int]
+    exercises: Tuple[ExerciseDescriptionRead, ...]
+    by_name_german: Mapping[str, ExerciseDescriptionRead]
+    json_bytes: bytes
+    etag: str
+    prompt_exercise_list: str
+
+    @classmethod
+    def build(cls, version: Tuple[Optional[str], int], rows: List[ExerciseDescription]) -> "ExerciseCatalogSnapshot":
+        exercises = tuple(ExerciseDescriptionRead.model_validate(row) for row in rows)
+        json_bytes = _exercise_list_adapter.dump_json(list(exercises))
+        return cls(
+            version=version,
+            exercises=exercises,
+            by_name_german=MappingProxyType({exercise.name_german: exercise for exercise in exercises}),
+            json_bytes=json_bytes,
+            etag=make_etag(hashlib.sha256(json_bytes).hexdigest()),
+            prompt_exercise_list=format_exercises_for_prompt(exercises),
+        )
+
+
+class ExerciseCatalog:
+    """Hält den aktuellen Snapshot und prüft den Versionsstempel in festen Abständen."""
+
+    def __init__(self, check_interval_seconds: float):
+        self.check_interval_seconds = check_interval_seconds
+        self._snapshot: Optional[ExerciseCatalogSnapshot] = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+        self.loads = 0
+        self.version_checks = 0
+
+    async def _read_version(self, db: AsyncSession) -> Tuple[Optional[str], int]:
+        max_updated_at, count = (await db.execute(
+            select(func.max(ExerciseDescription.updated_at), func.count())
+            .select_from(ExerciseDescription)
+        )).one()
+        return (max_updated_at.isoformat() if max_updated_at else None, count)
+
+    async def _load(self, db: AsyncSession, version: Tuple[Optional[str], int]) -> ExerciseCatalogSnapshot:
+        result = await db.execute(select(ExerciseDescription).order_by(ExerciseDescription.name_german))
+        snapshot = ExerciseCatalogSnapshot.build(version, list(result.scalars().all()))
+        self.loads += 1
+        logger.info(f"Exercise catalog loaded: {len(snapshot.exercises)} exercises, version {version}")
+        return snapshot
+
+    async def get(self, db: AsyncSession) -> ExerciseCatalogSnapshot:
+        """Aktueller Snapshot; db wird nur für die periodische Versionsprüfung bzw. das Neuladen genutzt."""
+        if self._snapshot is not None and time.monotonic() - self._checked_at < self.check_interval_seconds:
+            return self._snapshot
+
+        async with self._lock:
+            # Ein Request prüft, die anderen nutzen das Ergebnis
+            if self._snapshot is not None and time.monotonic() - self._checked_at < self.check_interval_seconds:
+                return self._snapshot
+            version = await self._read_version(db)
+            self.version_checks += 1
+            if self._snapshot is None or self._snapshot.version != version:
+                self._snapshot = await self._load(db, version)
+            self._checked_at = time.monotonic()
+            return self._snapshot
+
+    def invalidate(self) -> None:
+        """Erzwingt die Versionsprüfung beim nächsten Zugriff."""
+        self._checked_at = 0.0
+
+
+_exercise_catalog: Optional[ExerciseCatalog] = None
+
+
+def get_exercise_catalog() -> ExerciseCatalog:
+    """
+    Returns a singleton instance of the ExerciseCatalog.
+    """
+    global _exercise_catalog
+    if _exercise_catalog is None:
+        _exercise_catalog = ExerciseCatalog(check_interval_seconds=get_config().EXERCISE_CATALOG_CHECK_SECONDS)
+    return _exercise_catalog
@@ -1,64 +1,64 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, func, or_, literal_column
 from app.models.exercise_description_model import ExerciseDescription
 
+# Generierte Spalte (siehe Migration b5e2f7a9c413), nicht im Model gemappt
+SEARCH_VECTOR = literal_column("exercise_descriptions.search_vector")
 
-async def get_all_exercise_descriptions(
+
+async def search_exercise_descriptions(
     db: AsyncSession,
+    search: str,
     category: Optional[str] = None,
-    search: Optional[str] = None
-) -> List[ExerciseDescription]:
+    equipment: Optional[str] = None,
+    limit: int = 20
+) -> List[Tuple[ExerciseDescription, float]]:
     """
-    Retrieves all exercise descriptions with optional filtering.
+    Ranked fuzzy search over exercise names and German descriptions.
+
+    A row matches if its weighted search_vector matches the query (German stemming or
+    plain words), or a name contains the term or is trigram-similar to it (typos).
+    Score = 2 * ts_rank + best name similarity, so name hits rank above description hits.
     
     Args:
         db: The asynchronous database session.
-        category: Optional category filter (e.g., "Brust", "Rücken").
-        search: Optional search term for exercise names.
+        search: Search term (websearch syntax, e.g. "kniebeuge -langhantel").
+        category: Optional muscle group filter (JSONB containment).
+        equipment: Optional equipment filter (JSONB containment).
+        limit: Maximum number of results.
     
     Returns:
-        List of ExerciseDescription objects.
+        List of (ExerciseDescription, score) tuples, best match first.
     """
-    query = select(ExerciseDescription)
-    
-    # Apply category filter if provided
-    if category:
-        # Filter by muscle groups containing the category
-        query = query.where(
-            ExerciseDescription.target_muscle_groups.contains([category])
-        )
-    
-    # Apply search filter if provided
-    if search:
-        search_term = f"%{search}%"
-        query = query.where(
-            (ExerciseDescription.name_german.ilike(search_term)) |
-            (ExerciseDescription.name_english.ilike(search_term))
+    term = search.strip()
+    tsquery = func.websearch_to_tsquery(literal_column("'german'::regconfig"), term).op("||")(
+        func.websearch_to_tsquery(literal_column("'simple'::regconfig"), term)
+    )
+    name_similarity = func.greatest(
+        func.similarity(ExerciseDescription.name_german, term),
+        func.similarity(ExerciseDescription.name_english, term),
+    )
+    score = (func.ts_rank(SEARCH_VECTOR, tsquery) * 2 + name_similarity).label("score")
+
+    query = (
+        select(ExerciseDescription, score)
+        .where(
+            or_(
+                SEARCH_VECTOR.op("@@")(tsquery),
+                ExerciseDescription.name_german.ilike(f"%{term}%"),
+                ExerciseDescription.name_english.ilike(f"%{term}%"),
+                ExerciseDescription.name_german.op("%")(term),
+                ExerciseDescription.name_english.op("%")(term),
+            )
         )
-    
-    # Order by name for consistent results
-    query = query.order_by(ExerciseDescription.name_german)
-    
-    result = await db.execute(query)
-    return result.scalars().all()
+    )
+    if category:
+        query = query.where(ExerciseDescription.target_muscle_groups.contains([category]))
+    if equipment:
+        query = query.where(ExerciseDescription.equipment_options.contains([equipment]))
 
+    query = query.order_by(score.desc(), ExerciseDescription.name_german).limit(limit)
 
-async def get_exercise_description_by_name(
-    db: AsyncSession,
-    name: str
-) -> Optional[ExerciseDescription]:
-    """
-    Retrieves a single exercise description by German name.
-    
-    Args:
-        db: The asynchronous database session.
-        name: The German name of the exercise (primary key).
-    
-    Returns:
-        ExerciseDescription object or None if not found.
-    """
-    result = await db.execute(
-        select(ExerciseDescription).where(ExerciseDescription.name_german == name)
-    )
-    return result.scalar_one_or_none()
\ No newline at end of file
+    result = await db.execute(query)
+    return [(exercise, float(row_score or 0.0)) for exercise, row_score in result.all()]
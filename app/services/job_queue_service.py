@@ -0,0 +1,258 @@
+"""
+Persistente Job-Queue auf Postgres (Tabelle llm_jobs) für Workout-Generierung und -Revision.
+
+- enqueue_job: Job in der Transaktion des Requests anlegen (zusammen mit Placeholder und Log)
+- lease_jobs: fällige Jobs per FOR UPDATE SKIP LOCKED übernehmen, Lease bis locked_until
+- heartbeat_jobs: Lease laufender Jobs verlängern, Abbruch-Wünsche abholen
+- complete_job / fail_job: Abschluss bzw. Retry mit exponentiellem Backoff oder Dead Letter
+- reap_expired_jobs: Jobs, deren letztes Lease abgelaufen ist (Worker gestorben), als dead markieren
+
+Alle Zeitstempel kommen aus der DB (UTC), damit die Uhren der Worker keine Rolle spielen.
+"""
+
+import logging
+import random
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_config
+from app.models.llm_call_log_model import LlmCallLog, LlmOperationStatus
+from app.models.llm_job_model import LlmJob, LlmJobStatus
+from app.services.llm_status_events import notify_llm_status
+
+logger = logging.getLogger(__name__)
+
+JOB_KIND_WORKOUT_GENERATION = "workout_generation"
+JOB_KIND_WORKOUT_REVISION = "workout_revision"
+
+_OPEN_STATUSES = (LlmJobStatus.QUEUED.value, LlmJobStatus.RUNNING.value)
+
+
+def _utc_now():
+    return func.timezone("utc", func.now())
+
+
+async def enqueue_job(
+    db: AsyncSession,
+    kind: str,
+    payload: Dict[str, Any],
+    workout_id: Optional[int] = None,
+    log_id: Optional[int] = None,
+) -> LlmJob:
+    """Legt einen Job an - ohne Commit, damit er mit Placeholder und Log atomar entsteht."""
+    job = LlmJob(
+        kind=kind,
+        payload=payload,
+        workout_id=workout_id,
+        log_id=log_id,
+        max_attempts=get_config().JOB_MAX_ATTEMPTS,
+    )
+    db.add(job)
+    await db.flush()
+    logger.info(f"[job_queue] Enqueued {kind} job {job.id} (workout {workout_id})")
+    return job
+
+
+async def lease_jobs(db: AsyncSession, worker_id: str, limit: int, visibility_timeout_seconds: int) -> List[Any]:
+    """
+    Übernimmt bis zu `limit` fällige Jobs für diesen Worker.
+
+    Fällig sind wartende Jobs mit run_at <= now und laufende Jobs, deren Lease abgelaufen ist
+    (Worker gestorben) und die noch Versuche übrig haben. SKIP LOCKED: parallele Worker
+    bekommen disjunkte Jobs, ohne aufeinander zu warten.
+    """
+    if limit <= 0:
+        return []
+
+    now = _utc_now()
+    due = (
+        select(LlmJob.id)
+        .where(
+            or_(
+                and_(LlmJob.status == LlmJobStatus.QUEUED.value, LlmJob.run_at <= now),
+                and_(
+                    LlmJob.status == LlmJobStatus.RUNNING.value,
+                    LlmJob.locked_until < now,
+                    LlmJob.attempts < LlmJob.max_attempts,
+                ),
+            )
+        )
+        .order_by(LlmJob.run_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .cte("due")
+    )
+    result = await db.execute(
+        update(LlmJob)
+        .where(LlmJob.id.in_(select(due.c.id)))
+        .values(
+            status=LlmJobStatus.RUNNING.value,
+            attempts=LlmJob.attempts + 1,
+            locked_by=worker_id,
+            locked_until=now + timedelta(seconds=visibility_timeout_seconds),
+            updated_at=now,
+        )
+        .returning(
+            LlmJob.id,
+            LlmJob.kind,
+            LlmJob.payload,
+            LlmJob.attempts,
+            LlmJob.max_attempts,
+            LlmJob.workout_id,
+            LlmJob.log_id,
+            LlmJob.cancel_requested,
+        )
+    )
+    return list(result.all())
+
+
+async def heartbeat_jobs(
+    db: AsyncSession, worker_id: str, job_ids: Sequence[int], visibility_timeout_seconds: int
+) -> Dict[int, bool]:
+    """Verlängert das Lease der eigenen Jobs; liefert {job_id: cancel_requested}."""
+    if not job_ids:
+        return {}
+    now = _utc_now()
+    result = await db.execute(
+        update(LlmJob)
+        .where(
+            LlmJob.id.in_(list(job_ids)),
+            LlmJob.locked_by == worker_id,
+            LlmJob.status == LlmJobStatus.RUNNING.value,
+        )
+        .values(locked_until=now + timedelta(seconds=visibility_timeout_seconds), updated_at=now)
+        .returning(LlmJob.id, LlmJob.cancel_requested)
+    )
+    return {row.id: row.cancel_requested for row in result}
+
+
+async def complete_job(db: AsyncSession, job_id: int, worker_id: str) -> None:
+    now = _utc_now()
+    await db.execute(
+        update(LlmJob)
+        .where(LlmJob.id == job_id, LlmJob.locked_by == worker_id)
+        .values(
+            status=LlmJobStatus.SUCCEEDED.value,
+            locked_until=None,
+            finished_at=now,
+            updated_at=now,
+        )
+    )
+
+
+def retry_delay_seconds(attempts: int) -> float:
+    """Exponentieller Backoff mit Jitter: base * 2^(attempts-1), gedeckelt."""
+    config = get_config()
+    delay = min(config.JOB_RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0)), config.JOB_RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+async def _fail_logs(db: AsyncSession, log_ids: Sequence[Optional[int]], error_message: str) -> None:
+    log_ids = [log_id for log_id in log_ids if log_id is not None]
+    if log_ids:
+        result = await db.execute(
+            update(LlmCallLog)
+            .where(LlmCallLog.id.in_(log_ids), LlmCallLog.status == LlmOperationStatus.STARTED)
+            .values(status=LlmOperationStatus.FAILED, error_message=error_message)
+            .returning(LlmCallLog.id, LlmCallLog.workout_id)
+        )
+        for row in result.all():
+            await notify_llm_status(db, row.id, row.workout_id, LlmOperationStatus.FAILED, error_message)
+
+
+async def fail_job(
+    db: AsyncSession,
+    job_id: int,
+    worker_id: str,
+    attempts: int,
+    max_attempts: int,
+    log_id: Optional[int],
+    error_message: str,
+    dead: bool = False,
+) -> str:
+    """
+    Versuch fehlgeschlagen: mit Backoff erneut einplanen oder - nach dem letzten Versuch
+    bzw. bei dead=True - als Dead Letter ablegen und den LlmCallLog auf FAILED setzen.
+    Gibt den neuen Status zurück.
+    """
+    now = _utc_now()
+    error_message = error_message[:2000]
+
+    if dead or attempts >= max_attempts:
+        await db.execute(
+            update(LlmJob)
+            .where(LlmJob.id == job_id, LlmJob.locked_by == worker_id)
+            .values(
+                status=LlmJobStatus.DEAD.value,
+                last_error=error_message,
+                locked_until=None,
+                finished_at=now,
+                updated_at=now,
+            )
+        )
+        await _fail_logs(db, [log_id], error_message)
+        logger.error(f"[job_queue] Job {job_id} dead after {attempts} attempt(s): {error_message}")
+        return LlmJobStatus.DEAD.value
+
+    delay = retry_delay_seconds(attempts)
+    await db.execute(
+        update(LlmJob)
+        .where(LlmJob.id == job_id, LlmJob.locked_by == worker_id)
+        .values(
+            status=LlmJobStatus.QUEUED.value,
+            last_error=error_message,
+            locked_until=None,
+            locked_by=None,
+            run_at=now + timedelta(seconds=delay),
+            updated_at=now,
+        )
+    )
+    logger.warning(f"[job_queue] Job {job_id} attempt {attempts}/{max_attempts} failed, retry in {delay:.0f}s: {error_message}")
+    return LlmJobStatus.QUEUED.value
+
+
+async def reap_expired_jobs(db: AsyncSession) -> int:
+    """
+    Laufende Jobs, deren Lease abgelaufen ist und die keine Versuche mehr haben, werden dead.
+    Ohne das blieben LlmCallLogs von Jobs, deren Worker beim letzten Versuch starb, ewig STARTED.
+    """
+    now = _utc_now()
+    result = await db.execute(
+        update(LlmJob)
+        .where(
+            LlmJob.status == LlmJobStatus.RUNNING.value,
+            LlmJob.locked_until < now,
+            LlmJob.attempts >= LlmJob.max_attempts,
+        )
+        .values(
+            status=LlmJobStatus.DEAD.value,
+            last_error="Lease abgelaufen (Worker abgebrochen)",
+            locked_until=None,
+            finished_at=now,
+            updated_at=now,
+        )
+        .returning(LlmJob.id, LlmJob.log_id)
+    )
+    rows = result.all()
+    if rows:
+        await _fail_logs(db, [row.log_id for row in rows], "Abgebrochen: Worker wurde beendet")
+        logger.error(f"[job_queue] Reaped {len(rows)} job(s) with expired lease: {[row.id for row in rows]}")
+    return len(rows)
+
+
+async def request_job_cancel(db: AsyncSession, workout_id: int) -> int:
+    """Markiert offene Generierungs-Jobs des Workouts zum Abbruch (der Worker holt das per Heartbeat ab)."""
+    result = await db.execute(
+        update(LlmJob)
+        .where(
+            LlmJob.workout_id == workout_id,
+            LlmJob.kind == JOB_KIND_WORKOUT_GENERATION,
+            LlmJob.status.in_(_OPEN_STATUSES),
+        )
+        .values(cancel_requested=True, updated_at=_utc_now())
+        .returning(LlmJob.id)
+    )
+    return len(result.all())
@@ -5,6 +5,7 @@ import logging
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.llm_call_log_model import LlmCallLog, LlmOperationStatus
+from app.services.llm_status_events import notify_llm_status
 
 logger = logging.getLogger("llm_logging_service")
 
@@ -53,6 +54,7 @@ async def log_operation_success(
     log_entry.status = LlmOperationStatus.SUCCESS
     log_entry.duration_ms = duration_ms
     log_entry.error_message = None  # Clear any previous error
+    await notify_llm_status(db, log_id, log_entry.workout_id, log_entry.status)
     
     await db.commit()
     logger.info(f"[LLM_LOG] Success operation {log_id} completed in {duration_ms}ms")
@@ -73,6 +75,7 @@ async def log_operation_failed(
     log_entry.status = LlmOperationStatus.FAILED
     log_entry.duration_ms = duration_ms
     log_entry.error_message = error_message
+    await notify_llm_status(db, log_id, log_entry.workout_id, log_entry.status, error_message)
     
     await db.commit()
     logger.error(f"[LLM_LOG] Failed operation {log_id}: {error_message}")
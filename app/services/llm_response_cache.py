@@ -0,0 +1,260 @@
+"""
+Content-addressed Cache für LLM-Antworten (Workout-Generierung und -Revision).
+
+Key = SHA-256 über Operation, Modell, Modell-Parameter, User-Scope und den fertig
+zusammengesetzten Prompt. Ein byte-identischer Prompt desselben Users (Client-Retry,
+Doppel-Tap, gleiche Revision nochmal) bekommt innerhalb der TTL die gespeicherte Antwort.
+
+- Stufe 1: prozessweiter LRU (LLM_RESPONSE_CACHE_MAX_ENTRIES)
+- Stufe 2: Postgres (llm_response_cache), damit Retries auf anderen Workern/Job-Workern treffen
+- bypass=True liest nicht aus dem Cache, schreibt die frische Antwort aber hinein
+- Treffer werden im LlmCallLog der Operation vermerkt (cache_hit, cache_key)
+
+Fehler im Cache brechen nie die Generierung ab - im Zweifel wird das LLM aufgerufen.
+"""
+
+import hashlib
+import json
+import logging
+import random
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Optional, Tuple, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import delete, update
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import get_config
+from app.models.llm_call_log_model import LlmCallLog
+from app.models.llm_response_cache_model import LlmResponseCacheEntry
+
+if TYPE_CHECKING:
+    from app.db.session import JobContext
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T", bound=BaseModel)
+
+# Bei jedem N-ten Schreiben werden abgelaufene Einträge aus Postgres gelöscht
+_PURGE_PROBABILITY = 0.02
+
+
+def make_cache_key(operation: str, model: str, params: Dict[str, Any], prompt: str, user_scope: str) -> str:
+    material = json.dumps(
+        {"operation": operation, "model": model, "params": params, "scope": user_scope, "prompt": prompt},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+def _session_scope(job: Optional["JobContext"]):
+    if job is not None:
+        return job.step()
+    from app.db.session import create_session
+    return create_session()
+
+
+class LlmResponseCache:
+    """LRU im Prozess + Postgres-Stufe, Einträge laufen nach ttl_seconds ab."""
+
+    def __init__(self, max_entries: int, ttl_seconds: int, persistent: bool):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.persistent = persistent
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = Lock()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.errors = 0
+
+    # --- In-Process-LRU ---
+
+    def _memory_get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, response = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return response
+
+    def _memory_put(self, key: str, response: Dict[str, Any], expires_at: float) -> None:
+        with self._lock:
+            self._entries[key] = (expires_at, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    # --- Lesen / Schreiben ---
+
+    async def get(self, key: str, schema: Type[T], job: Optional["JobContext"] = None) -> Optional[T]:
+        response = self._memory_get(key)
+        if response is not None:
+            result = self._validate(key, response, schema)
+            if result is not None:
+                self.memory_hits += 1
+                return result
+
+        if self.persistent:
+            try:
+                async with _session_scope(job) as db:
+                    row = (await db.execute(
+                        update(LlmResponseCacheEntry)
+                        .where(
+                            LlmResponseCacheEntry.cache_key == key,
+                            LlmResponseCacheEntry.expires_at > datetime.utcnow(),
+                        )
+                        .values(hits=LlmResponseCacheEntry.hits + 1, last_hit_at=datetime.utcnow())
+                        .returning(LlmResponseCacheEntry.response, LlmResponseCacheEntry.expires_at)
+                    )).first()
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"LLM response cache lookup failed: {e}")
+                row = None
+            if row is not None:
+                result = self._validate(key, row.response, schema)
+                if result is not None:
+                    remaining = (row.expires_at - datetime.utcnow()).total_seconds()
+                    self._memory_put(key, row.response, time.time() + max(remaining, 0))
+                    self.db_hits += 1
+                    return result
+
+        self.misses += 1
+        return None
+
+    def _validate(self, key: str, response: Dict[str, Any], schema: Type[T]) -> Optional[T]:
+        try:
+            return schema.model_validate(response)
+        except ValidationError as e:
+            # Schema hat sich seit dem Schreiben geändert - wie ein Miss behandeln
+            logger.warning(f"Discarding incompatible LLM cache entry {key[:12]}: {e}")
+            with self._lock:
+                self._entries.pop(key, None)
+            return None
+
+    async def put(
+        self,
+        key: str,
+        value: BaseModel,
+        operation: str,
+        model: str,
+        user_scope: str,
+        job: Optional["JobContext"] = None,
+    ) -> None:
+        response = value.model_dump(mode="json")
+        self._memory_put(key, response, time.time() + self.ttl_seconds)
+        if not self.persistent:
+            return
+
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.ttl_seconds)
+        try:
+            async with _session_scope(job) as db:
+                stmt = insert(LlmResponseCacheEntry).values(
+                    cache_key=key,
+                    operation=operation,
+                    model=model,
+                    user_scope=user_scope,
+                    response=response,
+                    created_at=now,
+                    expires_at=expires_at,
+                    hits=0,
+                )
+                await db.execute(stmt.on_conflict_do_update(
+                    index_elements=[LlmResponseCacheEntry.cache_key],
+                    set_={"response": stmt.excluded.response, "created_at": now, "expires_at": expires_at},
+                ))
+                if random.random() < _PURGE_PROBABILITY:
+                    await db.execute(delete(LlmResponseCacheEntry).where(LlmResponseCacheEntry.expires_at < now))
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"LLM response cache write failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.db_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "errors": self.errors,
+            "hit_rate": round((self.memory_hits + self.db_hits) / lookups, 4) if lookups else None,
+        }
+
+
+async def record_cache_hit(log_id: Optional[int], key: str, job: Optional["JobContext"] = None) -> None:
+    """Vermerkt einen Treffer im LlmCallLog der laufenden Operation."""
+    if log_id is None:
+        return
+    try:
+        async with _session_scope(job) as db:
+            await db.execute(
+                update(LlmCallLog).where(LlmCallLog.id == log_id).values(cache_hit=True, cache_key=key)
+            )
+    except Exception as e:
+        logger.warning(f"Could not record LLM cache hit on log {log_id}: {e}")
+
+
+async def cached_llm_call(
+    *,
+    operation: str,
+    model: str,
+    params: Dict[str, Any],
+    prompt: str,
+    user_scope: str,
+    schema: Type[T],
+    call: Callable[[], Awaitable[T]],
+    bypass: bool = False,
+    log_id: Optional[int] = None,
+    job: Optional["JobContext"] = None,
+) -> Tuple[T, bool]:
+    """
+    Antwort aus dem Cache oder über call() - gibt (Antwort, cache_hit) zurück.
+    Nur erfolgreiche, validierte Antworten werden gespeichert.
+    """
+    cache = get_llm_response_cache()
+    if cache is None:
+        return await call(), False
+
+    key = make_cache_key(operation, model, params, prompt, user_scope)
+    if bypass:
+        cache.bypassed += 1
+    else:
+        cached = await cache.get(key, schema, job=job)
+        if cached is not None:
+            logger.info(f"[llm_cache] Hit for {operation} (user {user_scope}, key {key[:12]})")
+            await record_cache_hit(log_id, key, job=job)
+            return cached, True
+
+    result = await call()
+    await cache.put(key, result, operation=operation, model=model, user_scope=user_scope, job=job)
+    return result, False
+
+
+_cache: Optional[LlmResponseCache] = None
+
+
+def get_llm_response_cache() -> Optional[LlmResponseCache]:
+    """None wenn der Cache per LLM_RESPONSE_CACHE_ENABLED abgeschaltet ist."""
+    global _cache
+    config = get_config()
+    if not config.LLM_RESPONSE_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        _cache = LlmResponseCache(
+            max_entries=config.LLM_RESPONSE_CACHE_MAX_ENTRIES,
+            ttl_seconds=config.LLM_RESPONSE_CACHE_TTL_SECONDS,
+            persistent=config.LLM_RESPONSE_CACHE_PERSISTENT,
+        )
+    return _cache
@@ -0,0 +1,209 @@
+"""
+Status-Übergänge von LLM-Operationen (LlmCallLog) per Postgres LISTEN/NOTIFY.
+
+- notify_llm_status: in der Transaktion des Status-Updates pg_notify aufrufen - Postgres
+  stellt die Nachricht erst beim Commit zu, Clients sehen nie einen nicht committeten Status
+- notify_llm_block: Streaming-Generierung hat einen weiteren Block gespeichert
+- notify_llm_blocks_reset: gestreamte Blöcke wurden verworfen, Clients müssen sie entfernen
+- LlmStatusListener: eine LISTEN-Verbindung pro Prozess, verteilt Nachrichten an die
+  verbundenen SSE-Streams (Queues pro workout_id bzw. log_id)
+
+Die LISTEN-Verbindung ist eine eigene asyncpg-Verbindung außerhalb des Pools: LISTEN
+funktioniert nicht über einen Transaction-Mode-Pooler (DB_POOL_STRATEGY=pgbouncer), daher
+ggf. LLM_STATUS_LISTEN_DB_URL auf Session Mode / direkte Verbindung setzen.
+"""
+
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Set, Tuple
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_config
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "llm_status"
+
+# NOTIFY-Payloads sind auf 8000 Bytes begrenzt
+_MAX_ERROR_CHARS = 500
+_RECONNECT_SECONDS = 5.0
+_QUEUE_SIZE = 32
+
+_SubscriptionKey = Tuple[str, int]
+
+
+def _status_value(status: Any) -> Optional[str]:
+    return getattr(status, "value", status)
+
+
+async def _pg_notify(db: AsyncSession, event: Dict[str, Any]) -> None:
+    try:
+        # Savepoint: ein fehlgeschlagenes NOTIFY darf die Transaktion des Status-Updates nicht abbrechen
+        async with db.begin_nested():
+            await db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANNEL, "payload": json.dumps(event)})
+    except Exception as e:
+        # Streams prüfen zusätzlich periodisch die DB - ein verlorenes NOTIFY kostet nur Latenz
+        logger.warning(f"pg_notify for log {event.get('log_id')} failed: {e}")
+
+
+async def notify_llm_status(
+    db: AsyncSession,
+    log_id: int,
+    workout_id: Optional[int],
+    status: Any,
+    error_message: Optional[str] = None,
+) -> None:
+    """Veröffentlicht einen Status-Übergang; wird mit der laufenden Transaktion committet."""
+    await _pg_notify(db, {
+        "log_id": log_id,
+        "workout_id": workout_id,
+        "status": _status_value(status),
+        "error_message": (error_message or "")[:_MAX_ERROR_CHARS] or None,
+    })
+
+
+async def notify_llm_block(
+    db: AsyncSession,
+    log_id: int,
+    workout_id: int,
+    block_id: int,
+    position: int,
+) -> None:
+    """Streaming-Generierung: ein fertiger Block wurde gespeichert (Payload nur IDs, Daten liest der Stream)."""
+    await _pg_notify(db, {
+        "event": "block",
+        "log_id": log_id,
+        "workout_id": workout_id,
+        "block_id": block_id,
+        "position": position,
+    })
+
+
+async def notify_llm_blocks_reset(db: AsyncSession, log_id: int, workout_id: int) -> None:
+    """Streaming-Generierung: bereits gemeldete Blöcke wurden gelöscht (Retry bzw. Fehler)."""
+    await _pg_notify(db, {
+        "event": "reset",
+        "log_id": log_id,
+        "workout_id": workout_id,
+    })
+
+
+def _listen_dsn() -> str:
+    config = get_config()
+    url = make_url(config.LLM_STATUS_LISTEN_DB_URL or config.SUPABASE_DB_URL)
+    return url.set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+class LlmStatusListener:
+    """Eine LISTEN-Verbindung pro Prozess, Fan-out an alle Subscriber."""
+
+    def __init__(self):
+        self._subscribers: Dict[_SubscriptionKey, Set[asyncio.Queue]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._connected = asyncio.Event()
+        self.notifications = 0
+        self.dropped = 0
+        self.reconnects = 0
+
+    def start(self) -> None:
+        """Startet die LISTEN-Verbindung (idempotent, lazy beim ersten Subscriber)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(_listen_dsn(), server_settings={"application_name": "s3ssions_llm_status"})
+                terminated = asyncio.Event()
+                connection.add_termination_listener(lambda _conn: terminated.set())
+                await connection.add_listener(CHANNEL, self._on_notification)
+                self._connected.set()
+                logger.info(f"✅ Listening for LLM status notifications on '{CHANNEL}'")
+                await terminated.wait()
+                logger.warning("LLM status LISTEN connection closed - reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"LLM status LISTEN connection failed: {e}")
+            finally:
+                self._connected.clear()
+                if connection is not None and not connection.is_closed():
+                    try:
+                        await connection.close()
+                    except Exception:
+                        pass
+            self.reconnects += 1
+            await asyncio.sleep(_RECONNECT_SECONDS)
+
+    def _on_notification(self, _connection, _pid, _channel, payload: str) -> None:
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.warning(f"Invalid LLM status payload: {payload[:200]}")
+            return
+        self.notifications += 1
+
+        keys = []
+        if event.get("workout_id") is not None:
+            keys.append(("workout", event["workout_id"]))
+        if event.get("log_id") is not None:
+            keys.append(("log", event["log_id"]))
+
+        for key in keys:
+            for queue in self._subscribers.get(key, ()):
+                try:
+                    queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    # Langsamer Client: der Stream liest den Status beim nächsten Check aus der DB
+                    self.dropped += 1
+
+    @asynccontextmanager
+    async def subscribe(self, workout_id: Optional[int] = None, log_id: Optional[int] = None) -> AsyncIterator[asyncio.Queue]:
+        """Queue mit den Status-Events für ein Workout oder einen Log-Eintrag."""
+        self.start()
+        key: _SubscriptionKey = ("workout", workout_id) if workout_id is not None else ("log", log_id)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=_QUEUE_SIZE)
+        self._subscribers.setdefault(key, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(key)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connected": self._connected.is_set(),
+            "subscriptions": sum(len(queues) for queues in self._subscribers.values()),
+            "notifications": self.notifications,
+            "dropped": self.dropped,
+            "reconnects": self.reconnects,
+        }
+
+
+_listener: Optional[LlmStatusListener] = None
+
+
+def get_llm_status_listener() -> LlmStatusListener:
+    global _listener
+    if _listener is None:
+        _listener = LlmStatusListener()
+    return _listener
@@ -1,18 +1,166 @@
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, desc
+from sqlalchemy import select, and_, or_, desc, func, update, tuple_, values, column, cast
 from sqlalchemy.orm import selectinload, contains_eager, aliased
-from typing import List, Dict
+from typing import Any, List, Dict, Iterable, Optional, Tuple
 from collections import defaultdict
+from datetime import datetime
+import base64
+import json
 
-from app.models.workout_model import Workout
+from app.models.workout_model import Workout, WorkoutStatusEnum
 from app.models.block_model import Block
 from app.models.exercise_model import Exercise
 from app.models.set_model import Set, SetStatus
-from app.schemas.workout_schema import ExerciseHistoryItem
+from app.schemas.workout_schema import ExerciseHistoryItem, SetRead, SetBatchUpdateResponse
 from uuid import UUID
 
 
+async def refresh_workout_set_counters(db: AsyncSession, workout_ids: Iterable[int]) -> None:
+    """Recomputes total_sets, done_sets and last_completed_at and bumps revision for the given workouts.
+
+    Must be called by every code path that changes a workout's blocks, exercises or sets,
+    before the commit. Pending ORM changes are flushed first so the counts see them.
+    The revision bump invalidates the ETags of the workout and block detail endpoints.
+
+    Args:
+        db: The asynchronous database session.
+        workout_ids: IDs of the workouts whose sets changed.
+    """
+    ids = {workout_id for workout_id in workout_ids if workout_id is not None}
+    if not ids:
+        return
+
+    await db.flush()
+
+    # Zeilen-Locks zuerst in eigenem Statement: unter READ COMMITTED liest ein Statement, das auf
+    # den Lock gewartet hat, mit seinem alten Snapshot - die Zählung würde parallele Set-Änderungen
+    # verpassen. Das folgende UPDATE bekommt einen frischen Snapshot nach dem Lock.
+    # Feste Reihenfolge (ORDER BY id) verhindert Deadlocks zwischen Requests mit mehreren Workouts.
+    await db.execute(
+        select(Workout.id).where(Workout.id.in_(ids)).order_by(Workout.id).with_for_update()
+    )
+
+    def workout_sets(*columns):
+        return (
+            select(*columns)
+            .select_from(Set)
+            .join(Exercise, Set.exercise_id == Exercise.id)
+            .join(Block, Exercise.block_id == Block.id)
+            .where(Block.workout_id == Workout.id)
+        )
+
+    await db.execute(
+        update(Workout)
+        .where(Workout.id.in_(ids))
+        .values(
+            total_sets=workout_sets(func.count(Set.id)).scalar_subquery(),
+            done_sets=workout_sets(func.count(Set.id)).where(Set.status == SetStatus.done).scalar_subquery(),
+            last_completed_at=workout_sets(func.max(Set.completed_at)).where(Set.status == SetStatus.done).scalar_subquery(),
+            revision=Workout.revision + 1,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+# Felder, die ein Set-Status-Update ändern darf
+SET_UPDATE_FIELDS = ("status", "weight", "reps", "duration", "distance", "completed_at")
+
+
+async def apply_set_updates(
+    db: AsyncSession,
+    workout_id: int,
+    user_id: UUID,
+    updates: List[Dict[str, Any]],
+) -> SetBatchUpdateResponse:
+    """Applies many set status updates of one workout in a single UPDATE ... FROM (VALUES ...).
+
+    Each update dict identifies its set by "id" or "uid" and contains only the fields the
+    client sent; missing fields keep their current value. If a set appears more than once,
+    the last update wins. Sets that do not belong to the workout of the user are reported as not found.
+    Does not commit.
+
+    Args:
+        db: The asynchronous database session.
+        workout_id: The workout all sets must belong to.
+        user_id: The UUID of the user (ownership check).
+        updates: Partial set updates keyed by "id" or "uid".
+
+    Returns:
+        The updated sets plus the IDs/UIDs that were not found.
+    """
+    ids = {u["id"] for u in updates if u.get("id") is not None}
+    uids = {u["uid"] for u in updates if u.get("id") is None and u.get("uid")}
+
+    # ✅ Eine Ownership-Query für den ganzen Batch
+    key_conditions = []
+    if ids:
+        key_conditions.append(Set.id.in_(ids))
+    if uids:
+        key_conditions.append(Set.uid.in_(uids))
+    if not key_conditions:
+        return SetBatchUpdateResponse()
+
+    result = await db.execute(
+        select(*Set.__table__.c)
+        .join(Exercise, Set.exercise_id == Exercise.id)
+        .join(Block, Exercise.block_id == Block.id)
+        .join(Workout, Block.workout_id == Workout.id)
+        .where(
+            Block.workout_id == workout_id,
+            Workout.user_id == user_id,
+            or_(*key_conditions),
+        )
+    )
+    current_by_id = {row.id: dict(row._mapping) for row in result}
+    id_by_uid = {row["uid"]: set_id for set_id, row in current_by_id.items() if row["uid"]}
+
+    merged: Dict[int, Dict[str, Any]] = {}
+    not_found_ids, not_found_uids = [], []
+    for update_data in updates:
+        set_id = update_data.get("id")
+        if set_id is None:
+            set_id = id_by_uid.get(update_data.get("uid"))
+            if set_id is None:
+                not_found_uids.append(update_data.get("uid"))
+                continue
+        elif set_id not in current_by_id:
+            not_found_ids.append(set_id)
+            continue
+        row = merged.setdefault(set_id, {name: current_by_id[set_id][name] for name in SET_UPDATE_FIELDS})
+        row.update({name: value for name, value in update_data.items() if name in SET_UPDATE_FIELDS})
+
+    if not merged:
+        return SetBatchUpdateResponse(not_found_ids=not_found_ids, not_found_uids=not_found_uids)
+
+    # ✅ Ein Statement für alle Sets: UPDATE sets SET ... FROM (VALUES ...) AS v WHERE sets.id = v.id
+    sets_table = Set.__table__
+    new_values = values(
+        column("id", sets_table.c.id.type),
+        *[column(name, sets_table.c[name].type) for name in SET_UPDATE_FIELDS],
+        name="v",
+    ).data([
+        (set_id, *[row[name] for name in SET_UPDATE_FIELDS])
+        for set_id, row in merged.items()
+    ])
+
+    result = await db.execute(
+        update(sets_table)
+        .where(sets_table.c.id == new_values.c.id)
+        .values({name: cast(new_values.c[name], sets_table.c[name].type) for name in SET_UPDATE_FIELDS})
+        .returning(*sets_table.c)
+    )
+    updated_sets = [SetRead.model_validate(dict(row._mapping)) for row in result]
+
+    await refresh_workout_set_counters(db, [workout_id])
+
+    return SetBatchUpdateResponse(
+        sets=sorted(updated_sets, key=lambda s: s.id),
+        not_found_ids=not_found_ids,
+        not_found_uids=not_found_uids,
+    )
+
+
 async def get_workout_details(
     *, 
     workout_id: int, 
@@ -76,6 +224,91 @@ async def get_latest_workouts_with_details(
     return workouts
 
 
+def encode_workout_cursor(date_created: datetime, workout_id: int) -> str:
+    """Opaque cursor for the keyset-paginated workout list: position of the last returned row."""
+    payload = json.dumps({"d": date_created.isoformat(), "i": workout_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_workout_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of encode_workout_cursor.
+
+    Raises:
+        HTTPException(status_code=400): If the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["d"]), int(payload["i"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def _workout_status_condition(workout_status: WorkoutStatusEnum):
+    """SQL equivalent of status_from_set_counts on the stored set counters."""
+    if workout_status == WorkoutStatusEnum.DONE:
+        return and_(Workout.total_sets > 0, Workout.done_sets >= Workout.total_sets)
+    if workout_status == WorkoutStatusEnum.STARTED:
+        return and_(Workout.done_sets > 0, Workout.done_sets < Workout.total_sets)
+    return or_(Workout.total_sets == 0, Workout.done_sets == 0)
+
+
+async def get_user_workouts_page(
+    *,
+    db: AsyncSession,
+    user_id: UUID,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    workout_status: Optional[WorkoutStatusEnum] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+) -> Tuple[List[Workout], Optional[str]]:
+    """Retrieves one page of a user's workouts, newest first, using keyset pagination.
+
+    Rows are ordered by (date_created DESC, id DESC) and the page continues strictly after
+    the cursor position, so the cost per page is independent of how deep the client has
+    scrolled (served by ix_workouts_user_id_date_created_id).
+
+    Args:
+        db: The asynchronous database session.
+        user_id: The UUID of the user.
+        limit: Maximum number of workouts on the page.
+        cursor: next_cursor of the previous page, or None for the first page.
+        workout_status: Optional status filter, evaluated on total_sets/done_sets.
+        date_from: Optional lower bound (inclusive) for date_created.
+        date_to: Optional upper bound (exclusive) for date_created.
+
+    Returns:
+        The workouts on the page and the cursor for the next page (None on the last page).
+    """
+    query = select(Workout).where(Workout.user_id == user_id)
+
+    if cursor:
+        cursor_date, cursor_id = decode_workout_cursor(cursor)
+        query = query.where(tuple_(Workout.date_created, Workout.id) < tuple_(cursor_date, cursor_id))
+    if workout_status is not None:
+        query = query.where(_workout_status_condition(workout_status))
+    if date_from is not None:
+        query = query.where(Workout.date_created >= date_from)
+    if date_to is not None:
+        query = query.where(Workout.date_created < date_to)
+
+    # Eine Zeile mehr laden, um zu wissen, ob es eine nächste Seite gibt
+    query = query.order_by(Workout.date_created.desc(), Workout.id.desc()).limit(limit + 1)
+    workouts = list((await db.execute(query)).scalars().all())
+
+    next_cursor = None
+    if len(workouts) > limit:
+        workouts = workouts[:limit]
+        last = workouts[-1]
+        next_cursor = encode_workout_cursor(last.date_created, last.id)
+
+    return workouts, next_cursor
+
+
 async def get_exercises_with_done_sets_only(
     db: AsyncSession,
     current_user_id: UUID,
@@ -109,6 +342,82 @@ async def get_exercises_with_done_sets_only(
     return exercises
 
 
+async def _fetch_exercise_history(
+    db: AsyncSession,
+    exercise_names: Iterable[str],
+    user_id: UUID,
+    limit_per_exercise: int,
+    exclude_workout_id: Optional[int] = None,
+) -> Dict[str, List[ExerciseHistoryItem]]:
+    """Returns the latest done sets per exercise name, limited in SQL.
+
+    ROW_NUMBER() OVER (PARTITION BY exercise name ORDER BY completed_at DESC) numbers the
+    sets per exercise, only rows up to limit_per_exercise leave the database.
+    """
+    names = list(exercise_names)
+    if not names:
+        return {}
+
+    conditions = [
+        Exercise.name.in_(names),
+        Workout.user_id == user_id,
+        Set.status == SetStatus.done,
+        Set.completed_at.isnot(None),
+    ]
+    if exclude_workout_id is not None:
+        conditions.append(Workout.id != exclude_workout_id)
+
+    ranked = (
+        select(
+            Exercise.name.label('exercise_name'),
+            Workout.name.label('workout_name'),
+            Workout.date_created.label('workout_date'),
+            Set.completed_at,
+            Set.weight,
+            Set.reps,
+            Set.duration,
+            Set.distance,
+            Set.id.label('set_id'),
+            func.row_number().over(
+                partition_by=Exercise.name,
+                order_by=(desc(Set.completed_at), desc(Set.id)),
+            ).label('rn'),
+        )
+        .select_from(Set)
+        .join(Exercise, Set.exercise_id == Exercise.id)
+        .join(Block, Exercise.block_id == Block.id)
+        .join(Workout, Block.workout_id == Workout.id)
+        .where(and_(*conditions))
+        .subquery()
+    )
+
+    history_query = (
+        select(ranked)
+        .where(ranked.c.rn <= limit_per_exercise)
+        .order_by(ranked.c.exercise_name, ranked.c.rn)
+    )
+
+    result = await db.execute(history_query)
+
+    history_by_exercise: Dict[str, List[ExerciseHistoryItem]] = defaultdict(list)
+    for row in result.all():
+        history_by_exercise[row.exercise_name].append(
+            ExerciseHistoryItem(
+                exercise_name=row.exercise_name,
+                workout_name=row.workout_name,
+                workout_date=row.workout_date,
+                completed_at=row.completed_at,
+                weight=row.weight,
+                reps=row.reps,
+                duration=row.duration,
+                distance=row.distance,
+                set_id=row.set_id
+            )
+        )
+
+    return dict(history_by_exercise)
+
+
 async def get_exercise_history_for_workout(
     db: AsyncSession,
     workout_id: int,
@@ -143,68 +452,8 @@ async def get_exercise_history_for_workout(
     result = await db.execute(current_workout_query)
     exercise_names = result.scalars().all()
     
-    if not exercise_names:
-        return {}
-    
-    # Get history for these exercise names across all user's workouts
-    history_query = (
-        select(
-            Exercise.name,
-            Workout.name.label('workout_name'),
-            Workout.date_created.label('workout_date'),
-            Set.completed_at,
-            Set.weight,
-            Set.reps,
-            Set.duration,
-            Set.distance,
-            Set.id.label('set_id')
-        )
-        .select_from(Set)
-        .join(Exercise, Set.exercise_id == Exercise.id)
-        .join(Block, Exercise.block_id == Block.id)
-        .join(Workout, Block.workout_id == Workout.id)
-        .where(
-            and_(
-                Exercise.name.in_(exercise_names),
-                Workout.user_id == user_id,
-                Set.status == SetStatus.done,
-                Set.completed_at.isnot(None)
-            )
-        )
-        .order_by(
-            Exercise.name,
-            desc(Set.completed_at)
-        )
-    )
-    
-    result = await db.execute(history_query)
-    rows = result.all()
-    
-    # Group by exercise name and limit results
-    history_by_exercise: Dict[str, List[ExerciseHistoryItem]] = defaultdict(list)
-    
-    for row in rows:
-        exercise_name = row.name
-        
-        # Skip if we already have enough entries for this exercise
-        if len(history_by_exercise[exercise_name]) >= limit_per_exercise:
-            continue
-            
-        history_item = ExerciseHistoryItem(
-            exercise_name=exercise_name,
-            workout_name=row.workout_name,
-            workout_date=row.workout_date,
-            completed_at=row.completed_at,
-            weight=row.weight,
-            reps=row.reps,
-            duration=row.duration,
-            distance=row.distance,
-            set_id=row.set_id
-        )
-        
-        history_by_exercise[exercise_name].append(history_item)
-    
-    return dict(history_by_exercise)
+    # Get the last N entries per exercise name across all user's workouts
+    return await _fetch_exercise_history(db, exercise_names, user_id, limit_per_exercise)
 
 
 async def get_workout_history_map(
@@ -229,68 +478,7 @@ async def get_workout_history_map(
         for exercise in block.exercises:
             exercise_names.add(exercise.name)
     
-    if not exercise_names:
-        return {}
-    
-    # Get history for all exercises in one query
-    history_query = (
-        select(
-            Exercise.name,
-            Workout.name.label('workout_name'),
-            Workout.date_created.label('workout_date'),
-            Set.completed_at,
-            Set.weight,
-            Set.reps,
-            Set.duration,
-            Set.distance,
-            Set.id.label('set_id')
-        )
-        .select_from(Set)
-        .join(Exercise, Set.exercise_id == Exercise.id)
-        .join(Block, Exercise.block_id == Block.id)
-        .join(Workout, Block.workout_id == Workout.id)
-        .where(
-            and_(
-                Exercise.name.in_(exercise_names),
-                Workout.user_id == workout.user_id,
-                Set.status == SetStatus.done,
-                Set.completed_at.isnot(None),
-                Workout.id != workout.id  # Exclude current workout
-            )
-        )
-        .order_by(
-            Exercise.name,
-            desc(Set.completed_at)
-        )
+    # Get history for all exercises in one query, excluding the current workout
+    return await _fetch_exercise_history(
+        db, exercise_names, workout.user_id, limit_per_exercise, exclude_workout_id=workout.id
     )
-    
-    result = await db.execute(history_query)
-    rows = result.all()
-    
-    # Group by exercise name
-    history_by_exercise: Dict[str, List[ExerciseHistoryItem]] = defaultdict(list)
-    
-    for row in rows:
-        exercise_name = row.name
-        
-        # Skip if we already have enough entries for this exercise
-        if len(history_by_exercise[exercise_name]) >= limit_per_exercise:
-            continue
-            
-        history_item = ExerciseHistoryItem(
-            exercise_name=exercise_name,
-            workout_name=row.workout_name,
-            workout_date=row.workout_date,
-            completed_at=row.completed_at,
-            weight=row.weight,
-            reps=row.reps,
-            duration=row.duration,
-            distance=row.distance,
-            set_id=row.set_id
-        )
-        
-        history_by_exercise[exercise_name].append(history_item)
-    
-    return dict(history_by_exercise)
-
-
@@ -0,0 +1,219 @@
+"""
+Job-Worker für die LLM-Job-Queue (llm_jobs): python -m app.worker
+
+Läuft getrennt von der API und führt Workout-Generierung und -Revision aus, die bei
+JOB_QUEUE_ENABLED über enqueue_job() eingereiht werden. Beliebig viele Worker-Prozesse
+können parallel laufen (SKIP LOCKED). Pro Prozess laufen bis zu JOB_WORKER_CONCURRENCY
+Jobs gleichzeitig.
+
+- Heartbeat verlängert das Lease laufender Jobs und holt Abbruch-Wünsche ab
+- SIGTERM/SIGINT: keine neuen Jobs mehr leasen, laufende Jobs zu Ende bringen
+- Stirbt der Prozess hart, läuft das Lease ab und ein anderer Worker wiederholt den Job
+"""
+
+import asyncio
+import logging
+import os
+import signal
+import socket
+from typing import Any, Awaitable, Callable, Dict, Optional
+from uuid import uuid4
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.core.config import get_config  # noqa: E402
+from app.db.session import create_session, close_engine  # noqa: E402
+from app.llm.utils.generation_tasks import generation_tasks  # noqa: E402
+from app.services.job_queue_service import (  # noqa: E402
+    JOB_KIND_WORKOUT_GENERATION,
+    JOB_KIND_WORKOUT_REVISION,
+    complete_job,
+    fail_job,
+    heartbeat_jobs,
+    lease_jobs,
+    reap_expired_jobs,
+)
+
+logger = logging.getLogger("job_worker")
+
+JobHandler = Callable[[Any], Awaitable[None]]
+
+
+async def run_workout_generation(job: Any) -> None:
+    from app.api.v2.llm_endpoint import CreateWorkoutRequest, generate_workout_background
+
+    request_data = CreateWorkoutRequest(**job.payload.get("request_data", {}))
+    await generate_workout_background(
+        workout_id=job.workout_id,
+        user_id=job.payload["user_id"],
+        request_data=request_data,
+        session_duration=request_data.duration_minutes,
+        profile_id=request_data.profile_id,
+        log_id=job.log_id,
+        reraise=True,
+    )
+
+
+async def run_workout_revision(job: Any) -> None:
+    from app.llm.workout_revision.workout_revision_service import revise_workout_background_v2
+
+    await revise_workout_background_v2(
+        workout_id=job.workout_id,
+        user_id=job.payload["user_id"],
+        user_feedback=job.payload["user_feedback"],
+        log_id=job.log_id,
+        bypass_cache=job.payload.get("bypass_cache", False),
+        reraise=True,
+    )
+
+
+DEFAULT_HANDLERS: Dict[str, JobHandler] = {
+    JOB_KIND_WORKOUT_GENERATION: run_workout_generation,
+    JOB_KIND_WORKOUT_REVISION: run_workout_revision,
+}
+
+
+class JobWorker:
+    def __init__(self, concurrency: Optional[int] = None, handlers: Optional[Dict[str, JobHandler]] = None):
+        config = get_config()
+        self.concurrency = concurrency or config.JOB_WORKER_CONCURRENCY
+        self.handlers = handlers or DEFAULT_HANDLERS
+        self.visibility_timeout = config.JOB_VISIBILITY_TIMEOUT_SECONDS
+        self.heartbeat_seconds = config.JOB_HEARTBEAT_SECONDS
+        self.poll_interval = config.JOB_POLL_INTERVAL_SECONDS
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:6]}"
+
+        self._in_flight: Dict[int, asyncio.Task] = {}
+        self._workout_ids: Dict[int, Optional[int]] = {}
+        self._stopping = asyncio.Event()
+        self._wakeup = asyncio.Event()
+
+        self.succeeded = 0
+        self.failed = 0
+
+    def stop(self) -> None:
+        if not self._stopping.is_set():
+            logger.info(f"[{self.worker_id}] Stopping - finishing {len(self._in_flight)} running job(s)")
+            self._stopping.set()
+            self._wakeup.set()
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except NotImplementedError:
+                pass  # Windows
+
+        logger.info(f"[{self.worker_id}] Started with concurrency {self.concurrency}")
+        heartbeat = asyncio.create_task(self._heartbeat_loop())
+        try:
+            while not self._stopping.is_set():
+                leased = await self._lease_and_start()
+                # Volle Auslastung oder nichts zu tun: warten bis ein Job fertig ist oder das Poll-Intervall um ist
+                if not leased or len(self._in_flight) >= self.concurrency:
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+
+            if self._in_flight:
+                await asyncio.gather(*self._in_flight.values(), return_exceptions=True)
+        finally:
+            heartbeat.cancel()
+            try:
+                await heartbeat
+            except asyncio.CancelledError:
+                pass
+            logger.info(f"[{self.worker_id}] Stopped (succeeded: {self.succeeded}, failed: {self.failed})")
+
+    async def _lease_and_start(self) -> int:
+        free_slots = self.concurrency - len(self._in_flight)
+        if free_slots <= 0:
+            return 0
+        try:
+            async with create_session() as db:
+                jobs = await lease_jobs(db, self.worker_id, free_slots, self.visibility_timeout)
+        except Exception as e:
+            logger.error(f"[{self.worker_id}] Leasing jobs failed: {e}")
+            return 0
+
+        for job in jobs:
+            if job.cancel_requested and job.workout_id is not None:
+                # Abbruch kam, während der Job noch wartete - Generierung startet gar nicht erst
+                generation_tasks.cancel(job.workout_id, pending=True)
+            self._workout_ids[job.id] = job.workout_id
+            self._in_flight[job.id] = asyncio.create_task(self._execute(job))
+        return len(jobs)
+
+    async def _execute(self, job: Any) -> None:
+        logger.info(f"[{self.worker_id}] Job {job.id} ({job.kind}) attempt {job.attempts}/{job.max_attempts}")
+        handler = self.handlers.get(job.kind)
+        try:
+            if handler is None:
+                async with create_session() as db:
+                    await fail_job(
+                        db, job.id, self.worker_id, job.attempts, job.max_attempts, job.log_id,
+                        f"Unbekannter Job-Typ: {job.kind}", dead=True,
+                    )
+                self.failed += 1
+                return
+
+            try:
+                await handler(job)
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"[{self.worker_id}] Job {job.id} failed: {e}", exc_info=True)
+                async with create_session() as db:
+                    await fail_job(
+                        db, job.id, self.worker_id, job.attempts, job.max_attempts, job.log_id,
+                        str(e) or type(e).__name__,
+                    )
+                return
+
+            async with create_session() as db:
+                await complete_job(db, job.id, self.worker_id)
+            self.succeeded += 1
+        except Exception as e:
+            # Status konnte nicht geschrieben werden - das Lease läuft ab, der Job wird wiederholt
+            logger.error(f"[{self.worker_id}] Could not record result of job {job.id}: {e}")
+        finally:
+            if job.workout_id is not None:
+                generation_tasks.discard_pending(job.workout_id)
+            self._in_flight.pop(job.id, None)
+            self._workout_ids.pop(job.id, None)
+            self._wakeup.set()
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            try:
+                async with create_session() as db:
+                    cancel_flags = await heartbeat_jobs(
+                        db, self.worker_id, list(self._in_flight), self.visibility_timeout
+                    )
+                    await reap_expired_jobs(db)
+            except Exception as e:
+                logger.error(f"[{self.worker_id}] Heartbeat failed: {e}")
+                continue
+
+            for job_id, cancel_requested in cancel_flags.items():
+                workout_id = self._workout_ids.get(job_id)
+                if cancel_requested and workout_id is not None:
+                    generation_tasks.cancel(workout_id, pending=True)
+
+
+async def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    worker = JobWorker()
+    try:
+        await worker.run()
+    finally:
+        await close_engine()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
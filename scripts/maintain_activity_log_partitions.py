@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Partition maintenance for user_activity_logs.
+
+Creates the upcoming monthly partitions and drops partitions older than
+LOG_RETENTION_DAYS. Intended to run daily via cron / scheduler.
+
+Usage:
+    python scripts/maintain_activity_log_partitions.py [--months-ahead 3] [--retention-days 90]
+"""
+import argparse
+import asyncio
+import logging
+
+from utils.script_setup import setup_environment, get_standalone_session
+
+setup_environment()
+
+from app.services.activity_log_partition_service import run_partition_maintenance
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+async def main(months_ahead: int | None, retention_days: int | None):
+    async with get_standalone_session() as db:
+        result = await run_partition_maintenance(
+            db,
+            months_ahead=months_ahead,
+            retention_days=retention_days,
+        )
+    logger.info(f"✅ Created partitions: {result['created'] or 'none'}")
+    logger.info(f"🗑️  Dropped partitions: {result['dropped'] or 'none'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain user_activity_logs partitions")
+    parser.add_argument("--months-ahead", type=int, default=None)
+    parser.add_argument("--retention-days", type=int, default=None)
+    args = parser.parse_args()
+    asyncio.run(main(args.months_ahead, args.retention_days))
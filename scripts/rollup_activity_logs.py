@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Incremental rollups for activity analytics.
+
+Aggregates user_activity_logs and activity_log_aggregates into hourly and daily
+rollup tables, starting at the stored watermark. Intended to run every few minutes
+via cron / scheduler; concurrent runs are skipped via an advisory lock.
+
+Usage:
+    python scripts/rollup_activity_logs.py
+"""
+import asyncio
+import logging
+
+from utils.script_setup import setup_environment, get_standalone_session
+
+setup_environment()
+
+from app.services.activity_rollup_service import run_rollups
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    async with get_standalone_session() as db:
+        result = await run_rollups(db)
+    logger.info(f"✅ Activity rollups: {result}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
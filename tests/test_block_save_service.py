@@ -0,0 +1,141 @@
+from types import SimpleNamespace
+
+from app.models.set_model import SetStatus
+from app.schemas.workout_schema import BlockInput, ExerciseInput, SetInput
+from app.services.block_save_service import compute_block_diff
+
+
+def _set(set_id: int, uid, exercise_id: int, position: int = 0):
+    return SimpleNamespace(
+        id=set_id, uid=uid, exercise_id=exercise_id, tag=None,
+        weight=None, reps=10, duration=None, distance=None, rest_time=None,
+        status=SetStatus.open, completed_at=None, position=position,
+    )
+
+
+def _exercise(exercise_id: int, uid, sets, position: int = 0):
+    return SimpleNamespace(
+        id=exercise_id, uid=uid, block_id=1, name=f"Übung {exercise_id}", description=None,
+        notes=None, superset_id=None, position=position, sets=sets,
+    )
+
+
+def _block(*exercises):
+    return SimpleNamespace(id=1, exercises=list(exercises))
+
+
+def _inserted_exercise_uids(diff):
+    return [state.values["uid"] for state in diff.exercise_inserts]
+
+
+def _inserted_set_uids(diff):
+    return [row["uid"] for state in diff.exercises for row in state.new_set_rows]
+
+
+def test_duplicate_exercise_uid_is_inserted_with_fresh_uid():
+    existing = _block(_exercise(10, "ex-a", [_set(100, "set-a1", 10)]))
+    block = BlockInput(name="Main", exercises=[
+        ExerciseInput(uid="ex-a", name="A", sets=[SetInput(uid="set-a1")]),
+        ExerciseInput(uid="ex-a", name="A (Kopie)", sets=[SetInput(uid="set-a1")]),
+    ])
+
+    diff = compute_block_diff(existing, block)
+
+    assert [update["id"] for update in diff.exercise_updates] == [10]
+    assert len(diff.exercise_inserts) == 1
+    assert _inserted_exercise_uids(diff)[0] != "ex-a"
+    # Das Set der Kopie darf die UID des weiter bestehenden Sets nicht übernehmen
+    assert [update["id"] for update in diff.set_updates] == [100]
+    assert _inserted_set_uids(diff)[0] != "set-a1"
+    assert diff.exercise_delete_uids == [] and diff.set_delete_uids == []
+
+
+def test_duplicate_new_uids_in_input_get_unique_uids():
+    block = BlockInput(name="Main", exercises=[
+        ExerciseInput(uid="new-ex", name="A", sets=[SetInput(uid="new-set"), SetInput(uid="new-set")]),
+        ExerciseInput(uid="new-ex", name="B", sets=[SetInput(uid="new-set")]),
+    ])
+
+    diff = compute_block_diff(_block(), block)
+
+    exercise_uids = _inserted_exercise_uids(diff)
+    set_uids = _inserted_set_uids(diff)
+    assert exercise_uids[0] == "new-ex" and len(set(exercise_uids)) == 2
+    assert set_uids[0] == "new-set" and len(set(set_uids)) == 3
+
+
+def test_duplicate_set_uid_within_exercise_is_inserted_with_fresh_uid():
+    existing = _block(_exercise(10, "ex-a", [_set(100, "set-a1", 10)]))
+    block = BlockInput(name="Main", exercises=[
+        ExerciseInput(uid="ex-a", name="A", sets=[SetInput(uid="set-a1"), SetInput(uid="set-a1")]),
+    ])
+
+    diff = compute_block_diff(existing, block)
+
+    assert [update["id"] for update in diff.set_updates] == [100]
+    assert len(_inserted_set_uids(diff)) == 1 and _inserted_set_uids(diff)[0] != "set-a1"
+
+
+def test_set_moved_between_exercises_keeps_its_uid():
+    existing = _block(
+        _exercise(10, "ex-a", [_set(100, "set-a1", 10), _set(101, "set-a2", 10, position=1)]),
+        _exercise(20, "ex-b", [_set(200, "set-b1", 20)], position=1),
+    )
+    block = BlockInput(name="Main", exercises=[
+        ExerciseInput(uid="ex-a", name="A", sets=[SetInput(uid="set-a1")]),
+        ExerciseInput(uid="ex-b", name="B", sets=[SetInput(uid="set-b1"), SetInput(uid="set-a2")]),
+    ])
+
+    diff = compute_block_diff(existing, block)
+
+    # Delete läuft vor dem Insert, die UID ist dann wieder frei
+    assert diff.set_delete_uids == ["set-a2"]
+    assert _inserted_set_uids(diff) == ["set-a2"]
+    assert sorted(update["id"] for update in diff.set_updates) == [100, 200]
+
+
+def test_set_copied_to_other_exercise_gets_fresh_uid():
+    existing = _block(
+        _exercise(10, "ex-a", [_set(100, "set-a1", 10)]),
+        _exercise(20, "ex-b", [], position=1),
+    )
+    # ex-b kommt zuerst: das Set bleibt trotzdem bei ex-a, die Kopie braucht eine neue UID
+    block = BlockInput(name="Main", exercises=[
+        ExerciseInput(uid="ex-b", name="B", sets=[SetInput(uid="set-a1")]),
+        ExerciseInput(uid="ex-a", name="A", sets=[SetInput(uid="set-a1")]),
+    ])
+
+    diff = compute_block_diff(existing, block)
+
+    assert [update["id"] for update in diff.set_updates] == [100]
+    assert diff.set_delete_uids == []
+    assert _inserted_set_uids(diff)[0] != "set-a1"
+
+
+def test_legacy_rows_without_uid():
+    existing = _block(
+        _exercise(10, None, [_set(100, None, 10), _set(101, "set-l2", 10, position=1)]),
+        _exercise(20, None, [_set(200, "set-k1", 20)], position=1),
+    )
+    block = BlockInput(name="Main", exercises=[
+        # Zuordnung über die ID, Set ohne UID im Input ist neu
+        ExerciseInput(id=10, name="Legacy", sets=[SetInput(uid="set-l2"), SetInput()]),
+        # Versucht die UID eines Sets der nicht gesendeten (und damit erhaltenen) Legacy-Übung
+        ExerciseInput(name="Neu", sets=[SetInput(uid="set-k1")]),
+    ])
+
+    diff = compute_block_diff(existing, block)
+
+    legacy_update = diff.exercise_updates[0]
+    assert legacy_update["id"] == 10 and legacy_update["uid"]
+    assert [update["id"] for update in diff.set_updates] == [101]
+    # Legacy-Set ohne UID bleibt unverändert erhalten
+    legacy_state = next(state for state in diff.exercises if state.values.get("id") == 10)
+    assert 100 in [values["id"] for values in legacy_state.sets]
+    # Nicht gesendete Legacy-Übung bleibt samt Sets erhalten
+    assert diff.exercise_delete_uids == [] and diff.set_delete_uids == []
+    assert any(state.values.get("id") == 20 for state in diff.exercises)
+
+    set_uids = _inserted_set_uids(diff)
+    assert len(set_uids) == 2 and all(set_uids) and "set-k1" not in set_uids
+    assert len(set(_inserted_exercise_uids(diff))) == 1
@@ -0,0 +1,151 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.llm.workout_generation_v1.versions.compressed_20250731.chain import astream_compressed_workout_chain
+from app.llm.workout_generation_v1.versions.compressed_20250731.stream_parser import CompactBlockStreamParser
+
+
+def _block(name: str, note: str = "") -> dict:
+    return {
+        "name": name,
+        "duration_min": 10,
+        "exercises": [{"name": "Kniebeuge", "reps": [10, 8], "note": note or None}],
+    }
+
+
+def _workout_json(blocks: list) -> str:
+    return json.dumps({
+        "focus_derivation": "Test",
+        "name": "Test-Workout",
+        "duration_min": 30,
+        "focus": "Kraft",
+        "description": "Beschreibung",
+        "blocks": blocks,
+    }, ensure_ascii=False)
+
+
+def _feed_all(parser: CompactBlockStreamParser, text: str, chunk_size: int) -> list:
+    blocks = []
+    for i in range(0, len(text), chunk_size):
+        blocks.extend(parser.feed(text[i:i + chunk_size]))
+    return blocks
+
+
+# --- CompactBlockStreamParser ---
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 17, 10_000])
+def test_parser_emits_blocks_split_across_chunks(chunk_size):
+    text = _workout_json([_block("Warm-Up"), _block("Main"), _block("Cool-Down")])
+    parser = CompactBlockStreamParser()
+
+    blocks = _feed_all(parser, text, chunk_size)
+
+    assert [block.name for block in blocks] == ["Warm-Up", "Main", "Cool-Down"]
+    assert parser.blocks_emitted == 3
+    assert [block.name for block in parser.parse_workout().blocks] == ["Warm-Up", "Main", "Cool-Down"]
+
+
+def test_parser_emits_block_as_soon_as_it_is_closed():
+    text = _workout_json([_block("Warm-Up"), _block("Main")])
+    first_block_end = text.index('"Main"')
+    parser = CompactBlockStreamParser()
+
+    assert [block.name for block in parser.feed(text[:first_block_end])] == ["Warm-Up"]
+    assert [block.name for block in parser.feed(text[first_block_end:])] == ["Main"]
+
+
+def test_parser_ignores_braces_and_escaped_quotes_inside_strings():
+    tricky = 'Tempo {3-1-1} [langsam], "Pause" \\ halten}]'
+    text = _workout_json([_block("Main {A}", note=tricky), _block("Finisher")])
+    parser = CompactBlockStreamParser()
+
+    blocks = _feed_all(parser, text, 5)
+
+    assert [block.name for block in blocks] == ["Main {A}", "Finisher"]
+    assert blocks[0].exercises[0].note == tricky
+
+
+def test_parser_skips_code_fence_before_json():
+    text = "```json\n" + _workout_json([_block("Main")]) + "\n```"
+    parser = CompactBlockStreamParser()
+
+    blocks = _feed_all(parser, text, 4)
+
+    assert [block.name for block in blocks] == ["Main"]
+    assert parser.parse_workout().name == "Test-Workout"
+
+
+def test_parser_skips_invalid_block():
+    invalid = {"name": "Kaputt", "exercises": []}  # duration_min fehlt
+    text = _workout_json([_block("Warm-Up"), invalid, _block("Main")])
+    parser = CompactBlockStreamParser()
+
+    blocks = _feed_all(parser, text, 7)
+
+    assert [block.name for block in blocks] == ["Warm-Up", "Main"]
+
+
+def test_parser_ignores_nested_objects_outside_blocks():
+    text = json.dumps({"meta": {"blocks": [{"name": "x"}]}, **json.loads(_workout_json([_block("Main")]))})
+    parser = CompactBlockStreamParser()
+
+    assert [block.name for block in _feed_all(parser, text, 9)] == ["Main"]
+
+
+# --- astream_compressed_workout_chain deadline ---
+
+class _FakeStreamChain:
+    def __init__(self, chunks, delay: float = 0.0):
+        self.chunks = chunks
+        self.delay = delay
+
+    async def astream(self, _inputs):
+        for chunk in self.chunks:
+            await asyncio.sleep(self.delay)
+            yield SimpleNamespace(content=chunk)
+
+
+def test_stream_deadline_does_not_count_consumer_time():
+    chain = _FakeStreamChain(["a", "b", "c"])
+
+    async def consume():
+        received = []
+        async for chunk in astream_compressed_workout_chain(chain, "prompt", timeout_seconds=0.05):
+            # Langsamer Consumer (z.B. Block speichern) - darf weder abbrechen noch die Deadline verbrauchen
+            await asyncio.sleep(0.1)
+            received.append(chunk)
+        return received
+
+    assert asyncio.run(consume()) == ["a", "b", "c"]
+
+
+def test_stream_deadline_raises_timeout_error_not_cancellation():
+    chain = _FakeStreamChain(["a", "b"], delay=0.2)
+
+    async def main():
+        async def consume():
+            async for _chunk in astream_compressed_workout_chain(chain, "prompt", timeout_seconds=0.05):
+                pass
+
+        task = asyncio.create_task(consume())
+        with pytest.raises(TimeoutError):
+            await task
+        assert not task.cancelled()
+        assert asyncio.current_task().cancelling() == 0
+
+    asyncio.run(main())
+
+
+def test_stream_deadline_covers_total_llm_time():
+    # Jeder Chunk einzeln unter der Deadline, zusammen darüber
+    chain = _FakeStreamChain(["a", "b", "c", "d"], delay=0.03)
+
+    async def consume():
+        async for _chunk in astream_compressed_workout_chain(chain, "prompt", timeout_seconds=0.08):
+            pass
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(consume())